@@ -0,0 +1,10 @@
+"""
+Micro-benchmarks for the per-frame hot paths of the integration.
+
+Run them from the repository root, e.g. `python -m benchmarks.extract_data`.
+"""
+
+from collector import register_integration
+
+# The benchmarks of the server core run without Home Assistant, like the collector
+register_integration()
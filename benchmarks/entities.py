@@ -0,0 +1,78 @@
+"""
+CPU spent on the Home Assistant side per DATA frame, for 1, 10 and 100 simulated inverters.
+
+Home Assistant itself is stubbed: state writes are only counted, so the results measure the work done by the
+integration to turn a decoded sample into state writes.
+"""
+
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from custom_components.local_solis_ginglong_inverter.decoder import DATA_FRAME_FIELDS, FrameDecoder, InverterSample
+from custom_components.local_solis_ginglong_inverter.sensor import InverterLoggerBaseEntity, InverterLoggerComponent
+from tests.conftest import build_data_frame
+
+ROUNDS = 200
+INVERTER_COUNTS = (1, 10, 100)
+
+
+_state_writes = [0]
+
+
+def _count_state_write(_entity: InverterLoggerBaseEntity) -> None:
+    _state_writes[0] += 1
+
+
+def _samples(count: int) -> list[InverterSample]:
+    """Return decoded samples whose power and energy values drift like a real inverter's."""
+    base = FrameDecoder(DATA_FRAME_FIELDS).decode(build_data_frame())
+    rng = random.Random(0)
+    samples = []
+    for i in range(count):
+        power = max(0, base.solar_active_power + rng.randint(-50, 50))
+        samples.append(
+            base.replace(
+                solar_active_power=power,
+                dc_power=power + 80,
+                export_active_power=power - 2900,
+                ac_voltage=round(base.ac_voltage + rng.uniform(-1, 1), 1),
+                solar_active_energy_today=base.solar_active_energy_today + 0.01 * (i // 10),
+            )
+        )
+    return samples
+
+
+async def measure(inverter_count: int) -> tuple[float, float]:
+    """Return the CPU time and state writes per frame."""
+    hass = SimpleNamespace(loop=asyncio.get_running_loop())
+    added = []
+    inverters = [InverterLoggerComponent(hass, added.extend, f"inverter{i}") for i in range(inverter_count)]
+    for entity in added:
+        await entity.async_added_to_hass()
+    samples = _samples(ROUNDS)
+
+    _state_writes[0] = 0
+    start = time.process_time()
+    for sample in samples:
+        for inverter in inverters:
+            inverter.set_data(sample)
+        # Let the scheduled publishes run
+        await asyncio.sleep(0)
+    elapsed = time.process_time() - start
+    frames = ROUNDS * inverter_count
+    return elapsed / frames, _state_writes[0] / frames
+
+
+async def main() -> None:
+    """Run the benchmark and print the cost per frame for every number of inverters."""
+    with patch.object(InverterLoggerBaseEntity, "async_write_ha_state", _count_state_write):
+        for inverter_count in INVERTER_COUNTS:
+            cpu, writes = await measure(inverter_count)
+            print(f"{inverter_count:>4} inverters  {cpu * 1e6:8.1f} µs CPU/frame  {writes:5.1f} state writes/frame")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
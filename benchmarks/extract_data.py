@@ -0,0 +1,62 @@
+"""Compare the compiled frame decoder with the previous per-field `unpack_from` implementation."""
+
+import timeit
+from struct import unpack_from
+
+from custom_components.local_solis_ginglong_inverter.decoder import DATA_FRAME_FIELDS, FrameDecoder
+from custom_components.local_solis_ginglong_inverter.sensor import ENTITIES_DESCRIPTIONS, _decoded_fields
+from tests.conftest import build_data_frame
+
+ITERATIONS = 100_000
+
+
+def legacy_extract_data(buffer: bytes) -> dict[str, int | float | str]:
+    """Decode a frame like `_extract_data` did before the compiled decoder."""
+    return {
+        "timestamp": unpack_from("<I", buffer, 22)[0],
+        "inverter_serial_number": buffer[32:48].decode("ascii").rstrip(),
+        "inverter_temperature": 0.1 * unpack_from("<H", buffer, 48)[0],
+        "dc_voltage_1": 0.1 * unpack_from("<H", buffer, 50)[0],
+        "dc_voltage_2": 0.1 * unpack_from("<H", buffer, 52)[0],
+        "dc_current_1": 0.1 * unpack_from("<H", buffer, 54)[0],
+        "dc_current_2": 0.1 * unpack_from("<H", buffer, 56)[0],
+        "solar_ac_current": 0.1 * unpack_from("<H", buffer, 62)[0],
+        "ac_voltage": 0.1 * unpack_from("<H", buffer, 68)[0],
+        "ac_frequency": 0.01 * unpack_from("<H", buffer, 70)[0],
+        "solar_active_power": int(unpack_from("<I", buffer, 72)[0]),
+        "solar_active_energy_today": 0.01 * unpack_from("<I", buffer, 76)[0],
+        "dc_power": int(unpack_from("<I", buffer, 116)[0]),
+        "solar_active_energy_this_month": int(unpack_from("<L", buffer, 120)[0]),
+        "solar_active_energy_yesterday": 0.1 * unpack_from("<H", buffer, 128)[0],
+        "solar_active_energy_total": int(unpack_from("<L", buffer, 130)[0]),
+        "solar_apparent_power": int(unpack_from("<I", buffer, 142)[0]),
+        "export_active_power": int(unpack_from("<i", buffer, 182)[0]),
+        "load_apparent_power": int(unpack_from("<I", buffer, 214)[0]),
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print the time per frame of each implementation."""
+    frame = build_data_frame()
+    view = memoryview(frame)
+    full_decoder = FrameDecoder(DATA_FRAME_FIELDS)
+    sensor_decoder = FrameDecoder(DATA_FRAME_FIELDS, _decoded_fields(ENTITIES_DESCRIPTIONS))
+
+    if full_decoder.decode(view).as_dict(derived=False) != legacy_extract_data(frame):
+        msg = "The compiled decoder does not match the legacy implementation"
+        raise AssertionError(msg)
+
+    cases = {
+        "legacy unpack_from": lambda: legacy_extract_data(frame),
+        "compiled, all fields": lambda: full_decoder.decode(view),
+        "compiled, sensor fields": lambda: sensor_decoder.decode(view),
+    }
+    baseline = None
+    for name, func in cases.items():
+        per_frame = min(timeit.repeat(func, number=ITERATIONS, repeat=5)) / ITERATIONS
+        baseline = baseline or per_frame
+        print(f"{name:<26} {per_frame * 1e6:8.3f} µs/frame  x{baseline / per_frame:.2f}")
+
+
+if __name__ == "__main__":
+    main()
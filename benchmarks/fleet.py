@@ -0,0 +1,236 @@
+"""
+Load generator simulating a fleet of Solis Wi-Fi dataloggers.
+
+Every simulated datalogger keeps a connection to the server and sends HEARTBEAT and DATA frames with its own serial
+numbers at the cadence of a real datalogger (optionally compressed with `--time-scale`), checking every response.
+Without `--port`, a `LoggerServer` is started in-process, with `--entities` behind a `LoggerServerEntity` whose
+Home Assistant side is stubbed like in `benchmarks.entities`.
+
+    python -m benchmarks.fleet --loggers 2000 --time-scale 0.01 --duration 30
+"""
+
+import argparse
+import asyncio
+import random
+import resource
+import statistics
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from custom_components.local_solis_ginglong_inverter.const import (
+    LISTENING_PORT,
+    MAX_CONNECTIONS,
+    MAX_CONNECTIONS_PER_PEER,
+    TRANSPORT,
+    TRANSPORT_BUFFERED,
+    TRANSPORT_STREAM,
+)
+from custom_components.local_solis_ginglong_inverter.protocol import (
+    DATA_REQUEST,
+    HEADER_LENGTH,
+    HEARTBEAT_REQUEST,
+    _is_valid_message,
+    _parse_header,
+)
+from custom_components.local_solis_ginglong_inverter.sensor import InverterLoggerBaseEntity, LoggerServerEntity
+from custom_components.local_solis_ginglong_inverter.server import LoggerServer
+from tests.conftest import build_data_frame, build_heartbeat_frame
+
+# Cadence of a real datalogger
+DATA_INTERVAL = 300  # seconds
+HEARTBEAT_INTERVAL = 60  # seconds
+RESPONSE_TIMEOUT = 10  # seconds
+RESPONSE_TYPE_OFFSET = 0x30
+
+
+@dataclass
+class FleetStats:
+    """Counters shared by all the simulated dataloggers."""
+
+    sent: int = 0
+    answered: int = 0
+    invalid_responses: int = 0
+    connection_errors: int = 0
+    connected: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+
+def _check_response(request: bytes, response: bytes) -> bool:
+    """Check that the response is valid and answers the request."""
+    request_header = _parse_header(request)
+    header = _parse_header(response)
+    return (
+        _is_valid_message(response)
+        and header["msg_type"] == request_header["msg_type"] - RESPONSE_TYPE_OFFSET
+        and header["serialno"] == request_header["serialno"]
+        and header["req_idx"] == request_header["req_idx"]
+    )
+
+
+class SimulatedLogger:
+    """Datalogger sending frames on its own connection until the deadline."""
+
+    def __init__(self, index: int, stats: FleetStats, time_scale: float) -> None:
+        """Initialize the datalogger, with serial numbers derived from its index."""
+        self.serialno = 0x10000000 + index
+        self.inverter_serial = f"SIM{index:013d}"
+        self.stats = stats
+        self.time_scale = time_scale
+        self.req_idx = 0
+
+    def _frame(self, msg_type: int) -> bytes:
+        if msg_type == HEARTBEAT_REQUEST:
+            frame = bytearray(build_heartbeat_frame(serialno=self.serialno))
+        else:
+            frame = bytearray(
+                build_data_frame(self.inverter_serial, timestamp=int(time.time()), serialno=self.serialno)
+            )
+        # Every request gets its own index, echoed in the response
+        self.req_idx = (self.req_idx + 1) & 0xFF
+        frame[6] = self.req_idx
+        frame[-2] = (frame[-2] + self.req_idx) & 0xFF
+        return bytes(frame)
+
+    async def run(self, port: int, start_delay: float, deadline: float) -> None:
+        """Connect after `start_delay` and send frames until `deadline`."""
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(start_delay)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            self.stats.connection_errors += 1
+            return
+        self.stats.connected += 1
+        # The datalogger sends a DATA frame right after connecting, then follows its cadence
+        next_data = next_heartbeat = loop.time()
+        try:
+            while True:
+                now = loop.time()
+                msg_type = DATA_REQUEST if next_data <= next_heartbeat else HEARTBEAT_REQUEST
+                at = min(next_data, next_heartbeat)
+                if at >= deadline:
+                    break
+                if at > now:
+                    await asyncio.sleep(at - now)
+                if msg_type == DATA_REQUEST:
+                    next_data += DATA_INTERVAL * self.time_scale
+                else:
+                    next_heartbeat += HEARTBEAT_INTERVAL * self.time_scale
+                await self._exchange(reader, writer, self._frame(msg_type))
+        except (OSError, asyncio.IncompleteReadError, TimeoutError):
+            self.stats.connection_errors += 1
+        finally:
+            self.stats.connected -= 1
+            writer.close()
+
+    async def _exchange(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, frame: bytes) -> None:
+        start = time.perf_counter()
+        writer.write(frame)
+        self.stats.sent += 1
+        async with asyncio.timeout(RESPONSE_TIMEOUT):
+            header = await reader.readexactly(HEADER_LENGTH)
+            response = header + await reader.readexactly(_parse_header(header)["payload_length"] + 2)
+        self.stats.latencies.append(time.perf_counter() - start)
+        if _check_response(frame, response):
+            self.stats.answered += 1
+        else:
+            self.stats.invalid_responses += 1
+
+
+def _count_state_write(entity: InverterLoggerBaseEntity) -> None:
+    entity.hass.state_writes += 1
+
+
+def _start_entity_server(transport: str, loggers: int) -> tuple[LoggerServer, SimpleNamespace]:
+    """Return a server feeding a `LoggerServerEntity`, whose Home Assistant side is stubbed."""
+    hass = SimpleNamespace(loop=asyncio.get_running_loop(), state_writes=0)
+
+    def add_entities(entities: list) -> None:
+        for entity in entities:
+            entity.loaded = True
+
+    config = {LISTENING_PORT: 0, TRANSPORT: transport, MAX_CONNECTIONS: loggers, MAX_CONNECTIONS_PER_PEER: loggers}
+    entity = LoggerServerEntity(hass, config, add_entities, "fleet")
+    return entity.server, hass
+
+
+def _max_rss() -> int:
+    """Return the peak resident memory of the process, in bytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _raise_file_limit() -> None:
+    """Allow as many open sockets as possible, both ends of every connection are in this process."""
+    _soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def main() -> None:
+    """Parse the arguments, run the fleet and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--loggers", type=int, default=1000, help="number of simulated dataloggers")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run the fleet for")
+    parser.add_argument("--time-scale", type=float, default=0.01, help="factor applied to the datalogger cadence")
+    parser.add_argument("--port", type=int, help="port of a running server, an in-process server is used otherwise")
+    parser.add_argument("--transport", choices=(TRANSPORT_STREAM, TRANSPORT_BUFFERED), default=TRANSPORT_STREAM)
+    parser.add_argument("--entities", action="store_true", help="feed the samples to stubbed Home Assistant entities")
+    args = parser.parse_args()
+
+    _raise_file_limit()
+    server = hass = None
+    port = args.port
+    if port is None:
+        if args.entities:
+            server, hass = _start_entity_server(args.transport, args.loggers)
+        else:
+            # All the simulated dataloggers connect from the same host
+            server = LoggerServer(
+                0,
+                lambda _sample: None,
+                transport=args.transport,
+                max_connections=args.loggers,
+                max_connections_per_peer=args.loggers,
+            )
+        await server.start_server()
+        port = server.sockets[0].getsockname()[1]
+
+    stats = FleetStats()
+    loop = asyncio.get_running_loop()
+    # Connections are spread over the first DATA interval, like dataloggers powering up over time
+    ramp = min(args.duration / 2, DATA_INTERVAL * args.time_scale)
+    deadline = loop.time() + args.duration
+    loggers = [SimulatedLogger(i, stats, args.time_scale) for i in range(args.loggers)]
+    memory_before = _max_rss()
+    tasks = [asyncio.create_task(logger.run(port, random.uniform(0, ramp), deadline)) for logger in loggers]
+
+    await asyncio.sleep(ramp)
+    connected = stats.connected
+    memory_per_connection = (_max_rss() - memory_before) / max(connected, 1)
+    sent_before, start = stats.sent, time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        await server.stop_server()
+
+    latencies = stats.latencies
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    print(f"{args.loggers} dataloggers, {connected} connected after the {ramp:.1f} s ramp-up")
+    print(f"{(stats.sent - sent_before) / elapsed:.0f} frames/s sustained after the ramp-up")
+    print(f"{stats.sent} frames sent, {stats.answered} answered, {stats.invalid_responses} invalid responses")
+    print(f"{stats.connection_errors} connection errors")
+    print(
+        f"latency p50 {percentiles[49] * 1e3:.2f} ms  p90 {percentiles[89] * 1e3:.2f} ms  "
+        f"p99 {percentiles[98] * 1e3:.2f} ms  max {max(latencies, default=0) * 1e3:.2f} ms"
+    )
+    side = "both ends" if args.port is None else "client side"
+    print(f"{memory_per_connection / 1024:.1f} KiB per connection ({side})")
+    if hass is not None:
+        print(f"{hass.state_writes} state writes")
+
+
+if __name__ == "__main__":
+    # Only the stubbed entities of --entities write their state
+    with patch.object(InverterLoggerBaseEntity, "async_write_ha_state", _count_state_write):
+        asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Replay a capture file recorded by `LoggerServer` against a server, over loopback.
+
+The frames received from every recorded connection are sent again on their own connection, waiting for the response
+of the server after each one, in real time (`--speed 1`), N times faster (`--speed N`) or flat-out (`--speed 0`).
+Without `--port`, a `LoggerServer` is started in-process and the decoded samples are counted.
+
+    python -m benchmarks.replay local_solis_ginglong_inverter_capture_<entry>.bin --speed 10
+"""
+
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+
+from custom_components.local_solis_ginglong_inverter.capture import CapturedFrame, read_capture
+from custom_components.local_solis_ginglong_inverter.const import TRANSPORT_BUFFERED, TRANSPORT_STREAM
+from custom_components.local_solis_ginglong_inverter.const_defaults import DEFAULT_MAX_CONNECTIONS
+from custom_components.local_solis_ginglong_inverter.protocol import HEADER_LENGTH, _parse_header
+from custom_components.local_solis_ginglong_inverter.server import LoggerServer
+from custom_components.local_solis_ginglong_inverter.tracing import DIRECTION_RECEIVED
+
+
+def load_connections(path: str) -> list[list[CapturedFrame]]:
+    """Return the frames sent by the dataloggers, grouped by recorded connection."""
+    connections = defaultdict(list)
+    for frame in read_capture(path):
+        if frame.direction == DIRECTION_RECEIVED:
+            connections[frame.peer].append(frame)
+    return list(connections.values())
+
+
+async def _replay_connection(port: int, frames: list[CapturedFrame], clock: tuple[float, float], speed: float) -> int:
+    """Send the frames of a connection and return how many were answered."""
+    loop = asyncio.get_running_loop()
+    start, first_timestamp = clock
+    answered = 0
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for frame in frames:
+            if speed > 0:
+                delay = start + (frame.timestamp - first_timestamp) / speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            writer.write(frame.data)
+            header = await reader.readexactly(HEADER_LENGTH)
+            await reader.readexactly(_parse_header(header)["payload_length"] + 2)
+            answered += 1
+    except (OSError, asyncio.IncompleteReadError):
+        # The server closes the connection on an invalid frame
+        pass
+    finally:
+        writer.close()
+    return answered
+
+
+async def replay(path: str, port: int, speed: float) -> tuple[int, int, float]:
+    """Replay a capture against the server on `port`, returning the frames sent, answered and the elapsed time."""
+    connections = load_connections(path)
+    if not connections:
+        return 0, 0, 0.0
+    first_timestamp = min(frames[0].timestamp for frames in connections)
+    clock = (asyncio.get_running_loop().time(), first_timestamp)
+    start = time.perf_counter()
+    answered = await asyncio.gather(*(_replay_connection(port, frames, clock, speed) for frames in connections))
+    return sum(len(frames) for frames in connections), sum(answered), time.perf_counter() - start
+
+
+async def main() -> None:
+    """Parse the arguments and replay the capture."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("capture", help="capture file to replay")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor, 0 replays flat-out")
+    parser.add_argument("--port", type=int, help="port of a running server, an in-process server is used otherwise")
+    parser.add_argument("--transport", choices=(TRANSPORT_STREAM, TRANSPORT_BUFFERED), default=TRANSPORT_STREAM)
+    args = parser.parse_args()
+
+    samples = []
+    server = None
+    port = args.port
+    if port is None:
+        # The recorded connections are all replayed from the same host
+        server = LoggerServer(
+            0, samples.append, transport=args.transport, max_connections_per_peer=DEFAULT_MAX_CONNECTIONS
+        )
+        await server.start_server()
+        port = server.sockets[0].getsockname()[1]
+    try:
+        sent, answered, elapsed = await replay(args.capture, port, args.speed)
+    finally:
+        if server is not None:
+            await server.stop_server()
+
+    rate = sent / elapsed if elapsed else 0.0
+    print(f"{sent} frames sent, {answered} answered in {elapsed:.2f} s ({rate:.0f} frames/s)")
+    if server is not None:
+        print(f"{len(samples)} samples decoded")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""Compare the precomputed response templates with building every response from scratch."""
+
+import datetime
+import timeit
+from functools import reduce
+from struct import pack
+
+from custom_components.local_solis_ginglong_inverter.protocol import (
+    END_BYTE,
+    START_BYTE,
+    ResponseTemplates,
+    _mock_server_response,
+    _parse_header,
+)
+from tests.conftest import build_data_frame, build_heartbeat_frame
+
+ITERATIONS = 100_000
+
+
+def legacy_mock_server_response(header: dict[str, int], request_payload: bytes) -> bytes:
+    """Build a response like `_mock_server_response` did before the templates, with the `reduce` checksum."""
+    unix_time = int(datetime.datetime.now(tz=datetime.UTC).timestamp())
+    payload = pack("<BBIBBBB", request_payload[0], 0x01, unix_time, 0xAA, 0xAA, 0x00, 0x00)
+    resp_type = header["msg_type"] - 0x30
+    header = pack(
+        "<BHBBBBI", START_BYTE, len(payload), 0x10, resp_type, header["req_idx"], header["req_idx"], header["serialno"]
+    )
+    message = header + payload
+    message += pack("BB", reduce(lambda lrc, x: (lrc + x) & 255, message[1:]) & 255, END_BYTE)
+    return message
+
+
+def main() -> None:
+    """Run the benchmark and print the time per response of each implementation."""
+    templates = ResponseTemplates()
+    for frame in (build_data_frame(), build_heartbeat_frame()):
+        header = _parse_header(frame)
+        for req_idx in (0, 1, 127, 255):
+            header["req_idx"] = req_idx
+            # The timestamp could change between the calls, compare the rest
+            expected = legacy_mock_server_response(header, frame)
+            for response in (_mock_server_response(header, frame), templates.response(header, frame)):
+                if response[:13] != expected[:13] or response[17:-2] != expected[17:-2]:
+                    msg = "The responses do not match the legacy implementation"
+                    raise AssertionError(msg)
+                if sum(response[1:-2]) & 255 != response[-2]:
+                    msg = "Invalid response checksum"
+                    raise AssertionError(msg)
+
+    frame = build_data_frame()
+    header = _parse_header(frame)
+    cases = {
+        "legacy, reduce checksum": lambda: legacy_mock_server_response(header, frame),
+        "built, sum checksum": lambda: _mock_server_response(header, frame),
+        "template": lambda: templates.response(header, frame),
+    }
+    baseline = None
+    for name, func in cases.items():
+        per_response = min(timeit.repeat(func, number=ITERATIONS, repeat=5)) / ITERATIONS
+        baseline = baseline or per_response
+        print(f"{name:<26} {per_response * 1e6:8.3f} µs/response  x{baseline / per_response:.2f}")
+
+
+if __name__ == "__main__":
+    main()
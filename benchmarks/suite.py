@@ -0,0 +1,121 @@
+"""
+Micro-benchmarks of the protocol and entity hot paths, run by pytest-benchmark to catch regressions.
+
+    python -m pytest benchmarks/suite.py --benchmark-autosave
+    python -m pytest benchmarks/suite.py --benchmark-compare --benchmark-compare-fail=min:10%
+
+The second run fails if a case got slower than the last saved run by more than 10%. The entity cases need Home
+Assistant, they are skipped without it.
+"""
+
+import asyncio
+import itertools
+from collections.abc import Callable, Iterator
+from struct import pack_into
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.local_solis_ginglong_inverter.protocol import (
+    ResponseTemplates,
+    _checksum_byte,
+    _mock_server_response,
+    _parse_header,
+    _scan_frame,
+)
+from custom_components.local_solis_ginglong_inverter.server import LoggerServer, _extract_data
+from tests.conftest import build_data_frame
+
+_TIMESTAMP_OFFSET = 22
+
+FRAME = build_data_frame()
+HEADER = _parse_header(FRAME)
+
+
+def _no_state_write(_entity: object) -> None:
+    pass
+
+
+@pytest.fixture
+def loop() -> Iterator[asyncio.AbstractEventLoop]:
+    """Event loop the cases run an iteration of, without running the benchmark in it."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def handle_message() -> Callable[..., Any]:
+    """Message handler of a server with no datalogger connected."""
+    server = LoggerServer(0, lambda _sample: None)
+    return server._LoggerServer__handle_message  # noqa: SLF001
+
+
+def test_parse_header(benchmark: Any) -> None:
+    benchmark(_parse_header, FRAME)
+
+
+def test_checksum_byte(benchmark: Any) -> None:
+    benchmark(lambda: _checksum_byte(FRAME[1:-2]))
+
+
+def test_extract_data(benchmark: Any) -> None:
+    benchmark(_extract_data, FRAME)
+
+
+def test_mock_server_response(benchmark: Any) -> None:
+    benchmark(_mock_server_response, HEADER, FRAME)
+
+
+def test_response_template(benchmark: Any) -> None:
+    benchmark(ResponseTemplates().response, HEADER, FRAME)
+
+
+def test_validate_frame(benchmark: Any) -> None:
+    benchmark(_scan_frame, FRAME, 0, len(FRAME))
+
+
+def test_handle_message(benchmark: Any, handle_message: Callable[..., Any]) -> None:
+    # Every live frame has a new timestamp, otherwise all but the first one would be dropped as duplicates
+    live_frame = bytearray(FRAME)
+    pack_into("<I", live_frame, _TIMESTAMP_OFFSET, 0)
+    live_checksum = _checksum_byte(live_frame[1:-2])
+    timestamps = itertools.count(_extract_data(FRAME).timestamp + 1)
+
+    def handle_live_message() -> None:
+        timestamp = next(timestamps)
+        pack_into("<I", live_frame, _TIMESTAMP_OFFSET, timestamp)
+        # The sum of the bytes of the timestamp, modulo 256, is the sum of its shifts
+        live_frame[-2] = (live_checksum + timestamp + (timestamp >> 8) + (timestamp >> 16) + (timestamp >> 24)) & 255
+        handle_message(("127.0.0.1", 0), HEADER, live_frame, len)
+
+    benchmark(handle_live_message)
+
+
+def test_handle_duplicate_message(benchmark: Any, handle_message: Callable[..., Any]) -> None:
+    handle_message(("127.0.0.1", 0), HEADER, FRAME, len)
+    benchmark(handle_message, ("127.0.0.1", 0), HEADER, FRAME, len)
+
+
+def test_set_data(benchmark: Any, loop: asyncio.AbstractEventLoop) -> None:
+    sensor = pytest.importorskip("custom_components.local_solis_ginglong_inverter.sensor")
+    sample = _extract_data(FRAME)
+    # Each cycle alternates between two samples, so every sensor with a deadband below the change is written
+    samples = (sample, sample.replace(solar_active_power=sample.solar_active_power + 100, ac_voltage=240.0))
+    cycle = [0]
+
+    with patch.object(sensor.InverterLoggerBaseEntity, "async_write_ha_state", _no_state_write):
+        inverter = sensor.InverterLoggerComponent(SimpleNamespace(loop=loop), lambda _entities: None, "benchmark")
+        for entity in inverter.entities:
+            entity.loaded = True
+
+        def set_data() -> None:
+            cycle[0] ^= 1
+            inverter.set_data(samples[cycle[0]])
+            # Run a single loop iteration, which publishes the changed sensors like after a frame is received
+            loop.call_soon(loop.stop)
+            loop.run_forever()
+
+        benchmark(set_data)
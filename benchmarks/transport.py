@@ -0,0 +1,58 @@
+"""Loopback throughput of the stream and buffered-protocol transports of `LoggerServer`."""
+
+import asyncio
+import time
+
+from custom_components.local_solis_ginglong_inverter.const import TRANSPORT_BUFFERED, TRANSPORT_STREAM
+from custom_components.local_solis_ginglong_inverter.server import LoggerServer
+from tests.conftest import build_data_frame, build_heartbeat_frame
+
+CONNECTIONS = 50
+FRAMES_PER_CONNECTION = 2_000
+RESPONSE_LENGTH = 23
+
+
+async def _run_logger(port: int, frames: list[bytes]) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for frame in frames:
+        writer.write(frame)
+        await reader.readexactly(RESPONSE_LENGTH)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def measure(transport: str) -> float:
+    """Return the frames per second handled by the server with the given transport."""
+    received = []
+    # All the simulated dataloggers connect from the same host
+    server = LoggerServer(0, received.append, transport=transport, max_connections_per_peer=CONNECTIONS)
+    await server.start_server()
+    port = server.sockets[0].getsockname()[1]
+    # Distinct inverters and timestamps, so no sample is dropped as a duplicate
+    connections = [
+        [
+            build_heartbeat_frame() if i % 10 == 0 else build_data_frame(f"{c:016d}", timestamp=1_750_000_000 + i)
+            for i in range(FRAMES_PER_CONNECTION)
+        ]
+        for c in range(CONNECTIONS)
+    ]
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(_run_logger(port, frames) for frames in connections))
+        elapsed = time.perf_counter() - start
+    finally:
+        await server.stop_server()
+    return CONNECTIONS * FRAMES_PER_CONNECTION / elapsed
+
+
+async def main() -> None:
+    """Run the benchmark and print the throughput of each transport."""
+    baseline = None
+    for transport in (TRANSPORT_STREAM, TRANSPORT_BUFFERED):
+        rate = await measure(transport)
+        baseline = baseline or rate
+        print(f"{transport:<10} {rate:10.0f} frames/s  x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
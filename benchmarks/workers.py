@@ -0,0 +1,102 @@
+"""
+Throughput of the standalone collector with 1, 2 and 4 worker processes sharing the port.
+
+Client processes open connections sending DATA frames as fast as they are answered, and the rate is the number of
+samples merged by the parent per second. The workers only scale up to the number of CPUs, which the clients share.
+
+    python -m benchmarks.workers --workers 1 2 4 --clients 4
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from collector.cli import create_worker_pool, parse_args
+from tests.conftest import build_data_frame
+
+CONNECTIONS_PER_CLIENT = 25
+FRAMES_PER_CONNECTION = 1_000
+RESPONSE_LENGTH = 23
+
+
+async def _run_logger(port: int, frames: list[bytes]) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for frame in frames:
+        writer.write(frame)
+        await reader.readexactly(RESPONSE_LENGTH)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def _run_client(port: int, client: int) -> None:
+    # Distinct inverters and timestamps, so no sample is dropped as a duplicate
+    connections = [
+        [
+            build_data_frame(f"{client:04d}{c:012d}", timestamp=1_750_000_000 + i, serialno=client << 16 | c)
+            for i in range(FRAMES_PER_CONNECTION)
+        ]
+        for c in range(CONNECTIONS_PER_CLIENT)
+    ]
+    await asyncio.gather(*(_run_logger(port, frames) for frames in connections))
+
+
+def run_client(port: int, client: int) -> None:
+    """Send the frames of the connections of a client process."""
+    asyncio.run(_run_client(port, client))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def measure(workers: int, clients: int, executor: ProcessPoolExecutor) -> float:
+    """Return the samples per second merged from the given number of workers."""
+    port = _free_port()
+    expected = clients * CONNECTIONS_PER_CLIENT * FRAMES_PER_CONNECTION
+    done = asyncio.Event()
+    received = 0
+
+    def on_sample(_sample: object, *, live: bool = True) -> None:  # noqa: ARG001
+        nonlocal received
+        received += 1
+        if received == expected:
+            done.set()
+
+    args = parse_args(
+        ["--port", str(port), "--workers", str(workers), "--max-connections-per-peer", str(clients * 100)]
+    )
+    pool = create_worker_pool(args, on_sample)
+    await pool.start()
+    loop = asyncio.get_running_loop()
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(loop.run_in_executor(executor, run_client, port, c) for c in range(clients)))
+        await done.wait()
+        elapsed = time.perf_counter() - start
+    finally:
+        await pool.close()
+    return expected / elapsed
+
+
+async def main() -> None:
+    """Run the benchmark and print the throughput with every worker count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to measure")
+    parser.add_argument("--clients", type=int, default=4, help="client processes sending the frames")
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} CPUs, {args.clients} client processes")
+    baseline = None
+    with ProcessPoolExecutor(args.clients) as executor:
+        for workers in args.workers:
+            rate = await measure(workers, args.clients, executor)
+            baseline = baseline or rate
+            print(f"{workers:>2} workers {rate:10.0f} samples/s  x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,35 @@
+"""
+Standalone collector, receiving the datalogger messages outside of Home Assistant.
+
+The collector runs the `LoggerServer` of the integration in its own process, with uvloop if it is installed, answers
+and forwards the datalogger messages, and publishes the decoded samples as JSON lines (see `publisher`). The
+integration consumes them when its collector option is set, so the protocol handling no longer runs in the Home
+Assistant event loop and keeps going while Home Assistant restarts. With `--workers`, several processes share the port
+of the dataloggers (see `workers`).
+
+    python -m collector --port 5555 --publish 127.0.0.1:8765
+
+The package of the integration imports Home Assistant, so it is registered without running its `__init__`: the
+modules the collector uses only import each other, and are imported without Home Assistant.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+INTEGRATION = "custom_components.local_solis_ginglong_inverter"
+INTEGRATION_PATH = Path(__file__).resolve().parent.parent / "custom_components" / "local_solis_ginglong_inverter"
+
+
+def register_integration() -> None:
+    """Register the package of the integration, if not imported yet, without importing Home Assistant."""
+    if INTEGRATION in sys.modules:
+        return
+    spec = importlib.util.spec_from_file_location(
+        INTEGRATION, INTEGRATION_PATH / "__init__.py", submodule_search_locations=[str(INTEGRATION_PATH)]
+    )
+    # Created but not executed, its modules are then found in its path as usual
+    sys.modules[INTEGRATION] = importlib.util.module_from_spec(spec)
+
+
+register_integration()
@@ -0,0 +1,7 @@
+"""Run the standalone collector, `python -m collector --help` lists its options."""
+
+from .cli import main
+
+# The spawned workers import this module again, as __mp_main__
+if __name__ == "__main__":
+    main()
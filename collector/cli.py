@@ -0,0 +1,198 @@
+"""Command line of the standalone collector."""
+
+import argparse
+import asyncio
+import logging
+import signal
+import socket
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+
+from custom_components.local_solis_ginglong_inverter.const import (
+    EXPORT_CSV,
+    EXPORT_SQLITE,
+    FORWARD_OVERFLOW_DROP_NEWEST,
+    FORWARD_OVERFLOW_DROP_OLDEST,
+    TRANSPORT_BUFFERED,
+    TRANSPORT_STREAM,
+)
+from custom_components.local_solis_ginglong_inverter.const_defaults import (
+    DEFAULT_COLLECTOR_PORT,
+    DEFAULT_EXPORT_FORMAT,
+    DEFAULT_FORWARD_HOST,
+    DEFAULT_FORWARD_OVERFLOW,
+    DEFAULT_FORWARD_QUEUE_SIZE,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_CONNECTIONS_PER_PEER,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_TRACE_SIZE,
+    DEFAULT_TRANSPORT,
+)
+from custom_components.local_solis_ginglong_inverter.decoder import DEFAULT_PROFILE, InverterSample, load_profiles
+from custom_components.local_solis_ginglong_inverter.sample_stream import parse_collector_address
+from custom_components.local_solis_ginglong_inverter.server import LoggerServer
+
+from .publisher import SamplePublisher
+from .workers import WorkerPool
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _loop_factory(use_uvloop: bool) -> Callable[[], asyncio.AbstractEventLoop] | None:  # noqa: FBT001
+    """Return the factory of the uvloop event loop, if wanted and installed."""
+    if not use_uvloop:
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        _LOGGER.info("uvloop is not installed, using the default event loop")
+        return None
+    return uvloop.new_event_loop
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="python -m collector",
+        description="Standalone collector, receiving the datalogger messages outside of Home Assistant.",
+    )
+    parser.add_argument("--port", type=int, required=True, help="port the dataloggers connect to")
+    parser.add_argument(
+        "--publish",
+        default=f"127.0.0.1:{DEFAULT_COLLECTOR_PORT}",
+        help="host[:port] the samples are published on",
+    )
+    parser.add_argument("--forward", action="store_true", help="forward the messages to the real server")
+    parser.add_argument("--forward-host", default=DEFAULT_FORWARD_HOST, help="comma-separated host[:port] targets")
+    parser.add_argument("--forward-local-ack", action="store_true", help="answer locally when forwarding")
+    parser.add_argument("--forward-queue-size", type=int, default=DEFAULT_FORWARD_QUEUE_SIZE)
+    parser.add_argument(
+        "--forward-overflow",
+        choices=(FORWARD_OVERFLOW_DROP_OLDEST, FORWARD_OVERFLOW_DROP_NEWEST),
+        default=DEFAULT_FORWARD_OVERFLOW,
+    )
+    parser.add_argument("--transport", choices=(TRANSPORT_STREAM, TRANSPORT_BUFFERED), default=DEFAULT_TRANSPORT)
+    parser.add_argument("--trace-size", type=int, default=DEFAULT_TRACE_SIZE)
+    parser.add_argument("--capture", type=Path, help="binary capture file all the frames are appended to")
+    parser.add_argument(
+        "--export", type=Path, help="SQLite database or directory of CSV files every sample is exported to"
+    )
+    parser.add_argument("--export-format", choices=(EXPORT_SQLITE, EXPORT_CSV), default=DEFAULT_EXPORT_FORMAT)
+    parser.add_argument("--decoders", type=Path, help="JSON file of extra decoder profiles")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT)
+    parser.add_argument("--read-timeout", type=float, default=DEFAULT_READ_TIMEOUT)
+    parser.add_argument("--max-connections", type=int, default=DEFAULT_MAX_CONNECTIONS)
+    parser.add_argument("--max-connections-per-peer", type=int, default=DEFAULT_MAX_CONNECTIONS_PER_PEER)
+    parser.add_argument(
+        "--workers", type=int, default=1, help="processes sharing the port, the connection limits apply to each one"
+    )
+    parser.add_argument("--no-uvloop", action="store_true", help="use the default event loop even if uvloop is there")
+    parser.add_argument("--verbose", "-v", action="count", default=0, help="log more, -vv for every frame")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        parser.error("--workers needs SO_REUSEPORT, which is not available on this platform")
+    return args
+
+
+def _configure_logging(verbose: int) -> None:
+    logging.basicConfig(
+        level=(logging.WARNING, logging.INFO, logging.DEBUG)[min(verbose, 2)],
+        format="%(asctime)s %(levelname)s %(processName)s %(name)s: %(message)s",
+    )
+
+
+def _create_server(
+    args: argparse.Namespace,
+    on_data: Callable[[InverterSample], None],
+    on_history: Callable[[InverterSample], None],
+    **kwargs: object,
+) -> LoggerServer:
+    """Return the server configured by the arguments, with extra `LoggerServer` arguments."""
+    kwargs.setdefault("capture_path", args.capture)
+    kwargs.setdefault("export_path", args.export)
+    return LoggerServer(
+        args.port,
+        on_data,
+        forward=args.forward,
+        forward_host=args.forward_host,
+        forward_local_ack=args.forward_local_ack,
+        forward_queue_size=args.forward_queue_size,
+        forward_overflow=args.forward_overflow,
+        decoder_profiles=load_profiles(args.decoders) if args.decoders is not None else (),
+        transport=args.transport,
+        trace_size=args.trace_size,
+        idle_timeout=args.idle_timeout,
+        read_timeout=args.read_timeout,
+        max_connections=args.max_connections,
+        max_connections_per_peer=args.max_connections_per_peer,
+        export_format=args.export_format,
+        on_history=on_history,
+        **kwargs,
+    )
+
+
+def _create_worker_server(
+    args: argparse.Namespace, index: int, on_sample: Callable[[InverterSample], None]
+) -> LoggerServer:
+    """Return the server of a worker, passing all its samples to the parent which classifies them again."""
+    _configure_logging(args.verbose)
+    capture_path = None if args.capture is None else args.capture.with_suffix(f".{index}{args.capture.suffix}")
+    export_path = None if args.export is None else args.export.with_suffix(f".{index}{args.export.suffix}")
+    return _create_server(
+        args, on_sample, on_sample, reuse_port=True, capture_path=capture_path, export_path=export_path
+    )
+
+
+def create_worker_pool(args: argparse.Namespace, on_sample: Callable[..., None]) -> WorkerPool:
+    """Return the pool of `args.workers` processes configured by the arguments, merging their samples."""
+    extra_profiles = load_profiles(args.decoders) if args.decoders is not None else ()
+    return WorkerPool(
+        args.workers,
+        partial(_create_worker_server, args),
+        on_sample,
+        {profile.name: profile for profile in (*extra_profiles, DEFAULT_PROFILE)},
+        _loop_factory(not args.no_uvloop),
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Run the collector until it is interrupted."""
+    publish_host, publish_port = parse_collector_address(args.publish)
+    publisher = SamplePublisher(publish_host, publish_port)
+    if args.workers > 1:
+        server = create_worker_pool(args, publisher.publish)
+    else:
+        # The late samples are published too, the integration imports them into the statistics
+        server = _create_server(args, publisher.publish, lambda sample: publisher.publish(sample, live=False))
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+
+    await publisher.start()
+    if isinstance(server, WorkerPool):
+        await server.start()
+    else:
+        await server.start_server()
+    _LOGGER.info(f"Collector listening for the dataloggers on port {args.port}")
+    try:
+        await stopping.wait()
+    finally:
+        if isinstance(server, WorkerPool):
+            await server.close()
+        else:
+            await server.stop_server()
+        await publisher.close()
+        _LOGGER.info("Collector stopped")
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the collector from the command line."""
+    args = parse_args(argv)
+    _configure_logging(args.verbose)
+    with asyncio.Runner(loop_factory=_loop_factory(not args.no_uvloop)) as runner:
+        runner.run(run(args))
@@ -0,0 +1,76 @@
+"""
+Publisher of the decoded samples of the collector, as JSON lines.
+
+A new client first receives the last live sample of every inverter, so it does not have to wait for the next frame. A
+client that does not keep up misses samples instead of growing the memory of the collector.
+"""
+
+import asyncio
+import contextlib
+import logging
+
+from custom_components.local_solis_ginglong_inverter.decoder import InverterSample
+from custom_components.local_solis_ginglong_inverter.sample_stream import encode_sample
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bytes buffered for a client before its samples are dropped
+MAX_CLIENT_BUFFER = 1024 * 1024
+
+
+class SamplePublisher:
+    """Server publishing the samples to its clients, as JSON lines."""
+
+    def __init__(self, host: str, port: int) -> None:
+        """Initialize the publisher, listening on `host:port` once started."""
+        self.host = host
+        self.port = port
+        self.dropped = 0
+        self._clients: set[asyncio.StreamWriter] = set()
+        # Last live sample of every inverter, sent to the new clients
+        self._latest: dict[str, bytes] = {}
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> None:
+        """Listen for clients."""
+        self._server = await asyncio.start_server(self.__handle_client, self.host, self.port)
+        _LOGGER.info(f"Publishing the samples on {self.host}:{self.port}")
+
+    def publish(self, sample: InverterSample, *, live: bool = True) -> None:
+        """Send a sample to every client, remembered for the new clients if `live`."""
+        line = encode_sample(sample)
+        if live:
+            self._latest[sample.inverter_serial_number.lower()] = line
+        for writer in self._clients:
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                self.dropped += 1
+                continue
+            writer.write(line)
+
+    async def __handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        addr = writer.get_extra_info("peername")
+        _LOGGER.info(f"Client connected from {addr}")
+        writer.writelines(self._latest.values())
+        self._clients.add(writer)
+        try:
+            # The clients do not send anything, wait until they disconnect
+            while await reader.read(4096):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+            with contextlib.suppress(OSError):
+                await writer.wait_closed()
+            _LOGGER.info(f"Client disconnected from {addr}")
+
+    async def close(self) -> None:
+        """Disconnect the clients and stop listening."""
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in self._clients:
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
@@ -0,0 +1,239 @@
+"""
+Worker processes of the standalone collector, sharing the port of the dataloggers.
+
+Every worker runs a `LoggerServer` bound with `SO_REUSEPORT`, so the kernel spreads the datalogger connections over
+the workers and the frames are answered and decoded on several CPUs. The workers send their samples to the parent
+through a pipe, as one batch of marshalled tuples per event loop iteration. The parent merges them per inverter serial
+number: a datalogger reconnecting to another worker replays frames that this worker has never seen, so the duplicates
+and late samples are classified again across all the workers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import marshal
+import multiprocessing
+import signal
+from operator import attrgetter
+from typing import TYPE_CHECKING
+
+from custom_components.local_solis_ginglong_inverter.decoder import SAMPLE_FIELDS, InverterSample
+from custom_components.local_solis_ginglong_inverter.history import SAMPLE_DUPLICATE, SAMPLE_LATE, SampleHistory
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from multiprocessing.connection import Connection
+    from multiprocessing.process import BaseProcess
+
+    from custom_components.local_solis_ginglong_inverter.decoder import DecoderProfile
+    from custom_components.local_solis_ginglong_inverter.server import LoggerServer
+
+    # Creates the server of a worker from its index and the callback its samples are passed to
+    ServerFactory = Callable[[int, Callable[[InverterSample], None]], LoggerServer]
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds given to a worker to stop its server before it is killed
+WORKER_STOP_TIMEOUT = 5.0
+# Seconds before a worker that exited is started again
+WORKER_RESTART_DELAY = 1.0
+
+_sample_values = attrgetter(*SAMPLE_FIELDS)
+
+
+def encode_batch(samples: list[InverterSample]) -> bytes:
+    """Return samples as marshalled `(profile name, *field values)` tuples."""
+    return marshal.dumps(
+        [(None if sample.profile is None else sample.profile.name, *_sample_values(sample)) for sample in samples]
+    )
+
+
+def decode_batch(data: bytes, profiles: dict[str, DecoderProfile]) -> list[InverterSample]:
+    """Return the samples of a batch, with the profile of the given name if known."""
+    return [
+        InverterSample(profiles.get(row[0]), **dict(zip(SAMPLE_FIELDS, row[1:], strict=True)))
+        for row in marshal.loads(data)  # noqa: S302
+    ]
+
+
+class SampleChannel:
+    """Sending end of the pipe of a worker, batching the samples of every event loop iteration."""
+
+    def __init__(self, connection: Connection) -> None:
+        """Initialize the channel, sending on `connection`."""
+        self._connection = connection
+        self._batch: list[InverterSample] = []
+
+    def send(self, sample: InverterSample) -> None:
+        """Queue a sample, sent with the others of the same loop iteration."""
+        if not self._batch:
+            asyncio.get_running_loop().call_soon(self.flush)
+        self._batch.append(sample)
+
+    def flush(self) -> None:
+        """Send the queued samples, blocking if the parent does not keep up."""
+        if self._batch:
+            self._connection.send_bytes(encode_batch(self._batch))
+            self._batch = []
+
+    def ready(self) -> None:
+        """Tell the parent that the worker is listening, with an empty batch."""
+        self._connection.send_bytes(encode_batch([]))
+
+
+async def _serve(server_factory: ServerFactory, index: int, connection: Connection) -> None:
+    channel = SampleChannel(connection)
+    server = server_factory(index, channel.send)
+    stopping = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+    await server.start_server()
+    channel.ready()
+    try:
+        await stopping.wait()
+    finally:
+        await server.stop_server()
+        channel.flush()
+        connection.close()
+
+
+def _run_worker(
+    server_factory: ServerFactory,
+    index: int,
+    connection: Connection,
+    loop_factory: Callable[[], asyncio.AbstractEventLoop] | None,
+) -> None:
+    """Run the server of a worker until the parent terminates it."""
+    # Only the parent handles the interruptions, it stops the workers with SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(_serve(server_factory, index, connection))
+
+
+class WorkerPool:
+    """Worker processes listening on the same port, whose samples are merged by the parent."""
+
+    def __init__(
+        self,
+        count: int,
+        server_factory: ServerFactory,
+        on_sample: Callable[..., None],
+        profiles: dict[str, DecoderProfile] | None = None,
+        loop_factory: Callable[[], asyncio.AbstractEventLoop] | None = None,
+    ) -> None:
+        """
+        Initialize the pool of `count` workers, each running the server created by `server_factory`.
+
+        `server_factory` and `loop_factory` are pickled to the workers, which are spawned. The merged samples are
+        passed to `on_sample` with `live=False` for the late ones, like `publisher.SamplePublisher.publish`.
+        """
+        self.count = count
+        self.server_factory = server_factory
+        self.on_sample = on_sample
+        self.profiles = profiles or {}
+        self.loop_factory = loop_factory
+        # Samples received from the workers, and the ones dropped as duplicates when merging them
+        self.received = 0
+        self.duplicates = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._history = SampleHistory()
+        self._processes: list[BaseProcess | None] = [None] * count
+        self._receivers: dict[int, Connection] = {}
+        self._starting: dict[int, asyncio.Future] = {}
+        self._closing = False
+
+    async def start(self) -> None:
+        """Start the workers and wait until they all listen."""
+        loop = asyncio.get_running_loop()
+        self._starting = {index: loop.create_future() for index in range(self.count)}
+        for index in range(self.count):
+            self.__start_worker(index)
+        try:
+            await asyncio.gather(*self._starting.values())
+        except RuntimeError:
+            await self.close()
+            raise
+        finally:
+            self._starting = {}
+        _LOGGER.info(f"{self.count} workers listening")
+
+    def __start_worker(self, index: int) -> None:
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_run_worker,
+            args=(self.server_factory, index, sender, self.loop_factory),
+            name=f"worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        # Only the worker writes, so the parent reads EOF as soon as it exits
+        sender.close()
+        self._processes[index] = process
+        self._receivers[index] = receiver
+        asyncio.get_running_loop().add_reader(receiver.fileno(), self.__receive, index)
+
+    def __receive(self, index: int) -> None:
+        receiver = self._receivers[index]
+        try:
+            data = receiver.recv_bytes()
+        except (EOFError, OSError):
+            self.__on_worker_exit(index)
+            return
+        starting = self._starting.get(index)
+        if starting is not None and not starting.done():
+            starting.set_result(None)
+        for sample in decode_batch(data, self.profiles):
+            self.__merge(sample)
+
+    def __merge(self, sample: InverterSample) -> None:
+        self.received += 1
+        kind = self._history.classify(sample.inverter_serial_number.lower(), sample.timestamp)
+        if kind is SAMPLE_DUPLICATE:
+            self.duplicates += 1
+            return
+        self.on_sample(sample, live=kind is not SAMPLE_LATE)
+
+    def __on_worker_exit(self, index: int) -> None:
+        asyncio.get_running_loop().remove_reader(self._receivers[index].fileno())
+        self._receivers.pop(index).close()
+        if self._closing:
+            return
+        starting = self._starting.get(index)
+        if starting is not None and not starting.done():
+            starting.set_exception(RuntimeError(f"Worker {index} exited while starting"))
+            return
+        _LOGGER.warning(f"Worker {index} exited, starting it again in {WORKER_RESTART_DELAY} seconds")
+        asyncio.get_running_loop().call_later(WORKER_RESTART_DELAY, self.__restart_worker, index)
+
+    def __restart_worker(self, index: int) -> None:
+        if self._closing:
+            return
+        process = self._processes[index]
+        if process is not None:
+            process.join(0)
+            _LOGGER.info(f"Worker {index} exited with code {process.exitcode}")
+        self.__start_worker(index)
+
+    async def close(self) -> None:
+        """Stop the workers, merging their last samples."""
+        self._closing = True
+        processes = [process for process in self._processes if process is not None]
+        for process in processes:
+            # Handled by the workers to stop their server
+            process.terminate()
+        # The loop keeps receiving the last samples of the workers while they stop
+        await asyncio.get_running_loop().run_in_executor(None, self.__join, processes)
+        for index in list(self._receivers):
+            # The workers exited, the pipes only hold their last batches before EOF
+            while index in self._receivers:
+                self.__receive(index)
+        self._processes = [None] * self.count
+
+    @staticmethod
+    def __join(processes: list[BaseProcess]) -> None:
+        for process in processes:
+            process.join(WORKER_STOP_TIMEOUT)
+            if process.is_alive():
+                _LOGGER.warning(f"{process.name} did not stop, killing it")
+                process.kill()
+                process.join()
@@ -2,15 +2,21 @@
 
 from __future__ import annotations
 
+from functools import partial
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 from homeassistant.const import Platform
+from homeassistant.core import SupportsResponse
+from homeassistant.util import dt as dt_util
 
 if TYPE_CHECKING:
     from homeassistant.config_entries import ConfigEntry
-    from homeassistant.core import HomeAssistant
+    from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
 
-from .const import DOMAIN
+from .const import DATA_SERVER, DOMAIN, SERVICE_DUMP_FRAMES
+from .store import async_remove_store
+from .tracing import write_capture
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
@@ -23,6 +29,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if not hass.services.has_service(DOMAIN, SERVICE_DUMP_FRAMES):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_DUMP_FRAMES,
+            partial(_async_dump_frames, hass),
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
     return True
 
 
@@ -30,5 +44,25 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         hass.data[DOMAIN].pop(entry.entry_id)
+        if not hass.data[DOMAIN]:
+            hass.services.async_remove(DOMAIN, SERVICE_DUMP_FRAMES)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the data saved for a removed config entry."""
+    await async_remove_store(hass, entry.entry_id)
+
+
+async def _async_dump_frames(hass: HomeAssistant, _call: ServiceCall) -> ServiceResponse:
+    """Write the last frames exchanged with the dataloggers to capture files in the configuration directory."""
+    stamp = dt_util.utcnow().strftime("%Y%m%d%H%M%S")
+    files = {}
+    for entry_id, data in hass.data[DOMAIN].items():
+        server = data.get(DATA_SERVER)
+        if server is None:
+            continue
+        path = Path(hass.config.path(f"{DOMAIN}_frames_{entry_id}_{stamp}.txt"))
+        files[str(path)] = await hass.async_add_executor_job(write_capture, path, server.tracer.snapshot())
+    return {"files": files}
@@ -0,0 +1,160 @@
+"""
+Rolling aggregates of the inverter samples.
+
+Every window is a fixed-size ring of time slots, each holding the count, sum, minimum and maximum of the values
+received during its slot. Adding a sample updates a single slot, whatever the frame rate, and the memory never grows:
+the aggregate of a window only combines its slots when it is read.
+"""
+
+from __future__ import annotations
+
+import time
+from array import array
+from operator import attrgetter
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from .decoder import InverterSample
+
+
+class AggregateWindow(NamedTuple):
+    """Rolling window of the aggregates, split in `slots` slots."""
+
+    key: str
+    name: str
+    duration: float
+    slots: int
+
+
+AGGREGATE_WINDOWS = (
+    AggregateWindow("1min", "1 min", 60, 12),
+    AggregateWindow("15min", "15 min", 15 * 60, 15),
+    AggregateWindow("daily", "24 h", 24 * 60 * 60, 96),
+)
+
+# Sample attributes whose rolling aggregates are kept
+AGGREGATE_SERIES = ("solar_active_power", "dc_power")
+# Counters whose increases between samples are aggregated instead of their values. The daily energy is used rather
+# than the lifetime total, which only has a 1 kWh resolution; it drops back to zero at midnight
+COUNTER_SERIES = ("solar_active_energy_today",)
+
+
+class Aggregate(NamedTuple):
+    """Aggregate of the values received during a window."""
+
+    count: int
+    total: float
+    mean: float
+    minimum: float
+    maximum: float
+
+
+class RollingWindow:
+    """
+    Aggregate of the values received during the last `duration` seconds.
+
+    The window moves a slot at a time: its aggregate covers between `duration - duration / slots` and `duration`
+    seconds of values.
+    """
+
+    __slots__ = ("_counts", "_epochs", "_maxima", "_minima", "_sums", "slot_duration")
+
+    def __init__(self, duration: float, slots: int) -> None:
+        """Initialize the window, empty."""
+        self.slot_duration = duration / slots
+        # Index of the slot duration since the clock origin held by every slot, -1 for a never used slot
+        self._epochs = array("q", [-1] * slots)
+        self._counts = array("q", [0] * slots)
+        self._sums = array("d", [0.0] * slots)
+        self._minima = array("d", [0.0] * slots)
+        self._maxima = array("d", [0.0] * slots)
+
+    def add(self, now: float, value: float) -> None:
+        """Record a value received at `now`, in seconds of a monotonic clock."""
+        epoch = int(now // self.slot_duration)
+        index = epoch % len(self._epochs)
+        if self._epochs[index] != epoch:
+            # The slot held values of an older round, start it over
+            self._epochs[index] = epoch
+            self._counts[index] = 1
+            self._sums[index] = self._minima[index] = self._maxima[index] = value
+            return
+        self._counts[index] += 1
+        self._sums[index] += value
+        if value < self._minima[index]:
+            self._minima[index] = value
+        elif value > self._maxima[index]:
+            self._maxima[index] = value
+
+    def aggregate(self, now: float) -> Aggregate | None:
+        """Return the aggregate of the window at `now`, None if no value was received during it."""
+        oldest = int(now // self.slot_duration) - len(self._epochs)
+        count = 0
+        total = 0.0
+        minimum = maximum = None
+        for index, epoch in enumerate(self._epochs):
+            if epoch <= oldest or epoch < 0:
+                continue
+            count += self._counts[index]
+            total += self._sums[index]
+            if minimum is None or self._minima[index] < minimum:
+                minimum = self._minima[index]
+            if maximum is None or self._maxima[index] > maximum:
+                maximum = self._maxima[index]
+        if not count:
+            return None
+        return Aggregate(count, total, total / count, minimum, maximum)
+
+
+class InverterAggregates:
+    """
+    Rolling aggregates of every series of an inverter, over every window.
+
+    The total of a counter series over a window is its increase during the window.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the aggregates, without samples."""
+        self._windows = {
+            (series, window.key): RollingWindow(window.duration, window.slots)
+            for series in (*AGGREGATE_SERIES, *COUNTER_SERIES)
+            for window in AGGREGATE_WINDOWS
+        }
+        self._getters = [
+            (attrgetter(series), window) for (series, _), window in self._windows.items() if series in AGGREGATE_SERIES
+        ]
+        self._counters = [
+            (series, attrgetter(series), [window for (name, _), window in self._windows.items() if name == series])
+            for series in COUNTER_SERIES
+        ]
+        # Last value of every counter, the increase of the next one is computed from it
+        self._last: dict[str, float] = {}
+        # Aggregates as of the last refresh, read by the sensors
+        self.values: dict[tuple[str, str], Aggregate | None] = dict.fromkeys(self._windows)
+
+    def add(self, sample: InverterSample, now: float | None = None) -> None:
+        """Record the values of a sample, received at `now` or right now."""
+        if now is None:
+            now = time.monotonic()
+        for get_value, window in self._getters:
+            value = get_value(sample)
+            if value is not None:
+                window.add(now, value)
+        for series, get_value, windows in self._counters:
+            value = get_value(sample)
+            if value is None:
+                continue
+            last = self._last.get(series)
+            self._last[series] = value
+            if last is None:
+                continue
+            # Reset in between, counted again from zero
+            increase = value - last if value >= last else value
+            for window in windows:
+                window.add(now, increase)
+
+    def refresh(self, now: float | None = None) -> None:
+        """Compute the aggregates of every window at `now` or right now."""
+        if now is None:
+            now = time.monotonic()
+        self.values = {key: window.aggregate(now) for key, window in self._windows.items()}
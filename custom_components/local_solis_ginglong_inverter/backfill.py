@@ -0,0 +1,186 @@
+"""
+Import of the late samples into the long-term statistics.
+
+The samples a datalogger buffered while it was offline arrive after the live ones and must not overwrite the current
+state of the sensors. They are batched instead, aggregated per hour, and imported in bulk into the statistics of the
+matching sensors, so an outage is backfilled without going through the state machine. The sum of the energy total
+continues from the last hour recorded before the imported ones.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from homeassistant.components.recorder import DOMAIN as RECORDER_DOMAIN
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_import_statistics, statistics_during_period
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
+from homeassistant.const import UnitOfEnergy, UnitOfPower
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from datetime import datetime
+
+    from homeassistant.core import HomeAssistant
+
+    from .decoder import InverterSample
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds the late samples are batched before being imported, unless the batch is full
+BACKFILL_DELAY = 30
+BACKFILL_BATCH_SIZE = 1000
+# Hours kept per statistic to merge the samples of later batches, the oldest ones are forgotten first. The sum of the
+# energy total continues from the last hour recorded within as many hours before the imported ones
+MAX_BACKFILL_HOURS = 72
+
+# Sample attributes, and keys of their sensors, imported as the mean of every hour, and as a total
+MEAN_SERIES = {"solar_active_power": UnitOfPower.WATT, "dc_power": UnitOfPower.WATT}
+SUM_SERIES = {"solar_active_energy_total": UnitOfEnergy.KILO_WATT_HOUR}
+
+
+class _HourStatistics:
+    """Values of a series received during an hour."""
+
+    __slots__ = ("count", "last", "maximum", "minimum", "total")
+
+    def __init__(self, value: float) -> None:
+        self.count = 1
+        self.total = self.minimum = self.maximum = self.last = value
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        self.last = value
+
+
+class StatisticsBackfill:
+    """Batched importer of the late samples into the long-term statistics."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the importer, without samples."""
+        self.hass = hass
+        self._pending: list[InverterSample] = []
+        # Hourly statistics of every (inverter, series), by start of the hour
+        self._hours: dict[tuple[str, str], dict[datetime, _HourStatistics]] = {}
+        self._cancel_flush: Callable[[], None] | None = None
+
+    def add(self, sample: InverterSample) -> None:
+        """Queue a late sample, imported with the next batch."""
+        self._pending.append(sample)
+        if len(self._pending) >= BACKFILL_BATCH_SIZE:
+            self.flush()
+        elif self._cancel_flush is None:
+            self._cancel_flush = async_call_later(self.hass, BACKFILL_DELAY, self.__scheduled_flush)
+
+    @callback
+    def __scheduled_flush(self, _now: datetime) -> None:
+        self._cancel_flush = None
+        self.flush()
+
+    def flush(self) -> None:
+        """Import the queued samples."""
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+            self._cancel_flush = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        if RECORDER_DOMAIN not in self.hass.config.components:
+            _LOGGER.debug(f"The recorder is not loaded, dropping {len(pending)} late samples")
+            return
+        changed: dict[tuple[str, str], set[datetime]] = {}
+        for sample in pending:
+            inverter_id = sample.inverter_serial_number.lower()
+            start = dt_util.utc_from_timestamp(sample.timestamp).replace(minute=0, second=0, microsecond=0)
+            for series in (*MEAN_SERIES, *SUM_SERIES):
+                value = getattr(sample, series)
+                if value is None:
+                    continue
+                hours = self._hours.setdefault((inverter_id, series), {})
+                hour = hours.get(start)
+                if hour is None:
+                    hours[start] = _HourStatistics(value)
+                    if len(hours) > MAX_BACKFILL_HOURS:
+                        del hours[min(hours)]
+                else:
+                    hour.add(value)
+                changed.setdefault((inverter_id, series), set()).add(start)
+        self.__import(changed)
+        _LOGGER.debug(f"Imported {len(pending)} late samples into the statistics")
+
+    def __import(self, changed: dict[tuple[str, str], set[datetime]]) -> None:
+        """Import the changed hours of every series into the statistics of its sensor, if registered."""
+        registry = er.async_get(self.hass)
+        for (inverter_id, series), starts in changed.items():
+            entity_id = registry.async_get_entity_id(SENSOR_DOMAIN, DOMAIN, f"{inverter_id}_{series}")
+            if entity_id is None:
+                _LOGGER.debug(f"No {series} sensor registered for {inverter_id}, its late samples are not imported")
+            elif series in SUM_SERIES:
+                self.hass.async_create_task(self.__async_import_sum(entity_id, series, inverter_id, starts))
+            else:
+                self.__import_mean(entity_id, series, inverter_id, starts)
+
+    def __import_mean(self, entity_id: str, series: str, inverter_id: str, starts: set[datetime]) -> None:
+        """Import the changed hours of a mean series, the ones of earlier batches included."""
+        hours = self._hours[(inverter_id, series)]
+        statistics = []
+        for start in sorted(starts.intersection(hours)):
+            hour = hours[start]
+            statistics.append(
+                StatisticData(start=start, mean=hour.total / hour.count, min=hour.minimum, max=hour.maximum)
+            )
+        async_import_statistics(self.hass, _metadata(entity_id, series), statistics)
+
+    async def __async_import_sum(self, entity_id: str, series: str, inverter_id: str, starts: set[datetime]) -> None:
+        """Import the changed hours of a total, its sum continuing from the last hour recorded before them."""
+        hours = self._hours[(inverter_id, series)]
+        imported = sorted(starts.intersection(hours))
+        if not imported:
+            return
+        first = imported[0]
+        previous = await get_instance(self.hass).async_add_executor_job(
+            statistics_during_period,
+            self.hass,
+            first - timedelta(hours=MAX_BACKFILL_HOURS),
+            first,
+            {entity_id},
+            "hour",
+            None,
+            {"state", "sum"},
+        )
+        rows = previous.get(entity_id)
+        if rows and rows[-1].get("state") is not None and rows[-1].get("sum") is not None:
+            last_state, last_sum = rows[-1]["state"], rows[-1]["sum"]
+        else:
+            # Nothing recorded before, the sum starts with the first imported sample
+            last_state, last_sum = hours[first].minimum, 0.0
+        statistics = [
+            StatisticData(start=start, state=hours[start].last, sum=last_sum + hours[start].last - last_state)
+            for start in imported
+        ]
+        async_import_statistics(self.hass, _metadata(entity_id, series), statistics)
+
+
+def _metadata(entity_id: str, series: str) -> StatisticMetaData:
+    """Return the metadata of the statistics of a sensor, recorded like the ones the recorder compiles."""
+    is_sum = series in SUM_SERIES
+    return StatisticMetaData(
+        has_mean=not is_sum,
+        has_sum=is_sum,
+        name=None,
+        source=RECORDER_DOMAIN,
+        statistic_id=entity_id,
+        unit_of_measurement=SUM_SERIES[series] if is_sum else MEAN_SERIES[series],
+    )
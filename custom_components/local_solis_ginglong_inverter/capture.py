@@ -0,0 +1,129 @@
+"""
+Binary capture of the raw frames exchanged with the dataloggers, to replay production traffic offline.
+
+A capture file starts with `CAPTURE_MAGIC`, followed by one record per frame: a `RECORD_HEADER` holding the receive
+timestamp, the direction, the length of the peer and the length of the frame, then the peer (`host:port`, in ASCII)
+and the raw bytes of the frame. Records are only ever appended.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import mmap
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from struct import Struct
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from .tracing import DIRECTION_RECEIVED, DIRECTION_SENT
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+_LOGGER = logging.getLogger(__name__)
+
+CAPTURE_MAGIC = b"SOLISCAP\x01"
+RECORD_HEADER = Struct("<dBBH")  # timestamp, direction, peer length, frame length
+DIRECTIONS = (DIRECTION_RECEIVED, DIRECTION_SENT)
+
+FLUSH_SIZE = 64 * 1024  # bytes
+FLUSH_INTERVAL = 5  # seconds
+
+
+class CapturedFrame(NamedTuple):
+    """Frame read from a capture file."""
+
+    timestamp: float
+    peer: str
+    direction: str
+    data: bytes
+
+
+def _format_peer(addr: Any) -> str:
+    if isinstance(addr, tuple):
+        return f"{addr[0]}:{addr[1]}"
+    return str(addr)
+
+
+class CaptureWriter:
+    """
+    Write-behind appender of frames to a capture file.
+
+    Frames are packed into an in-memory buffer, which is handed over to a writer thread once it holds `flush_size`
+    bytes or `flush_interval` seconds after the first frame, so that recording never blocks the event loop.
+    """
+
+    def __init__(self, path: str | Path, flush_size: int = FLUSH_SIZE, flush_interval: float = FLUSH_INTERVAL) -> None:
+        """Initialize the writer, the file is created on the first flush."""
+        self.path = Path(path)
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer = bytearray()
+        self._timer: asyncio.TimerHandle | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    def record(self, addr: Any, direction: str, frame: bytes) -> None:
+        """Append a frame received from or sent to a peer."""
+        peer = _format_peer(addr).encode("ascii", "replace")
+        self._buffer += RECORD_HEADER.pack(time.time(), DIRECTIONS.index(direction), len(peer), len(frame))
+        self._buffer += peer
+        self._buffer += frame
+        if len(self._buffer) >= self.flush_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self.flush)
+
+    def flush(self) -> None:
+        """Hand the buffered frames over to the writer thread."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        if self._executor is None:
+            # A single thread keeps the chunks in order
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="solis_capture")
+        self._executor.submit(self.__append, chunk)
+
+    def __append(self, chunk: bytes) -> None:
+        try:
+            with self.path.open("ab") as file:
+                if file.tell() == 0:
+                    file.write(CAPTURE_MAGIC)
+                file.write(chunk)
+        except OSError as e:
+            _LOGGER.warning(f"Cannot write to the capture file {self.path}: {e}")
+
+    async def close(self) -> None:
+        """Flush the buffered frames and wait for them to be written."""
+        self.flush()
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+
+def read_capture(path: str | Path) -> Iterator[CapturedFrame]:
+    """
+    Read the frames of a capture file, which is memory-mapped instead of loaded at once.
+
+    A truncated last record, left by an interrupted write, is ignored.
+    """
+    with Path(path).open("rb") as file:
+        if file.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            msg = f"{path} is not a capture file"
+            raise ValueError(msg)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = len(CAPTURE_MAGIC)
+            while offset + RECORD_HEADER.size <= len(data):
+                timestamp, direction, peer_length, frame_length = RECORD_HEADER.unpack_from(data, offset)
+                offset += RECORD_HEADER.size
+                end = offset + peer_length + frame_length
+                if end > len(data):
+                    break
+                peer = data[offset : offset + peer_length].decode("ascii")
+                yield CapturedFrame(timestamp, peer, DIRECTIONS[direction], data[offset + peer_length : end])
+                offset = end
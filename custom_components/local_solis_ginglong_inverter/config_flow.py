@@ -9,8 +9,51 @@ import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import DOMAIN, FORWARD_HOST, FORWARD_MODE, LISTENING_PORT
-from .const_defaults import DEFAULT_FORWARD_HOST, DEFAULT_FORWARD_MODE
+from .const import (
+    AVAILABILITY_TIMEOUT,
+    CAPTURE,
+    COLLECTOR_HOST,
+    DOMAIN,
+    EXPORT,
+    EXPORT_CSV,
+    EXPORT_NONE,
+    EXPORT_SQLITE,
+    FORWARD_HOST,
+    FORWARD_LOCAL_ACK,
+    FORWARD_MODE,
+    FORWARD_OVERFLOW,
+    FORWARD_OVERFLOW_DROP_NEWEST,
+    FORWARD_OVERFLOW_DROP_OLDEST,
+    FORWARD_QUEUE_SIZE,
+    IDLE_TIMEOUT,
+    LISTENING_PORT,
+    MAX_CONNECTIONS,
+    MAX_CONNECTIONS_PER_PEER,
+    READ_TIMEOUT,
+    TRACE_SIZE,
+    TRANSPORT,
+    TRANSPORT_BUFFERED,
+    TRANSPORT_STREAM,
+)
+from .const_defaults import (
+    DEFAULT_AVAILABILITY_TIMEOUT,
+    DEFAULT_CAPTURE,
+    DEFAULT_COLLECTOR_HOST,
+    DEFAULT_EXPORT,
+    DEFAULT_FORWARD_HOST,
+    DEFAULT_FORWARD_LOCAL_ACK,
+    DEFAULT_FORWARD_MODE,
+    DEFAULT_FORWARD_OVERFLOW,
+    DEFAULT_FORWARD_QUEUE_SIZE,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_CONNECTIONS_PER_PEER,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_TRACE_SIZE,
+    DEFAULT_TRANSPORT,
+)
+from .forwarder import parse_forward_targets
+from .sample_stream import parse_collector_address
 
 if TYPE_CHECKING:
     from homeassistant.data_entry_flow import FlowResult
@@ -22,6 +65,27 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
         vol.Required(LISTENING_PORT): vol.All(vol.Coerce(int), vol.Range(min=1, max=65535)),
         vol.Optional(FORWARD_MODE, default=DEFAULT_FORWARD_MODE): bool,
         vol.Optional(FORWARD_HOST, default=DEFAULT_FORWARD_HOST): str,
+        vol.Optional(TRANSPORT, default=DEFAULT_TRANSPORT): vol.In([TRANSPORT_STREAM, TRANSPORT_BUFFERED]),
+        vol.Optional(FORWARD_LOCAL_ACK, default=DEFAULT_FORWARD_LOCAL_ACK): bool,
+        vol.Optional(FORWARD_QUEUE_SIZE, default=DEFAULT_FORWARD_QUEUE_SIZE): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+        vol.Optional(FORWARD_OVERFLOW, default=DEFAULT_FORWARD_OVERFLOW): vol.In(
+            [FORWARD_OVERFLOW_DROP_OLDEST, FORWARD_OVERFLOW_DROP_NEWEST]
+        ),
+        vol.Optional(TRACE_SIZE, default=DEFAULT_TRACE_SIZE): vol.All(vol.Coerce(int), vol.Range(min=0, max=1000)),
+        vol.Optional(CAPTURE, default=DEFAULT_CAPTURE): bool,
+        vol.Optional(IDLE_TIMEOUT, default=DEFAULT_IDLE_TIMEOUT): vol.All(vol.Coerce(int), vol.Range(min=10)),
+        vol.Optional(READ_TIMEOUT, default=DEFAULT_READ_TIMEOUT): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(AVAILABILITY_TIMEOUT, default=DEFAULT_AVAILABILITY_TIMEOUT): vol.All(
+            vol.Coerce(int), vol.Range(min=60)
+        ),
+        vol.Optional(MAX_CONNECTIONS, default=DEFAULT_MAX_CONNECTIONS): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(MAX_CONNECTIONS_PER_PEER, default=DEFAULT_MAX_CONNECTIONS_PER_PEER): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+        vol.Optional(COLLECTOR_HOST, default=DEFAULT_COLLECTOR_HOST): str,
+        vol.Optional(EXPORT, default=DEFAULT_EXPORT): vol.In([EXPORT_NONE, EXPORT_SQLITE, EXPORT_CSV]),
     }
 )
 
@@ -33,6 +97,15 @@ async def validate_input(data: dict[str, Any]) -> dict[str, Any]:
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
     """
     # Could test if the port is available here, but not necessary for now.
+    try:
+        parse_forward_targets(data.get(FORWARD_HOST, DEFAULT_FORWARD_HOST))
+    except ValueError as e:
+        raise InvalidForwardHostError from e
+    if data.get(COLLECTOR_HOST, DEFAULT_COLLECTOR_HOST):
+        try:
+            parse_collector_address(data[COLLECTOR_HOST])
+        except ValueError as e:
+            raise InvalidCollectorHostError from e
     return data
 
 
@@ -52,6 +125,10 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             await validate_input(user_input)
         except CannotCreateServerError:
             errors["base"] = "cannot_create_server"
+        except InvalidForwardHostError:
+            errors["base"] = "invalid_forward_host"
+        except InvalidCollectorHostError:
+            errors["base"] = "invalid_collector_host"
         except Exception:
             _LOGGER.exception("Unexpected exception")
             errors["base"] = "unknown"
@@ -63,3 +140,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
 class CannotCreateServerError(HomeAssistantError):
     """Error to indicate we cannot create a server."""
+
+
+class InvalidForwardHostError(HomeAssistantError):
+    """Error to indicate the forward targets are invalid."""
+
+
+class InvalidCollectorHostError(HomeAssistantError):
+    """Error to indicate the collector address is invalid."""
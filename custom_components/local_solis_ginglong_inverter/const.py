@@ -5,3 +5,38 @@ DOMAIN = "local_solis_ginglong_inverter"
 LISTENING_PORT = "listening_port"
 FORWARD_MODE = "forward_mode"
 FORWARD_HOST = "forward_host"
+TRANSPORT = "transport"
+FORWARD_LOCAL_ACK = "forward_local_ack"
+FORWARD_QUEUE_SIZE = "forward_queue_size"
+FORWARD_OVERFLOW = "forward_overflow"
+TRACE_SIZE = "trace_size"
+CAPTURE = "capture"
+IDLE_TIMEOUT = "idle_timeout"
+READ_TIMEOUT = "read_timeout"
+MAX_CONNECTIONS = "max_connections"
+MAX_CONNECTIONS_PER_PEER = "max_connections_per_peer"
+COLLECTOR_HOST = "collector_host"
+EXPORT = "export"
+AVAILABILITY_TIMEOUT = "availability_timeout"
+
+# Keys of the runtime objects stored next to the configuration in hass.data
+DATA_SERVER = "server"
+DATA_SAMPLE_BUS = "sample_bus"
+
+# Home Assistant event fired with every batch of live samples
+EVENT_SAMPLES = f"{DOMAIN}_samples"
+
+# Transports available to receive the datalogger messages
+TRANSPORT_STREAM = "stream"
+TRANSPORT_BUFFERED = "buffered"
+
+# What to drop when the queue of messages to forward is full
+FORWARD_OVERFLOW_DROP_OLDEST = "drop_oldest"
+FORWARD_OVERFLOW_DROP_NEWEST = "drop_newest"
+
+# Formats the samples can be exported to
+EXPORT_NONE = "none"
+EXPORT_SQLITE = "sqlite"
+EXPORT_CSV = "csv"
+
+SERVICE_DUMP_FRAMES = "dump_frames"
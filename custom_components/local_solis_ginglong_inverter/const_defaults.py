@@ -1,4 +1,24 @@
 """Default constants for the integration."""
 
+from .const import EXPORT_NONE, EXPORT_SQLITE, FORWARD_OVERFLOW_DROP_OLDEST, TRANSPORT_STREAM
+
 DEFAULT_FORWARD_MODE = False
 DEFAULT_FORWARD_HOST = "47.88.8.200"
+DEFAULT_FORWARD_PORT = 10000
+DEFAULT_FORWARD_LOCAL_ACK = False
+DEFAULT_FORWARD_QUEUE_SIZE = 100
+DEFAULT_FORWARD_OVERFLOW = FORWARD_OVERFLOW_DROP_OLDEST
+DEFAULT_TRANSPORT = TRANSPORT_STREAM
+DEFAULT_TRACE_SIZE = 20
+DEFAULT_CAPTURE = False
+DEFAULT_IDLE_TIMEOUT = 600  # seconds
+DEFAULT_READ_TIMEOUT = 30  # seconds
+# Three DATA frames missed, or the datalogger silent at night
+DEFAULT_AVAILABILITY_TIMEOUT = 900  # seconds
+DEFAULT_MAX_CONNECTIONS = 1024
+DEFAULT_MAX_CONNECTIONS_PER_PEER = 4
+# Empty to receive the datalogger messages in Home Assistant, rather than from a standalone collector
+DEFAULT_COLLECTOR_HOST = ""
+DEFAULT_COLLECTOR_PORT = 8765
+DEFAULT_EXPORT = EXPORT_NONE
+DEFAULT_EXPORT_FORMAT = EXPORT_SQLITE
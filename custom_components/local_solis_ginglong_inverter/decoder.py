@@ -0,0 +1,330 @@
+"""
+Declarative decoding of the datalogger DATA frames.
+
+Each field of a frame is declared once in a table (offset, type, scale, unit, name) and the table is compiled into
+a single precompiled `struct.Struct`, so a frame is decoded with one `unpack_from` call instead of one per field.
+
+Models and firmwares with a different layout are described by their own `DecoderProfile`, which can be loaded from
+JSON. The `DecoderRegistry` picks the profile of every datalogger from its first DATA frame and caches it.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from struct import Struct, calcsize, unpack_from
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+
+@dataclass(frozen=True, slots=True)
+class FrameField:
+    """A field of a frame, located by its absolute offset in the message."""
+
+    name: str
+    offset: int
+    fmt: str  # struct format of the field, without byte order
+    scale: float | None = None
+    unit: str | None = None
+
+    @property
+    def size(self) -> int:
+        """Return the size in bytes of the field."""
+        return calcsize(f"<{self.fmt}")
+
+
+# Offsets verified on the S5-GR1P(0.7-3.6)K-M
+DATA_FRAME_FIELDS: tuple[FrameField, ...] = (
+    # FrameField("clock", 5, "B"),  # Clock from heartbeat
+    FrameField("timestamp", 22, "I", unit="s"),  # Unix timestamp
+    FrameField("inverter_serial_number", 32, "16s"),
+    FrameField("inverter_temperature", 48, "H", 0.1, "°C"),
+    FrameField("dc_voltage_1", 50, "H", 0.1, "V"),
+    FrameField("dc_voltage_2", 52, "H", 0.1, "V"),
+    FrameField("dc_current_1", 54, "H", 0.1, "A"),
+    FrameField("dc_current_2", 56, "H", 0.1, "A"),
+    # FrameField("unknown_3", 58, "I"),  # ???
+    FrameField("solar_ac_current", 62, "H", 0.1, "A"),
+    # FrameField("unknown_4", 64, "I"),  # ???
+    FrameField("ac_voltage", 68, "H", 0.1, "V"),
+    FrameField("ac_frequency", 70, "H", 0.01, "Hz"),
+    FrameField("solar_active_power", 72, "I", unit="W"),
+    FrameField("solar_active_energy_today", 76, "I", 0.01, "kWh"),
+    # FrameField("unknown_6", 80, "I"),  # ??? Power generated this month (x 0.1)?
+    # 88 - 107 ???
+    # FrameField("unknown_7", 108, "I"),  # ???
+    # FrameField("unknown_8", 112, "I"),  # ??? # or maybe 2 fields of 16 bits?
+    FrameField("dc_power", 116, "I", unit="W"),
+    FrameField("solar_active_energy_this_month", 120, "I", unit="kWh"),
+    FrameField("solar_active_energy_yesterday", 128, "H", 0.1, "kWh"),
+    FrameField("solar_active_energy_total", 130, "I", unit="kWh"),
+    # FrameField("unknown_10", 138, "H"),  # ???
+    # FrameField("unknown_11", 140, "H"),  # ???
+    FrameField("solar_apparent_power", 142, "I", unit="W"),
+    # 146 - 181 ???
+    FrameField("export_active_power", 182, "i", unit="W"),  # ??? equals 194 and it is signed
+    # FrameField("unknown_12", 186, "I"),  # ???
+    # FrameField("export_active_power_b", 194, "i"),  # ??? equals 182 and it is signed
+    # FrameField("unknown_13", 198, "I"),  # ??? equals 210
+    # FrameField("unknown_14", 202, "I"),  # ???
+    FrameField("load_apparent_power", 214, "I", unit="W"),  # ??? equals 226
+    # FrameField("unknown_15", 218, "I"),  # ???
+    # FrameField("load_apparent_power_b", 226, "I"),  # ??? equals 214
+    # 230 - 237 ???
+    # FrameField("unknown_16", 238, "I"),  # ???
+)
+
+# Fields the server itself relies on, always decoded regardless of the enabled sensors
+REQUIRED_FIELDS = frozenset({"timestamp", "inverter_serial_number"})
+
+SAMPLE_FIELDS = tuple(field.name for field in DATA_FRAME_FIELDS)
+DERIVED_FIELDS = ("load_active_power", "grid_export_power", "grid_import_power")
+
+
+class InverterSample:
+    """
+    Decoded DATA frame of an inverter.
+
+    The fields that were not decoded are None. The derived values are computed once per frame, when the sample is
+    created, instead of by every sensor reading them. `profile` is the layout the frame was decoded with, if known.
+    """
+
+    __slots__ = (*SAMPLE_FIELDS, *DERIVED_FIELDS, "profile")
+
+    def __init__(self, profile: DecoderProfile | None = None, **values: Any) -> None:
+        """Create a sample from its field values."""
+        for name in SAMPLE_FIELDS:
+            setattr(self, name, values.get(name))
+        self.profile = profile
+        self.derive()
+
+    def derive(self) -> None:
+        """Compute the derived values from the decoded fields."""
+        export = self.export_active_power
+        if export is None:
+            self.load_active_power = self.grid_export_power = self.grid_import_power = None
+            return
+        solar = self.solar_active_power
+        self.load_active_power = None if solar is None else solar - export
+        self.grid_export_power = max(0, export)
+        self.grid_import_power = max(0, -export)
+
+    def replace(self, **changes: Any) -> InverterSample:
+        """Return a copy of the sample with some fields changed."""
+        return InverterSample(self.profile, **{**self.as_dict(derived=False), **changes})
+
+    def as_dict(self, *, derived: bool = True) -> dict[str, Any]:
+        """Return the fields of the sample, and the derived values unless `derived` is False."""
+        names = (*SAMPLE_FIELDS, *DERIVED_FIELDS) if derived else SAMPLE_FIELDS
+        return {name: getattr(self, name) for name in names}
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the fields of two samples."""
+        if not isinstance(other, InverterSample):
+            return NotImplemented
+        return self.as_dict(derived=False) == other.as_dict(derived=False)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        """Return the representation of the sample."""
+        return f"InverterSample({', '.join(f'{name}={value!r}' for name, value in self.as_dict().items())})"
+
+
+class FrameDecoder:
+    """Decoder compiled from a field table into a single precompiled struct."""
+
+    def __init__(
+        self, fields: Iterable[FrameField], wanted: Iterable[str] | None = None, profile: DecoderProfile | None = None
+    ) -> None:
+        """Compile the decoding plan, restricted to the `wanted` fields if given, for the frames of `profile`."""
+        fields = tuple(fields)
+        if wanted is not None:
+            wanted = REQUIRED_FIELDS.union(wanted)
+            fields = tuple(field for field in fields if field.name in wanted)
+        fields = tuple(sorted(fields, key=lambda field: field.offset))
+
+        fmt = "<"
+        cursor = 0
+        for field in fields:
+            if field.offset < cursor:
+                msg = f"Field {field.name} at offset {field.offset} overlaps the previous field"
+                raise ValueError(msg)
+            if field.offset > cursor:
+                # Skip the bytes we are not interested in
+                fmt += f"{field.offset - cursor}x"
+            fmt += field.fmt
+            cursor = field.offset + field.size
+
+        self.fields = fields
+        self.profile = profile
+        self._struct = Struct(fmt)
+        self.decode = self._compile(fields, self._struct, profile)
+
+    @staticmethod
+    def _compile(
+        fields: tuple[FrameField, ...], plan: Struct, profile: DecoderProfile | None
+    ) -> Callable[[bytes | memoryview], InverterSample]:
+        """
+        Generate the decoding function of the plan.
+
+        Like `collections.namedtuple`, the source is generated once so that decoding a frame is a single unpack
+        followed by plain attribute assignments, without any per-field branching or loop at runtime.
+        """
+        values = [f"v{i}" for i in range(len(fields))]
+        lines = [
+            "def decode(buffer):",
+            f"    {', '.join(values)}, = unpack_from(buffer)",
+            "    sample = new(InverterSample)",
+        ]
+        for value, field in zip(values, fields, strict=True):
+            expr = value
+            if field.scale is not None:
+                expr = f"{field.scale!r} * {expr}"
+            if field.fmt.endswith("s"):
+                expr = f"{expr}.decode('ascii').rstrip()"
+            lines.append(f"    sample.{field.name} = {expr}")
+        decoded = {field.name for field in fields}
+        lines.extend(f"    sample.{name} = None" for name in SAMPLE_FIELDS if name not in decoded)
+        lines += ["    sample.profile = profile", "    sample.derive()", "    return sample"]
+        namespace = {
+            "unpack_from": plan.unpack_from,
+            "new": object.__new__,
+            "InverterSample": InverterSample,
+            "profile": profile,
+        }
+        exec("\n".join(lines), namespace)  # noqa: S102
+        return namespace["decode"]
+
+    @property
+    def size(self) -> int:
+        """Return the minimum length of a frame this decoder can read."""
+        return self._struct.size
+
+
+@dataclass(frozen=True)
+class DecoderProfile:
+    """
+    Layout of the DATA frames of a model or firmware.
+
+    A frame matches the profile if its payload length is `payload_length`, when given, if it holds the `signature`
+    bytes at their offsets, and if it is long enough for all the fields. Only the sensors computed from the declared
+    fields are created for the inverters decoded with the profile.
+    """
+
+    name: str
+    fields: tuple[FrameField, ...]
+    payload_length: int | None = None
+    signature: tuple[tuple[int, bytes], ...] = ()
+
+    def __post_init__(self) -> None:
+        """Check that the fields can be held by a sample."""
+        unknown = [field.name for field in self.fields if field.name not in SAMPLE_FIELDS]
+        if unknown:
+            msg = f"Unknown fields in the decoder profile {self.name}: {', '.join(unknown)}"
+            raise ValueError(msg)
+        missing = REQUIRED_FIELDS.difference(self.field_names)
+        if missing:
+            msg = f"Missing fields in the decoder profile {self.name}: {', '.join(sorted(missing))}"
+            raise ValueError(msg)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> DecoderProfile:
+        """
+        Create a profile from its JSON form.
+
+        The fields are objects with the `FrameField` attributes and the signature is an object of hexadecimal bytes
+        by offset, such as `{"name": "...", "payload_length": 232, "signature": {"40": "0a0b"}, "fields": [...]}`.
+        """
+        return cls(
+            name=data["name"],
+            fields=tuple(FrameField(**field) for field in data["fields"]),
+            payload_length=data.get("payload_length"),
+            signature=tuple((int(offset), bytes.fromhex(value)) for offset, value in data.get("signature", {}).items()),
+        )
+
+    @property
+    def field_names(self) -> frozenset[str]:
+        """Return the names of the fields reported by the devices of the profile."""
+        return frozenset(field.name for field in self.fields)
+
+    def matches(self, message: bytes | memoryview) -> bool:
+        """Check whether a DATA message has the layout of the profile."""
+        if self.payload_length is not None and unpack_from("<H", message, 1)[0] != self.payload_length:
+            return False
+        if any(message[offset : offset + len(value)] != value for offset, value in self.signature):
+            return False
+        return len(message) >= max(field.offset + field.size for field in self.fields)
+
+
+DEFAULT_PROFILE = DecoderProfile("S5-GR1P", DATA_FRAME_FIELDS)
+
+
+def load_profiles(path: str | Path) -> list[DecoderProfile]:
+    """Load the decoder profiles of a JSON file holding a list of them."""
+    return [DecoderProfile.from_dict(data) for data in json.loads(Path(path).read_text(encoding="utf-8"))]
+
+
+# Dataloggers whose profile is cached, the least recently seen ones are forgotten first
+MAX_DATALOGGERS = 4096
+
+
+class DecoderRegistry:
+    """
+    Decoders of the known profiles, the first matching profile being used for a datalogger.
+
+    The profile of a datalogger is detected once and cached by serial number, later frames only checking that the
+    payload length did not change (after a firmware update, for example). The default profile is tried last.
+    """
+
+    def __init__(
+        self,
+        profiles: Iterable[DecoderProfile] = (),
+        wanted: Iterable[str] | None = None,
+        max_dataloggers: int = MAX_DATALOGGERS,
+    ) -> None:
+        """Initialize the registry, decoding only the `wanted` fields if given."""
+        self.profiles = (*profiles, DEFAULT_PROFILE)
+        self.max_dataloggers = max_dataloggers
+        self._wanted = None if wanted is None else frozenset(wanted)
+        self._decoders: dict[DecoderProfile, FrameDecoder] = {}
+        # Payload length and decoder of every datalogger, by serial number, in the order they were last seen
+        self._dataloggers: OrderedDict[int, tuple[int, FrameDecoder | None]] = OrderedDict()
+
+    def set_wanted(self, wanted: Iterable[str] | None) -> None:
+        """Decode only the `wanted` fields from now on, or all of them if None."""
+        wanted = None if wanted is None else frozenset(wanted)
+        if wanted == self._wanted:
+            return
+        self._wanted = wanted
+        self._decoders.clear()
+        # The detected profiles are kept, only their decoders are compiled again
+        for serialno, (payload_length, decoder) in self._dataloggers.items():
+            if decoder is not None:
+                self._dataloggers[serialno] = (payload_length, self.decoder(decoder.profile))
+
+    def decoder(self, profile: DecoderProfile) -> FrameDecoder:
+        """Return the decoder of a profile, compiled once."""
+        decoder = self._decoders.get(profile)
+        if decoder is None:
+            decoder = self._decoders[profile] = FrameDecoder(profile.fields, self._wanted, profile)
+        return decoder
+
+    def decoder_for(self, serialno: int, message: bytes | memoryview) -> FrameDecoder | None:
+        """Return the decoder of the DATA messages of a datalogger, None if no profile matches."""
+        (payload_length,) = unpack_from("<H", message, 1)
+        cached = self._dataloggers.get(serialno)
+        if cached is not None:
+            self._dataloggers.move_to_end(serialno)
+            if cached[0] == payload_length:
+                return cached[1]
+        elif len(self._dataloggers) >= self.max_dataloggers:
+            self._dataloggers.popitem(last=False)
+        profile = next((profile for profile in self.profiles if profile.matches(message)), None)
+        decoder = None if profile is None else self.decoder(profile)
+        self._dataloggers[serialno] = (payload_length, decoder)
+        return decoder
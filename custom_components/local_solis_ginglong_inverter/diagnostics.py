@@ -0,0 +1,22 @@
+"""Diagnostics support for the integration."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from .const import DATA_SERVER, DOMAIN
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return the diagnostics of a config entry, including the last frames exchanged with every datalogger."""
+    server = hass.data[DOMAIN][entry.entry_id].get(DATA_SERVER)
+    return {
+        "config": dict(entry.data),
+        "frames": server.tracer.as_dict() if server is not None else {},
+        "resyncs": dict(server.resyncs) if server is not None else {},
+        "metrics": server.metrics.as_dict() if server is not None else {},
+    }
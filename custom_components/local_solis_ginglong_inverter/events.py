@@ -0,0 +1,131 @@
+"""
+Bus of the decoded samples, for the consumers other than the sensors.
+
+The live samples received in the same event loop iteration are delivered together, as a batch. Every subscriber has
+its own bounded queue and task: when a subscriber does not keep up, its oldest samples are dropped, so that it never
+delays the frame handling nor the other subscribers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from collections import deque
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from .decoder import InverterSample
+
+    SampleSubscriber = Callable[[list[InverterSample]], Awaitable[None]]
+
+_LOGGER = logging.getLogger(__name__)
+
+# Samples waiting for a subscriber before the oldest ones are dropped
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class _Subscription:
+    """Queue and task of a subscriber."""
+
+    def __init__(self, callback: SampleSubscriber, queue_size: int) -> None:
+        self.callback = callback
+        self.queue: deque[InverterSample] = deque(maxlen=queue_size)
+        self.dropped = 0
+        self._wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self.__run())
+
+    def put(self, batch: list[InverterSample]) -> None:
+        overflow = len(self.queue) + len(batch) - self.queue.maxlen
+        if overflow > 0:
+            # The deque drops the oldest samples by itself
+            self.dropped += overflow
+        self.queue.extend(batch)
+        self._wakeup.set()
+
+    async def __run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Everything queued since the last call, several batches if the subscriber is slow
+            batch = list(self.queue)
+            self.queue.clear()
+            try:
+                await self.callback(batch)
+            except Exception:
+                _LOGGER.exception(f"Sample subscriber {self.callback!r} failed")
+
+
+class SampleBus:
+    """Publisher of the samples to async subscribers, in batches, and to `on_batch` if given."""
+
+    def __init__(
+        self,
+        on_batch: Callable[[list[InverterSample]], None] | None = None,
+        on_subscribers: Callable[[], None] | None = None,
+    ) -> None:
+        """
+        Initialize the bus.
+
+        `on_batch` is called synchronously with every batch, and `on_subscribers` whenever a subscriber comes or goes.
+        """
+        self.on_batch = on_batch
+        self.on_subscribers = on_subscribers
+        self._subscriptions: list[_Subscription] = []
+        self._batch: list[InverterSample] = []
+
+    @property
+    def has_subscribers(self) -> bool:
+        """Return whether a subscriber receives the samples."""
+        return bool(self._subscriptions)
+
+    @property
+    def dropped(self) -> int:
+        """Return the samples dropped because a subscriber did not keep up."""
+        return sum(subscription.dropped for subscription in self._subscriptions)
+
+    def subscribe(self, callback: SampleSubscriber, queue_size: int = SUBSCRIBER_QUEUE_SIZE) -> Callable[[], None]:
+        """
+        Call the coroutine function `callback` with the batches of samples, returning the function unsubscribing it.
+
+        Up to `queue_size` samples wait while `callback` runs, the oldest ones are dropped beyond that.
+        """
+        subscription = _Subscription(callback, queue_size)
+        self._subscriptions.append(subscription)
+        if self.on_subscribers is not None:
+            self.on_subscribers()
+
+        def unsubscribe() -> None:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+                subscription.task.cancel()
+                if self.on_subscribers is not None:
+                    self.on_subscribers()
+
+        return unsubscribe
+
+    def publish(self, sample: InverterSample) -> None:
+        """Queue a sample, delivered with the others of the same loop iteration."""
+        if not self._subscriptions and self.on_batch is None:
+            return
+        if not self._batch:
+            asyncio.get_running_loop().call_soon(self.__flush)
+        self._batch.append(sample)
+
+    def __flush(self) -> None:
+        batch, self._batch = self._batch, []
+        if self.on_batch is not None:
+            self.on_batch(batch)
+        for subscription in self._subscriptions:
+            subscription.put(batch)
+
+    async def close(self) -> None:
+        """Unsubscribe all the subscribers, the samples they did not receive yet are dropped."""
+        subscriptions, self._subscriptions = self._subscriptions, []
+        for subscription in subscriptions:
+            subscription.task.cancel()
+        for subscription in subscriptions:
+            with contextlib.suppress(asyncio.CancelledError):
+                await subscription.task
@@ -0,0 +1,195 @@
+"""
+Export of every decoded sample to local files, at the resolution of the frames.
+
+Like the capture (see `capture`), the samples are buffered in memory and handed over in batches to a writer thread, so
+the export never blocks the event loop. They are written either to a SQLite database, in WAL mode with one
+`executemany` per batch, or to CSV files rotated every day.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import logging
+import sqlite3
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import UTC, datetime
+from operator import attrgetter
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .const import EXPORT_CSV, EXPORT_SQLITE
+from .decoder import DATA_FRAME_FIELDS, SAMPLE_FIELDS
+
+if TYPE_CHECKING:
+    from .decoder import InverterSample
+
+_LOGGER = logging.getLogger(__name__)
+
+FLUSH_SIZE = 500  # samples
+FLUSH_INTERVAL = 10  # seconds
+# Batches handed over to the writer thread and not written yet, before the samples are kept in memory instead
+MAX_PENDING_BATCHES = 4
+# Samples kept in memory while the writer thread is busy, before the dataloggers are paused
+MAX_BUFFERED_SAMPLES = 50_000
+
+EXPORT_COLUMNS = ("profile", *SAMPLE_FIELDS)
+SQLITE_TABLE = "samples"
+
+_sample_values = attrgetter(*SAMPLE_FIELDS)
+
+
+def _sqlite_type(fmt: str, scale: float | None) -> str:
+    if fmt.endswith("s"):
+        return "TEXT"
+    return "INTEGER" if scale is None else "REAL"
+
+
+class SampleExporter(ABC):
+    """
+    Write-behind exporter of samples, writing the batches with `_write`.
+
+    Samples are buffered in memory and handed over to a writer thread once `flush_size` of them are buffered or
+    `flush_interval` seconds after the first one. While `MAX_PENDING_BATCHES` batches wait for the writer, the samples
+    stay in memory and are written with the next batch. No sample is dropped: once `MAX_BUFFERED_SAMPLES` of them
+    wait, the exporter is `full` and the server stops reading the dataloggers until `wait_writable` returns, the
+    dataloggers keeping their next frames meanwhile. The times the exporter got full are counted in `stalls`.
+    """
+
+    def __init__(self, path: str | Path, flush_size: int = FLUSH_SIZE, flush_interval: float = FLUSH_INTERVAL) -> None:
+        """Initialize the exporter, the files are created on the first flush."""
+        self.path = Path(path)
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.stalls = 0
+        self._buffer: list[tuple[Any, ...]] = []
+        self._pending: list[Future] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._closed = False
+
+    @property
+    def full(self) -> bool:
+        """Return whether too many samples wait for the writer thread, so that no more should be recorded."""
+        return len(self._buffer) >= MAX_BUFFERED_SAMPLES
+
+    def record(self, sample: InverterSample) -> None:
+        """Append a sample to the export."""
+        self._buffer.append((None if sample.profile is None else sample.profile.name, *_sample_values(sample)))
+        if len(self._buffer) >= self.flush_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self.flush)
+
+    def flush(self, *, force: bool = False) -> None:
+        """Hand the buffered samples over to the writer thread, unless it is busy and not `force`."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        self._pending = [future for future in self._pending if not future.done()]
+        if len(self._pending) >= MAX_PENDING_BATCHES and not force:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self.flush)
+            return
+        rows, self._buffer = self._buffer, []
+        if self._executor is None:
+            # A single thread keeps the batches in order, and owns the files
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="solis_export")
+        self._pending.append(self._executor.submit(self.__write, rows))
+
+    async def wait_writable(self) -> None:
+        """Wait until the writer thread takes over the buffered samples, once the exporter is `full`."""
+        if not self.full or self._closed:
+            return
+        self.stalls += 1
+        _LOGGER.warning(f"The export to {self.path} does not keep up, pausing the dataloggers until it does")
+        while self.full and not self._closed:
+            self._pending = [future for future in self._pending if not future.done()]
+            if self._pending:
+                await asyncio.wrap_future(self._pending[0])
+            self.flush()
+        _LOGGER.info(f"The export to {self.path} caught up, resuming the dataloggers")
+
+    def __write(self, rows: list[tuple[Any, ...]]) -> None:
+        try:
+            self._write(rows)
+        except (OSError, sqlite3.Error) as e:
+            _LOGGER.warning(f"Cannot export {len(rows)} samples to {self.path}: {e}")
+
+    @abstractmethod
+    def _write(self, rows: list[tuple[Any, ...]]) -> None:
+        """Write a batch of rows of `EXPORT_COLUMNS`, in the writer thread."""
+
+    def _close(self) -> None:  # noqa: B027
+        """Close the files, in the writer thread, if the exporter keeps them open."""
+
+    async def close(self) -> None:
+        """Flush the buffered samples and wait for them to be written."""
+        self._closed = True
+        self.flush(force=True)
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.submit(self._close)
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+        self._pending = []
+
+
+class SqliteExporter(SampleExporter):
+    """Exporter to a SQLite database, with a row per inverter and timestamp in `SQLITE_TABLE`."""
+
+    def __init__(self, path: str | Path, flush_size: int = FLUSH_SIZE, flush_interval: float = FLUSH_INTERVAL) -> None:
+        """Initialize the exporter, the database is created on the first flush."""
+        super().__init__(path, flush_size, flush_interval)
+        self._connection: sqlite3.Connection | None = None
+        # The replays of a datalogger are already dropped, the primary key only guards against the restarts
+        self._insert = (
+            f"INSERT OR IGNORE INTO {SQLITE_TABLE} ({', '.join(EXPORT_COLUMNS)}) "  # noqa: S608
+            f"VALUES ({', '.join('?' * len(EXPORT_COLUMNS))})"
+        )
+
+    def __connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f"{field.name} {_sqlite_type(field.fmt, field.scale)}" for field in DATA_FRAME_FIELDS)
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {SQLITE_TABLE} (profile TEXT, {columns}, "
+            "PRIMARY KEY (inverter_serial_number, timestamp))"
+        )
+        connection.commit()
+        return connection
+
+    def _write(self, rows: list[tuple[Any, ...]]) -> None:
+        if self._connection is None:
+            self._connection = self.__connect()
+        with self._connection:
+            self._connection.executemany(self._insert, rows)
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class CsvExporter(SampleExporter):
+    """Exporter to a directory of CSV files, one per UTC day of the samples, named `YYYY-MM-DD.csv`."""
+
+    def _write(self, rows: list[tuple[Any, ...]]) -> None:
+        days: dict[str, list[tuple[Any, ...]]] = {}
+        timestamp_index = EXPORT_COLUMNS.index("timestamp")
+        for row in rows:
+            day = datetime.fromtimestamp(row[timestamp_index], UTC).date().isoformat()
+            days.setdefault(day, []).append(row)
+        self.path.mkdir(parents=True, exist_ok=True)
+        for day, day_rows in days.items():
+            path = self.path / f"{day}.csv"
+            with path.open("a", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                if file.tell() == 0:
+                    writer.writerow(EXPORT_COLUMNS)
+                writer.writerows(day_rows)
+
+
+EXPORTERS: dict[str, type[SampleExporter]] = {EXPORT_SQLITE: SqliteExporter, EXPORT_CSV: CsvExporter}
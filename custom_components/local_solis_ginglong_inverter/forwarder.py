@@ -0,0 +1,302 @@
+"""
+Forwarding of the datalogger messages to the real Solis server and other upstream targets.
+
+Each datalogger gets its own long-lived connection to every target, so forwarding a message does not pay a new TCP
+handshake every time. Every target is guarded by a circuit breaker, so a dead target costs nothing per message.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+
+from .const import FORWARD_OVERFLOW_DROP_NEWEST, FORWARD_OVERFLOW_DROP_OLDEST
+from .const_defaults import DEFAULT_FORWARD_PORT
+from .protocol import HEADER_LENGTH, _parse_header
+
+_LOGGER = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 5  # seconds
+READ_TIMEOUT = 10  # seconds
+FAILURE_THRESHOLD = 3  # consecutive failures opening the circuit of a target
+BACKOFF_INITIAL = 1  # seconds
+BACKOFF_MAX = 300  # seconds
+
+
+def parse_forward_targets(value: str | Iterable[str]) -> list[tuple[str, int]]:
+    """
+    Parse the forward targets, given as a comma-separated string or a list of `host[:port]` entries.
+
+    IPv6 addresses with a port must be enclosed in brackets, e.g. `[::1]:10000`.
+    """
+    entries = value.split(",") if isinstance(value, str) else value
+    targets = []
+    for entry in (entry.strip() for entry in entries):
+        if not entry:
+            continue
+        host, port = entry, str(DEFAULT_FORWARD_PORT)
+        if entry.startswith("["):
+            host, _, port = entry[1:].partition("]")
+            port = port.removeprefix(":") or str(DEFAULT_FORWARD_PORT)
+        elif entry.count(":") == 1:
+            host, port = entry.split(":")
+        if not host or not port.isdigit() or not 0 < int(port) < 65536:  # noqa: PLR2004
+            msg = f"Invalid forward target: {entry}"
+            raise ValueError(msg)
+        targets.append((host, int(port)))
+    return targets
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of an upstream target.
+
+    The circuit opens after `failure_threshold` consecutive failures. Once the reset timeout has elapsed, a single
+    probe is let through (half-open): the circuit closes if it succeeds, or opens again for twice as long otherwise.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD) -> None:
+        """Initialize the circuit breaker, closed."""
+        self.failure_threshold = failure_threshold
+        self.state = self.CLOSED
+        self.failures = 0
+        self._reset_timeout = 0.0
+        self._retry_at = 0.0
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent to the target."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() >= self._retry_at:
+            self.state = self.HALF_OPEN
+            return True
+        # Open, or half-open with the probe still in flight
+        return False
+
+    def record_success(self) -> bool:
+        """Record a successful request, returning True if it closed the circuit."""
+        closed = self.state != self.CLOSED
+        self.state = self.CLOSED
+        self.failures = 0
+        self._reset_timeout = 0.0
+        return closed
+
+    def record_failure(self) -> bool:
+        """Record a failed request, returning True if it opened the circuit."""
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            self._reset_timeout = min(BACKOFF_MAX, 2 * self._reset_timeout)
+        elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+            self._reset_timeout = BACKOFF_INITIAL
+        else:
+            return False
+        self.state = self.OPEN
+        self._retry_at = time.monotonic() + self._reset_timeout
+        return True
+
+
+class UpstreamConnection:
+    """Persistent connection to an upstream target on behalf of a single datalogger."""
+
+    def __init__(self, host: str, port: int) -> None:
+        """Initialize the connection, which is opened on the first request."""
+        self.host = host
+        self.port = port
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        """Return whether the connection is open."""
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def request(self, message: bytes) -> bytes | None:
+        """Send a message and return the response of the target, or None if it could not be obtained."""
+        async with self._lock:
+            reused = self.connected
+            response = await self.__exchange(message)
+            if response is None and reused:
+                # The target may have closed the idle connection, retry once with a new one
+                response = await self.__exchange(message)
+            return response
+
+    async def __exchange(self, message: bytes) -> bytes | None:
+        try:
+            if not self.connected:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), CONNECT_TIMEOUT
+                )
+            self._writer.write(message)
+            await self._writer.drain()
+            return await asyncio.wait_for(self.__read_frame(), READ_TIMEOUT)
+        except (TimeoutError, OSError, asyncio.IncompleteReadError) as e:
+            _LOGGER.debug(f"Connection error with upstream target {self.host}:{self.port}: {e!r}")
+            await self.close()
+            return None
+
+    async def __read_frame(self) -> bytes:
+        """Read exactly one frame, using the payload length announced in its header."""
+        msghdr = await self._reader.readexactly(HEADER_LENGTH)
+        payload_plus_footer = await self._reader.readexactly(_parse_header(msghdr)["payload_length"] + 2)
+        return msghdr + payload_plus_footer
+
+    async def close(self) -> None:
+        """Close the connection."""
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is None:
+            return
+        writer.close()
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
+
+
+class UpstreamTarget:
+    """Upstream target, with a connection per datalogger serial number and its circuit breaker."""
+
+    def __init__(self, host: str, port: int) -> None:
+        """Initialize the target."""
+        self.host = host
+        self.port = port
+        self.breaker = CircuitBreaker()
+        self._connections: dict[int, UpstreamConnection] = {}
+
+    async def request(self, serialno: int, message: bytes) -> bytes | None:
+        """Forward a message on the connection of its datalogger."""
+        connection = self._connections.get(serialno)
+        if connection is None:
+            connection = self._connections[serialno] = UpstreamConnection(self.host, self.port)
+        response = await connection.request(message)
+        if response is None:
+            if self.breaker.record_failure():
+                _LOGGER.warning(f"Cannot reach upstream target {self.host}:{self.port}, pausing forwarding to it")
+        elif self.breaker.record_success():
+            _LOGGER.info(f"Upstream target {self.host}:{self.port} is reachable again")
+        return response
+
+    async def close(self) -> None:
+        """Close all the connections to the target."""
+        connections = list(self._connections.values())
+        self._connections.clear()
+        await asyncio.gather(*(connection.close() for connection in connections))
+
+
+class UpstreamPool:
+    """
+    Fan-out of the messages to several upstream targets.
+
+    The first target (usually the Solis cloud) is the one whose response is preferred; the responses of the other
+    targets are only used if it fails.
+    """
+
+    def __init__(self, targets: Iterable[tuple[str, int]]) -> None:
+        """Initialize the pool."""
+        self.targets = [UpstreamTarget(host, port) for host, port in targets]
+        self._background: set[asyncio.Task] = set()
+
+    async def request(self, serialno: int, message: bytes) -> bytes | None:
+        """Forward a message to all the available targets concurrently and return the preferred response."""
+        targets = [target for target in self.targets if target.breaker.allow()]
+        if not targets:
+            return None
+        if len(targets) > 1:
+            # The requests may outlive the message if it is a view on a reusable receive buffer
+            message = bytes(message)
+        tasks = [asyncio.create_task(target.request(serialno, message)) for target in targets]
+        for task in tasks:
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        for task in tasks:
+            # The remaining requests go on in the background once a response is found
+            response = await asyncio.shield(task)
+            if response is not None:
+                return response
+        return None
+
+    async def close(self) -> None:
+        """Cancel the pending requests and close all the connections of the pool."""
+        for task in self._background:
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        await asyncio.gather(*(target.close() for target in self.targets))
+
+
+class ForwardQueue:
+    """
+    Bounded background queue forwarding messages to the real server.
+
+    Used when the datalogger is answered locally right away: the messages are then sent upstream by one worker per
+    datalogger, which keeps their order, and the response of the real server is discarded.
+    """
+
+    def __init__(
+        self,
+        pool: UpstreamPool,
+        maxsize: int,
+        overflow: str = FORWARD_OVERFLOW_DROP_OLDEST,
+        on_forwarded: Callable[[int, float], None] | None = None,
+    ) -> None:
+        """
+        Initialize the queue, holding up to `maxsize` messages per datalogger.
+
+        `on_forwarded` is called with the datalogger serial number and the round-trip time of every message that got
+        a response.
+        """
+        self.pool = pool
+        self.on_forwarded = on_forwarded
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self._queues: dict[int, deque[bytes]] = {}
+        self._wakeups: dict[int, asyncio.Event] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+
+    def put(self, serialno: int, message: bytes) -> bool:
+        """Queue a message of a datalogger, returning False if a message had to be dropped."""
+        queue = self._queues.get(serialno)
+        if queue is None:
+            queue = self._queues[serialno] = deque()
+            self._wakeups[serialno] = asyncio.Event()
+            self._workers[serialno] = asyncio.create_task(self.__forward(serialno))
+        accepted = True
+        if len(queue) >= self.maxsize:
+            self.dropped += 1
+            accepted = False
+            if self.overflow == FORWARD_OVERFLOW_DROP_NEWEST:
+                _LOGGER.debug(f"Forward queue of {serialno} is full, dropping the new message")
+                return accepted
+            _LOGGER.debug(f"Forward queue of {serialno} is full, dropping the oldest message")
+            queue.popleft()
+        # The message may be a view on a reusable receive buffer
+        queue.append(bytes(message))
+        self._wakeups[serialno].set()
+        return accepted
+
+    async def __forward(self, serialno: int) -> None:
+        queue = self._queues[serialno]
+        wakeup = self._wakeups[serialno]
+        while True:
+            await wakeup.wait()
+            wakeup.clear()
+            while queue:
+                start = time.perf_counter()
+                if await self.pool.request(serialno, queue.popleft()) is None:
+                    _LOGGER.debug(f"Failed to forward a queued message of {serialno} to the real server")
+                elif self.on_forwarded is not None:
+                    self.on_forwarded(serialno, time.perf_counter() - start)
+
+    async def close(self) -> None:
+        """Stop the workers and discard the queued messages."""
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+        self._wakeups.clear()
@@ -0,0 +1,59 @@
+"""
+Detection of the samples replayed by the dataloggers.
+
+After a reconnection, a datalogger sends again the frames it buffered while it was offline, and sometimes frames the
+server already received. The samples are classified by their inverter serial number and timestamp: the ones already
+seen are duplicates, and the ones older than the latest live sample of their inverter are late, so they can be
+imported as history instead of overwriting the current state.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+
+SAMPLE_LIVE = "live"
+SAMPLE_LATE = "late"
+SAMPLE_DUPLICATE = "duplicate"
+
+# (inverter, timestamp) pairs remembered, the least recently seen ones are forgotten first
+MAX_SEEN_SAMPLES = 4096
+# Inverters whose latest timestamp is remembered, the least recently seen ones are forgotten first. Every inverter
+# remembered has at least one of its samples seen, so remembering more of them than samples would not help
+MAX_INVERTERS = MAX_SEEN_SAMPLES
+
+
+class SampleHistory:
+    """Bounded index of the samples received from every inverter."""
+
+    def __init__(self, max_seen: int = MAX_SEEN_SAMPLES, max_inverters: int = MAX_INVERTERS) -> None:
+        """Initialize the index, empty."""
+        self.max_seen = max_seen
+        self.max_inverters = max_inverters
+        # Used as an ordered set, in the order the samples were last seen
+        self._seen: dict[tuple[str, int], None] = {}
+        # Timestamp of the latest live sample of every inverter, in the order the inverters were last seen
+        self._latest: OrderedDict[str, int] = OrderedDict()
+
+    def classify(self, inverter_id: str, timestamp: int) -> str:
+        """Record a sample and return whether it is live, late or a duplicate."""
+        key = (inverter_id, timestamp)
+        if key in self._seen:
+            # Seen again, forgotten last, like its inverter
+            del self._seen[key]
+            self._seen[key] = None
+            if inverter_id in self._latest:
+                self._latest.move_to_end(inverter_id)
+            return SAMPLE_DUPLICATE
+        self._seen[key] = None
+        if len(self._seen) > self.max_seen:
+            del self._seen[next(iter(self._seen))]
+        latest = self._latest.get(inverter_id)
+        if latest is None:
+            if len(self._latest) >= self.max_inverters:
+                self._latest.popitem(last=False)
+        else:
+            self._latest.move_to_end(inverter_id)
+            if timestamp < latest:
+                return SAMPLE_LATE
+        self._latest[inverter_id] = timestamp
+        return SAMPLE_LIVE
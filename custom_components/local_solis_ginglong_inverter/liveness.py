@@ -0,0 +1,92 @@
+"""
+Liveness of the inverters, from the frames of their datalogger.
+
+A datalogger sends a HEARTBEAT every minute and a DATA frame every 5 minutes while its inverter is powered. When it
+goes silent, at night or when it drops off the Wi-Fi, its inverter is reported offline, and online again with its
+next frame. All the inverters share a single timer wheel: a frame only records the time it was received, and the
+wheel visits every inverter about once per timeout, however often its datalogger sends frames.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# Slots of the timer wheel, the inverters are reported offline at most timeout / (WHEEL_SLOTS - 1) seconds late
+WHEEL_SLOTS = 64
+
+
+class LivenessTracker:
+    """Last frame of every inverter, reporting the ones silent for `timeout` seconds to `on_change`."""
+
+    def __init__(self, timeout: float, on_change: Callable[[str, bool], None], slots: int = WHEEL_SLOTS) -> None:
+        """
+        Initialize the tracker, `on_change` is called with the inverter and whether it is now online.
+
+        An inverter is also reported online with its first frame, as the ones that went offline are not remembered.
+        """
+        self.timeout = timeout
+        self.on_change = on_change
+        # A deadline is always less than a full turn of the wheel ahead of the current slot
+        self._tick = timeout / (slots - 1)
+        self._wheel: list[set[str]] = [set() for _ in range(slots)]
+        # Loop time of the last frame of every online inverter, which is in exactly one slot of the wheel
+        self._last_seen: dict[str, float] = {}
+        self._position = 0
+        self._handle: asyncio.TimerHandle | None = None
+
+    def is_online(self, inverter_id: str) -> bool:
+        """Return whether a frame was received from the inverter within the timeout."""
+        return inverter_id in self._last_seen
+
+    def touch(self, inverter_id: str) -> None:
+        """Record a frame of an inverter, reporting it online if it was not."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        online = inverter_id in self._last_seen
+        self._last_seen[inverter_id] = now
+        if online:
+            # Left in its slot, it is rescheduled from its last frame when the wheel reaches it
+            return
+        if self._handle is None:
+            self._position = math.floor(now / self._tick)
+            self._handle = loop.call_at((self._position + 1) * self._tick, self.__tick)
+        self.__schedule(inverter_id, now + self.timeout)
+        self.on_change(inverter_id, True)  # noqa: FBT003
+
+    def __schedule(self, inverter_id: str, deadline: float) -> None:
+        self._wheel[math.ceil(deadline / self._tick) % len(self._wheel)].add(inverter_id)
+
+    def __tick(self) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        current = math.floor(now / self._tick)
+        # The slots skipped if the loop was late, at most a full turn
+        for position in range(max(self._position + 1, current - len(self._wheel) + 1), current + 1):
+            index = position % len(self._wheel)
+            slot = self._wheel[index]
+            if not slot:
+                continue
+            self._wheel[index] = set()
+            for inverter_id in slot:
+                last_seen = self._last_seen[inverter_id]
+                if now - last_seen < self.timeout:
+                    self.__schedule(inverter_id, last_seen + self.timeout)
+                    continue
+                del self._last_seen[inverter_id]
+                self.on_change(inverter_id, False)  # noqa: FBT003
+        self._position = current
+        self._handle = loop.call_at((current + 1) * self._tick, self.__tick) if self._last_seen else None
+
+    def close(self) -> None:
+        """Stop the timer, the inverters are left as they are."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        for slot in self._wheel:
+            slot.clear()
+        self._last_seen.clear()
@@ -0,0 +1,244 @@
+"""
+Performance metrics of the server.
+
+Only counters and fixed-bucket histograms are kept, per datalogger, so recording a frame costs a few increments and
+the memory does not grow over time. The totals of the server are only summed up when they are read, periodically
+by the diagnostic sensors and in the diagnostics.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any
+
+from .protocol import DATA_REQUEST, HEARTBEAT_REQUEST
+from .tracing import MAX_PEERS
+
+if TYPE_CHECKING:
+    from .supervisor import ConnectionSupervisor
+
+# Upper bounds of the histogram buckets, in seconds, the last bucket holds everything slower
+HISTOGRAM_BOUNDS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+
+MESSAGE_TYPES = {HEARTBEAT_REQUEST: "heartbeat", DATA_REQUEST: "data"}
+
+
+class Histogram:
+    """Histogram of durations, in seconds."""
+
+    __slots__ = ("buckets", "total")
+
+    def __init__(self) -> None:
+        """Initialize the histogram, empty."""
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record a duration."""
+        self.buckets[bisect_left(HISTOGRAM_BOUNDS, value)] += 1
+        self.total += value
+
+    def merge(self, other: Histogram) -> None:
+        """Add the durations recorded by another histogram."""
+        self.buckets = [count + other_count for count, other_count in zip(self.buckets, other.buckets, strict=True)]
+        self.total += other.total
+
+    @property
+    def count(self) -> int:
+        """Return the number of recorded durations."""
+        return sum(self.buckets)
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean duration, None if nothing was recorded."""
+        count = self.count
+        return self.total / count if count else None
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return the upper bound of the bucket holding the given percentile, None if nothing was recorded."""
+        count = self.count
+        if not count:
+            return None
+        cumulative = 0
+        for bound, bucket in zip(HISTOGRAM_BOUNDS, self.buckets, strict=False):
+            cumulative += bucket
+            if cumulative >= fraction * count:
+                return bound
+        # Slower than the last bound
+        return float("inf")
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram in a JSON serializable form."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "buckets": dict(zip((*map(str, HISTOGRAM_BOUNDS), "inf"), self.buckets, strict=True)),
+        }
+
+
+class Metrics:
+    """Counters and histograms of the frames of a datalogger, or of all of them."""
+
+    __slots__ = (
+        "bytes_in",
+        "bytes_out",
+        "decode_time",
+        "duplicate_frames",
+        "fallbacks",
+        "forward_round_trip",
+        "frames",
+        "late_frames",
+        "response_time",
+    )
+
+    def __init__(self) -> None:
+        """Initialize the metrics, all zero."""
+        self.frames: dict[int, int] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.fallbacks = 0
+        # DATA frames replayed by the datalogger, already received or older than the latest one
+        self.duplicate_frames = 0
+        self.late_frames = 0
+        self.decode_time = Histogram()
+        self.response_time = Histogram()
+        self.forward_round_trip = Histogram()
+
+    def frame_received(self, msg_type: int, size: int) -> None:
+        """Record a frame received from the datalogger."""
+        self.frames[msg_type] = self.frames.get(msg_type, 0) + 1
+        self.bytes_in += size
+
+    def response_sent(self, size: int, elapsed: float) -> None:
+        """Record a response sent to the datalogger `elapsed` seconds after receiving its frame."""
+        self.bytes_out += size
+        self.response_time.observe(elapsed)
+
+    @property
+    def frames_received(self) -> int:
+        """Return the number of frames received."""
+        return sum(self.frames.values())
+
+    def frames_of_type(self, msg_type: int) -> int:
+        """Return the number of frames received of a message type."""
+        return self.frames.get(msg_type, 0)
+
+    def merge(self, other: Metrics) -> None:
+        """Add the metrics of another datalogger."""
+        for msg_type, count in other.frames.items():
+            self.frames[msg_type] = self.frames.get(msg_type, 0) + count
+        self.bytes_in += other.bytes_in
+        self.bytes_out += other.bytes_out
+        self.fallbacks += other.fallbacks
+        self.duplicate_frames += other.duplicate_frames
+        self.late_frames += other.late_frames
+        self.decode_time.merge(other.decode_time)
+        self.response_time.merge(other.response_time)
+        self.forward_round_trip.merge(other.forward_round_trip)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics in a JSON serializable form."""
+        return {
+            "frames": {MESSAGE_TYPES.get(msg_type, hex(msg_type)): count for msg_type, count in self.frames.items()},
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "fallbacks": self.fallbacks,
+            "duplicate_frames": self.duplicate_frames,
+            "late_frames": self.late_frames,
+            "decode_time": self.decode_time.as_dict(),
+            "response_time": self.response_time.as_dict(),
+            "forward_round_trip": self.forward_round_trip.as_dict(),
+        }
+
+
+class ServerTotals(Metrics):
+    """Metrics of all the dataloggers, with the ones only known to the server."""
+
+    __slots__ = ("active_connections", "invalid_frames")
+
+    def __init__(self, invalid_frames: int, active_connections: int) -> None:
+        """Initialize the totals, before the metrics of the dataloggers are merged."""
+        super().__init__()
+        self.invalid_frames = invalid_frames
+        self.active_connections = active_connections
+
+
+class ServerMetrics:
+    """Metrics of every datalogger connected to the server."""
+
+    def __init__(self, supervisor: ConnectionSupervisor) -> None:
+        """Initialize the metrics, without dataloggers."""
+        self.supervisor = supervisor
+        self.invalid_frames = 0
+        self.discarded_bytes = 0
+        self._dataloggers: dict[int, Metrics] = {}
+        self._inverters: dict[str, Metrics] = {}
+        # Metrics of the dataloggers forgotten to bound the memory, still part of the totals
+        self._forgotten = Metrics()
+
+    def datalogger(self, serialno: int) -> Metrics:
+        """Return the metrics of a datalogger, forgetting the least recently seen ones beyond `MAX_PEERS`."""
+        metrics = self._dataloggers.pop(serialno, None)
+        if metrics is None:
+            metrics = Metrics()
+            if len(self._dataloggers) >= MAX_PEERS:
+                self._forgotten.merge(self._dataloggers.pop(next(iter(self._dataloggers))))
+        self._dataloggers[serialno] = metrics
+        return metrics
+
+    def invalid_data(self, size: int, *, resync: bool) -> None:
+        """Record invalid data skipped to find the next frame, `resync` for the first data of an invalid frame."""
+        self.invalid_frames += resync
+        self.discarded_bytes += size
+
+    def link_inverter(self, inverter_id: str, datalogger: Metrics) -> None:
+        """Record the datalogger an inverter is connected to."""
+        if self._inverters.get(inverter_id) is not datalogger:
+            self._inverters[inverter_id] = datalogger
+            if len(self._inverters) > MAX_PEERS:
+                del self._inverters[next(iter(self._inverters))]
+
+    def inverter(self, inverter_id: str) -> Metrics | None:
+        """Return the metrics of the datalogger of an inverter, if known."""
+        return self._inverters.get(inverter_id)
+
+    def totals(self) -> ServerTotals:
+        """Sum up the metrics of all the dataloggers."""
+        totals = ServerTotals(self.invalid_frames, self.supervisor.count)
+        totals.bytes_in += self.discarded_bytes
+        totals.merge(self._forgotten)
+        for metrics in self._dataloggers.values():
+            totals.merge(metrics)
+        return totals
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the totals and the metrics of every datalogger in a JSON serializable form."""
+        totals = self.totals()
+        return {
+            **totals.as_dict(),
+            "invalid_frames": totals.invalid_frames,
+            "active_connections": totals.active_connections,
+            "dataloggers": {str(serialno): metrics.as_dict() for serialno, metrics in self._dataloggers.items()},
+        }
@@ -0,0 +1,161 @@
+"""
+Primitives of the protocol spoken by the Solis/Ginglong Wi-Fi dataloggers.
+
+Adapted from the original code by @planetmarshall
+and https://github.com/planetmarshall/solis-service/pull/8.
+"""
+
+import datetime
+import time
+from struct import pack, pack_into, unpack_from
+
+# Protocol constants
+HEARTBEAT_REQUEST = 0x41
+DATA_REQUEST = 0x42
+START_BYTE = 0xA5
+END_BYTE = 0x15
+HEADER_LENGTH = 11
+# The known frames carry a few hundred bytes at most, a longer payload length means a corrupted header
+MAX_PAYLOAD_LENGTH = 512
+# Response templates kept, the least recently created ones are forgotten first
+MAX_RESPONSE_TEMPLATES = 512
+
+# Offsets of the variable parts of a response
+_RESPONSE_INDEX_OFFSET = 5
+_RESPONSE_TIME_OFFSET = 13
+
+
+def _checksum_byte(buffer: bytes) -> int:
+    return sum(buffer) & 255
+
+
+def _parse_header(msghdr: bytes) -> dict[str, int]:
+    [payload_length, msg_type, resp_idx, req_idx, serialno] = unpack_from("<xHxBBBI", msghdr, 0)
+    return {
+        "payload_length": payload_length,
+        "msg_type": msg_type,
+        "resp_idx": resp_idx,
+        "req_idx": req_idx,
+        "serialno": serialno,
+    }
+
+
+def _mock_server_response(header: dict[str, int], request_payload: bytes) -> bytes:
+    unix_time = int(datetime.datetime.now(tz=datetime.UTC).timestamp())
+
+    payload = pack("<BBIBBBB", request_payload[0], 0x01, unix_time, 0xAA, 0xAA, 0x00, 0x00)
+    # Don't know what 0xaa, 0xaa, 0x00, 0x00, but it is always there and seems to not matter the exact two first bytes
+
+    resp_type = header["msg_type"] - 0x30
+    # Don't know what the second byte means (0x10)
+    header = pack(
+        "<BHBBBBI", START_BYTE, len(payload), 0x10, resp_type, header["req_idx"], header["req_idx"], header["serialno"]
+    )
+    message = header + payload
+    message += pack("BB", _checksum_byte(message[1:]), END_BYTE)
+    return message
+
+
+class ResponseTemplates:
+    """
+    Preallocated responses to the dataloggers, per serial number and message type.
+
+    A response only differs from the previous one to the same datalogger by its request index and timestamp: they
+    are patched in place in the template, and the checksum is updated from the one of the constant part instead of
+    summing the whole message again. The responses are the same as the ones of `_mock_server_response`.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the templates, created on the first message of every datalogger."""
+        # Template and checksum of its constant part, by serial number, message type and first request byte
+        self._templates: dict[tuple[int, int, int], tuple[bytearray, int]] = {}
+
+    def response(self, header: dict[str, int], request_payload: bytes) -> bytes:
+        """Return the response to a message."""
+        key = (header["serialno"], header["msg_type"], request_payload[0])
+        template = self._templates.get(key)
+        if template is None:
+            template = self._templates[key] = self.__create(header, request_payload)
+            if len(self._templates) > MAX_RESPONSE_TEMPLATES:
+                del self._templates[next(iter(self._templates))]
+        buffer, checksum = template
+        req_idx = header["req_idx"]
+        unix_time = int(time.time())
+        buffer[_RESPONSE_INDEX_OFFSET] = buffer[_RESPONSE_INDEX_OFFSET + 1] = req_idx
+        pack_into("<I", buffer, _RESPONSE_TIME_OFFSET, unix_time)
+        # The sum of the bytes of the timestamp, modulo 256, is the sum of its shifts
+        buffer[-2] = (
+            checksum + 2 * req_idx + unix_time + (unix_time >> 8) + (unix_time >> 16) + (unix_time >> 24)
+        ) & 255
+        # Copied, the transport may hold on to the response after write() returns
+        return bytes(buffer)
+
+    @staticmethod
+    def __create(header: dict[str, int], request_payload: bytes) -> tuple[bytearray, int]:
+        buffer = bytearray(_mock_server_response(header, request_payload))
+        buffer[_RESPONSE_INDEX_OFFSET] = buffer[_RESPONSE_INDEX_OFFSET + 1] = 0
+        pack_into("<I", buffer, _RESPONSE_TIME_OFFSET, 0)
+        return buffer, _checksum_byte(buffer[1:-2])
+
+
+def _is_valid_message(message: bytes) -> bool:
+    """Check the start byte, end byte and checksum of a message."""
+    return message[0] == START_BYTE and message[-1] == END_BYTE and message[-2] == _checksum_byte(message[1:-2])
+
+
+def _scan_frame(buffer: bytes | bytearray, start: int, end: int) -> tuple[int, int, bool]:
+    """
+    Find the next valid frame in `buffer[start:end]`, skipping the bytes that cannot be the start of one.
+
+    Returns the position of the frame, its length and whether it is complete. An incomplete frame has not been fully
+    received yet: its length is then the number of bytes needed to go on (the header length until the header is
+    received). A complete frame after the start of an incomplete one is returned instead, the incomplete one was then
+    not a frame. Everything before the returned position must be discarded.
+    """
+    while True:
+        position = buffer.find(START_BYTE, start, end)
+        if position < 0:
+            return end, HEADER_LENGTH, False
+        if end - position < HEADER_LENGTH:
+            return position, HEADER_LENGTH, False
+        (payload_length,) = unpack_from("<H", buffer, position + 1)
+        length = HEADER_LENGTH + payload_length + 2
+        if 0 < payload_length <= MAX_PAYLOAD_LENGTH:
+            if end - position < length:
+                # A stray start byte may look like the header of a frame longer than what follows it: a complete frame
+                # received after it must be handled, rather than waiting for bytes that may never come
+                following = _scan_complete_frame(buffer, position + 1, end)
+                if following is not None:
+                    return *following, True
+                return position, length, False
+            with memoryview(buffer) as view:
+                if _is_valid_message(view[position : position + length]):
+                    return position, length, True
+        # Not a frame, look for the next start byte
+        start = position + 1
+
+
+def _scan_complete_frame(buffer: bytes | bytearray, start: int, end: int) -> tuple[int, int] | None:
+    """Find the next complete and valid frame in `buffer[start:end]`, returning its position and length."""
+    with memoryview(buffer) as view:
+        while (position := buffer.find(START_BYTE, start, end - HEADER_LENGTH + 1)) >= 0:
+            (payload_length,) = unpack_from("<H", buffer, position + 1)
+            length = HEADER_LENGTH + payload_length + 2
+            if (
+                0 < payload_length <= MAX_PAYLOAD_LENGTH
+                and end - position >= length
+                and _is_valid_message(view[position : position + length])
+            ):
+                return position, length
+            start = position + 1
+    return None
+
+
+def _is_heartbeat(data: bytes) -> bool:
+    """Check if the data is a heartbeat message."""
+    return data[4] == HEARTBEAT_REQUEST
+
+
+def _is_data_message(data: bytes) -> bool:
+    """Check if the data is a data message."""
+    return data[4] == DATA_REQUEST
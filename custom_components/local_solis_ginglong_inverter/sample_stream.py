@@ -0,0 +1,127 @@
+"""
+Stream of decoded samples between the standalone collector and the integration.
+
+The collector publishes every sample as a JSON line to the clients connected to its publish port (see the top-level
+`collector` package), the integration receives them with `CollectorClient`. A client waiting for its export to catch
+up stops reading meanwhile.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+from typing import TYPE_CHECKING, Any
+
+from .const_defaults import DEFAULT_COLLECTOR_PORT
+from .decoder import SAMPLE_FIELDS, InverterSample
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from .decoder import DecoderProfile
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds between two connection attempts of a client, doubled after every failure
+RECONNECT_INITIAL = 1.0
+RECONNECT_MAX = 60.0
+
+
+def parse_collector_address(value: str) -> tuple[str, int]:
+    """Parse a `host[:port]` collector address."""
+    host, separator, port = value.strip().rpartition(":")
+    if not separator:
+        host, port = port, ""
+    if not host:
+        msg = f"Invalid collector address {value!r}"
+        raise ValueError(msg)
+    if not port:
+        return host, DEFAULT_COLLECTOR_PORT
+    if not port.isdigit() or not 0 < int(port) < 65536:  # noqa: PLR2004
+        msg = f"Invalid collector port in {value!r}"
+        raise ValueError(msg)
+    return host, int(port)
+
+
+def encode_sample(sample: InverterSample) -> bytes:
+    """Return a sample as a JSON line."""
+    data: dict[str, Any] = sample.as_dict(derived=False)
+    data["profile"] = None if sample.profile is None else sample.profile.name
+    return json.dumps(data, separators=(",", ":")).encode() + b"\n"
+
+
+def decode_sample(line: bytes, profiles: dict[str, DecoderProfile]) -> InverterSample:
+    """Return the sample of a JSON line, with the profile of the given name if known."""
+    data = json.loads(line)
+    values = {name: value for name, value in data.items() if name in SAMPLE_FIELDS}
+    return InverterSample(profiles.get(data.get("profile")), **values)
+
+
+class CollectorClient:
+    """
+    Client of a collector, passing the published samples to `on_sample` and reconnecting when disconnected.
+
+    The samples are not read while the awaitable returned by `on_sample`, if any, is pending.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        on_sample: Callable[[InverterSample], Awaitable[None] | None],
+        profiles: dict[str, DecoderProfile] | None = None,
+    ) -> None:
+        """Initialize the client, decoding the samples with the `profiles` by name."""
+        self.host = host
+        self.port = port
+        self.on_sample = on_sample
+        self.profiles = profiles or {}
+        self.connected = False
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Connect to the collector in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.__run())
+
+    async def __run(self) -> None:
+        delay = RECONNECT_INITIAL
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError as err:
+                _LOGGER.debug(f"Cannot connect to the collector at {self.host}:{self.port}: {err}")
+            else:
+                _LOGGER.info(f"Connected to the collector at {self.host}:{self.port}")
+                self.connected = True
+                delay = RECONNECT_INITIAL
+                try:
+                    await self.__receive(reader)
+                except (OSError, asyncio.LimitOverrunError, ValueError) as err:
+                    _LOGGER.warning(f"Connection to the collector lost: {err}")
+                finally:
+                    self.connected = False
+                    writer.close()
+            await asyncio.sleep(delay)
+            delay = min(RECONNECT_MAX, 2 * delay)
+
+    async def __receive(self, reader: asyncio.StreamReader) -> None:
+        while line := await reader.readline():
+            try:
+                sample = decode_sample(line, self.profiles)
+            except (ValueError, TypeError, AttributeError):
+                _LOGGER.warning(f"Invalid sample from the collector: {line[:100]!r}")
+                continue
+            if (pending := self.on_sample(sample)) is not None:
+                await pending
+        _LOGGER.warning("The collector closed the connection")
+
+    async def close(self) -> None:
+        """Disconnect from the collector."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
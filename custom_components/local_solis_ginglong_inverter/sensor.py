@@ -1,10 +1,16 @@
 """Sensor platform for Solis/Ginglong Local Logger integration."""
 
 import logging
-from collections.abc import Callable
+import time
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import partial
+from operator import attrgetter
+from pathlib import Path
 from typing import Any
 
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
@@ -12,24 +18,79 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.const import (
+    EntityCategory,
     UnitOfElectricCurrent,
     UnitOfElectricPotential,
     UnitOfEnergy,
     UnitOfFrequency,
+    UnitOfInformation,
     UnitOfPower,
     UnitOfTemperature,
+    UnitOfTime,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity import DeviceInfo, Entity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN, FORWARD_HOST, FORWARD_MODE, LISTENING_PORT
-from .const_defaults import DEFAULT_FORWARD_HOST, DEFAULT_FORWARD_MODE
+from .aggregates import AGGREGATE_WINDOWS, Aggregate, InverterAggregates
+from .backfill import MEAN_SERIES, SUM_SERIES, StatisticsBackfill
+from .const import (
+    AVAILABILITY_TIMEOUT,
+    CAPTURE,
+    COLLECTOR_HOST,
+    DATA_SAMPLE_BUS,
+    DATA_SERVER,
+    DOMAIN,
+    EVENT_SAMPLES,
+    EXPORT,
+    EXPORT_NONE,
+    EXPORT_SQLITE,
+    FORWARD_HOST,
+    FORWARD_LOCAL_ACK,
+    FORWARD_MODE,
+    FORWARD_OVERFLOW,
+    FORWARD_QUEUE_SIZE,
+    IDLE_TIMEOUT,
+    LISTENING_PORT,
+    MAX_CONNECTIONS,
+    MAX_CONNECTIONS_PER_PEER,
+    READ_TIMEOUT,
+    TRACE_SIZE,
+    TRANSPORT,
+)
+from .const_defaults import (
+    DEFAULT_AVAILABILITY_TIMEOUT,
+    DEFAULT_CAPTURE,
+    DEFAULT_COLLECTOR_HOST,
+    DEFAULT_EXPORT,
+    DEFAULT_FORWARD_HOST,
+    DEFAULT_FORWARD_LOCAL_ACK,
+    DEFAULT_FORWARD_MODE,
+    DEFAULT_FORWARD_OVERFLOW,
+    DEFAULT_FORWARD_QUEUE_SIZE,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_CONNECTIONS_PER_PEER,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_TRACE_SIZE,
+    DEFAULT_TRANSPORT,
+)
+from .decoder import DEFAULT_PROFILE, DecoderProfile, InverterSample, load_profiles
+from .events import SampleBus
+from .metrics import Metrics, ServerMetrics
+from .protocol import DATA_REQUEST, HEARTBEAT_REQUEST
 from .server import LoggerServer
+from .store import InverterStore
 
 _LOGGER = logging.getLogger(__name__)
 
+# The diagnostic sensors of the metrics and the rolling aggregate sensors are only updated this often, whatever the
+# frame rate
+METRICS_UPDATE_INTERVAL = timedelta(seconds=60)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -38,8 +99,50 @@ async def async_setup_entry(
 ) -> None:
     """Configure sensors from a configuration entry created in the integrations UI."""
     config = hass.data[DOMAIN][config_entry.entry_id]
-    logger_server = LoggerServerEntity(hass, config, async_add_entities)
-    async_add_entities([logger_server])
+    capture_path = None
+    if config.get(CAPTURE, DEFAULT_CAPTURE):
+        capture_path = hass.config.path(f"{DOMAIN}_capture_{config_entry.entry_id}.bin")
+    export = config.get(EXPORT, DEFAULT_EXPORT)
+    export_path = None
+    if export != EXPORT_NONE:
+        # A database file, or a directory of daily CSV files
+        suffix = ".db" if export == EXPORT_SQLITE else ""
+        export_path = hass.config.path(f"{DOMAIN}_export_{config_entry.entry_id}{suffix}")
+    decoder_profiles = await hass.async_add_executor_job(
+        _load_decoder_profiles, Path(hass.config.path(f"{DOMAIN}_decoders.json"))
+    )
+    inverter_store = InverterStore(hass, config_entry.entry_id)
+    restored = await inverter_store.async_load(
+        {profile.name: profile for profile in (*decoder_profiles, DEFAULT_PROFILE)}
+    )
+    logger_server = LoggerServerEntity(
+        hass,
+        config,
+        async_add_entities,
+        config_entry.entry_id,
+        capture_path,
+        decoder_profiles,
+        inverter_store,
+        export_path,
+    )
+    config[DATA_SERVER] = logger_server.server
+    config[DATA_SAMPLE_BUS] = logger_server.sample_bus
+    async_add_entities([logger_server, *logger_server.metric_entities])
+    # The inverters seen before the restart get their entities right away, with their last state
+    logger_server.restore(restored)
+
+
+def _load_decoder_profiles(path: Path) -> list[DecoderProfile]:
+    """Load the decoder profiles of other models declared by the user, if any."""
+    if not path.exists():
+        return []
+    try:
+        profiles = load_profiles(path)
+    except (OSError, ValueError, KeyError, TypeError) as err:
+        _LOGGER.error(f"Invalid decoder profiles in {path}, using the default one: {err}")  # noqa: TRY400
+        return []
+    _LOGGER.info(f"Loaded the decoder profiles {', '.join(profile.name for profile in profiles)} from {path}")
+    return profiles
 
 
 class LoggerServerEntity(Entity):
@@ -49,40 +152,174 @@ class LoggerServerEntity(Entity):
     name = "Solis/Ginglong Local Logger Server"
     suggested_object_id = "solis_local_logger_server_entity"
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         hass: HomeAssistant,
         config_data: dict[str, Any],
         async_add_entities: AddEntitiesCallback,
+        entry_id: str,
+        capture_path: str | None = None,
+        decoder_profiles: Iterable[DecoderProfile] = (),
+        inverter_store: InverterStore | None = None,
+        export_path: str | None = None,
     ) -> None:
-        """Initialize the Solis/Ginglong Local Logger server."""
+        """
+        Initialize the Solis/Ginglong Local Logger server.
+
+        The last samples are saved in `inverter_store`, and all the samples exported to `export_path`, if given.
+        """
         _LOGGER.debug("Config data: %s", config_data)
         self.hass = hass
+        self._store = inverter_store
+        self._backfill = StatisticsBackfill(hass)
+        self.sample_bus = SampleBus(self.__fire_samples_event, self.__refresh_fields)
+        self._inverters: dict[str, InverterLoggerComponent] = {}
+        # The exported samples hold all the fields, whatever the enabled sensors
+        self._export_all = export_path is not None
         self._server = LoggerServer(
             config_data[LISTENING_PORT],
             self.__on_data,
             forward=config_data.get(FORWARD_MODE, DEFAULT_FORWARD_MODE),
             forward_host=config_data.get(FORWARD_HOST, DEFAULT_FORWARD_HOST),
+            forward_local_ack=config_data.get(FORWARD_LOCAL_ACK, DEFAULT_FORWARD_LOCAL_ACK),
+            forward_queue_size=config_data.get(FORWARD_QUEUE_SIZE, DEFAULT_FORWARD_QUEUE_SIZE),
+            forward_overflow=config_data.get(FORWARD_OVERFLOW, DEFAULT_FORWARD_OVERFLOW),
+            fields=self.__wanted_fields(),
+            decoder_profiles=decoder_profiles,
+            on_history=self._backfill.add,
+            transport=config_data.get(TRANSPORT, DEFAULT_TRANSPORT),
+            trace_size=config_data.get(TRACE_SIZE, DEFAULT_TRACE_SIZE),
+            capture_path=capture_path,
+            idle_timeout=config_data.get(IDLE_TIMEOUT, DEFAULT_IDLE_TIMEOUT),
+            read_timeout=config_data.get(READ_TIMEOUT, DEFAULT_READ_TIMEOUT),
+            max_connections=config_data.get(MAX_CONNECTIONS, DEFAULT_MAX_CONNECTIONS),
+            max_connections_per_peer=config_data.get(MAX_CONNECTIONS_PER_PEER, DEFAULT_MAX_CONNECTIONS_PER_PEER),
+            collector_host=config_data.get(COLLECTOR_HOST, DEFAULT_COLLECTOR_HOST),
+            export_path=export_path,
+            export_format=config_data.get(EXPORT, DEFAULT_EXPORT),
+            on_availability=self.__on_availability,
+            availability_timeout=config_data.get(AVAILABILITY_TIMEOUT, DEFAULT_AVAILABILITY_TIMEOUT),
         )
         self._async_add_entities = async_add_entities
-        self._inverters = {}
+        device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry_id)},
+            manufacturer="Solis/Ginglong",
+            name="Solis/Ginglong Local Logger Server",
+        )
+        self.metric_entities = [
+            MetricSensorEntity(lambda: self._server.metrics.totals(), entry_id, device_info, description)
+            for description in SERVER_METRIC_DESCRIPTIONS
+        ]
+        self._unsubscribe_metrics: Callable[[], None] | None = None
+
+    @property
+    def server(self) -> LoggerServer:
+        """Return the server receiving the datalogger messages."""
+        return self._server
+
+    def __on_data(self, data: InverterSample) -> None:
+        inverter_id = data.inverter_serial_number.lower()
+        known = inverter_id in self._inverters
+        self.__inverter_logger(inverter_id, data.profile).set_data(data)
+        if not known:
+            self.__refresh_fields()
+        if self._store is not None:
+            self._store.update(inverter_id, data)
+        self.sample_bus.publish(data)
+
+    def __fire_samples_event(self, samples: list[InverterSample]) -> None:
+        """Fire a single event with all the samples of a loop iteration."""
+        self.hass.bus.async_fire(
+            EVENT_SAMPLES,
+            {
+                "samples": [
+                    {**sample.as_dict(), "profile": None if sample.profile is None else sample.profile.name}
+                    for sample in samples
+                ]
+            },
+        )
 
-    def __on_data(self, data: dict[str, Any]) -> None:
-        inverter_id = data["inverter_serial_number"].lower()
+    def __wanted_fields(self) -> set[str] | None:
+        """
+        Return the frame fields read by the enabled sensors of the known inverters, None for all of them.
+
+        All the fields are decoded if the samples are exported, or while the sample bus has subscribers or the samples
+        event has listeners.
+
+        Until an inverter is known, the fields of the sensors enabled by default are decoded, so the first frame of a
+        new inverter may lack the fields of the sensors disabled on all the others. Home Assistant reloads the entry
+        when a sensor is enabled or disabled, which computes the fields again. The late samples are decoded with the
+        same fields, so the ones imported into the statistics are always decoded.
+        """
+        if self._export_all or self.sample_bus.has_subscribers or self.hass.bus.async_listeners().get(EVENT_SAMPLES, 0):
+            return None
+        fields = {*MEAN_SERIES, *SUM_SERIES}
+        if not self._inverters:
+            return fields | _enabled_fields(None, None)
+        registry = er.async_get(self.hass)
+        for inverter_id in self._inverters:
+            fields |= _enabled_fields(registry, inverter_id)
+        return fields
+
+    def __refresh_fields(self) -> None:
+        """Decode only the fields of the enabled sensors, from the next frame on."""
+        self._server.set_fields(self.__wanted_fields())
+
+    def __on_availability(self, inverter_id: str, available: bool) -> None:  # noqa: FBT001
+        inverter_logger = self._inverters.get(inverter_id)
+        if inverter_logger is not None:
+            inverter_logger.set_available(available)
+
+    def __inverter_logger(self, inverter_id: str, profile: DecoderProfile | None) -> "InverterLoggerComponent":
         inverter_logger = self._inverters.get(inverter_id, None)
         if inverter_logger is None:
             _LOGGER.debug("Creating new inverter logger for %s", inverter_id)
-            inverter_logger = InverterLoggerComponent(self.hass, self._async_add_entities, inverter_id)
+            inverter_logger = InverterLoggerComponent(
+                self.hass, self._async_add_entities, inverter_id, self._server.metrics, profile
+            )
             self._inverters[inverter_id] = inverter_logger
-        inverter_logger.set_data(data)
+            self.metric_entities.extend(inverter_logger.metric_entities)
+        return inverter_logger
+
+    def restore(self, samples: Iterable[InverterSample]) -> None:
+        """Create the entities of the inverters known before a restart, stale until they send fresh data."""
+        for sample in samples:
+            inverter_id = sample.inverter_serial_number.lower()
+            _LOGGER.debug("Restoring the last sample of %s", inverter_id)
+            # Frames replayed by the datalogger and older than the sample are not live
+            self._server.restore_sample(sample)
+            self.__inverter_logger(inverter_id, sample.profile).set_data(sample, stale=True)
+        self.__refresh_fields()
 
     async def async_added_to_hass(self) -> None:
         """Run when this Entity has been added to HA."""
         await self._server.start_server()
+        self._unsubscribe_metrics = async_track_time_interval(self.hass, self.__update_metrics, METRICS_UPDATE_INTERVAL)
+
+    @callback
+    def __update_metrics(self, _now: datetime) -> None:
+        """
+        Write the changed metrics and rolling aggregates, periodically rather than on every frame.
+
+        The decoded fields are also computed again, as the listeners of the samples event are not notified.
+        """
+        self.__refresh_fields()
+        for entity in self.metric_entities:
+            if entity.update_value():
+                entity.publish()
+        for inverter_logger in self._inverters.values():
+            inverter_logger.refresh_aggregates()
 
     async def async_will_remove_from_hass(self) -> None:
         """Entity being removed from hass."""
+        if self._unsubscribe_metrics is not None:
+            self._unsubscribe_metrics()
+            self._unsubscribe_metrics = None
         await self._server.stop_server()
+        await self.sample_bus.close()
+        self._backfill.flush()
+        if self._store is not None:
+            await self._store.async_save()
 
 
 class InverterLoggerComponent:
@@ -93,26 +330,106 @@ class InverterLoggerComponent:
         hass: HomeAssistant,
         async_add_entities: AddEntitiesCallback,
         inverter_id: str,
+        metrics: ServerMetrics | None = None,
+        profile: DecoderProfile | None = None,
     ) -> None:
-        """Initialize the inverter logger component."""
+        """
+        Initialize the inverter logger component, with the diagnostic sensors of its datalogger if `metrics`.
+
+        If the decoder `profile` of the inverter is given, only the sensors of the fields it reports are created.
+        """
         self.inverter_id = inverter_id
         self.hass = hass
-        self.entities = [InverterLoggerBaseEntity(self, entity_desc) for entity_desc in ENTITIES_DESCRIPTIONS]
-        self.data = None
-        async_add_entities(self.entities)
+        # Shared by all the entities of the inverter
+        self.device_info = DeviceInfo(
+            identifiers={(DOMAIN, inverter_id)},
+            manufacturer="Solis/Ginglong",
+            model=inverter_id,
+            name="Solis/Ginglong Inverter",
+        )
+        fields = None if profile is None else profile.field_names
+        self.entities = [
+            InverterLoggerBaseEntity(self, entity_desc)
+            for entity_desc in ENTITIES_DESCRIPTIONS
+            if fields is None or _decoded_fields([entity_desc]) <= fields
+        ]
+        self.metric_entities = []
+        if metrics is not None:
+            self.metric_entities = [
+                MetricSensorEntity(partial(metrics.inverter, inverter_id), inverter_id, self.device_info, description)
+                for description in METRIC_DESCRIPTIONS
+            ]
+        self.aggregates = InverterAggregates()
+        self.aggregate_entities = [
+            AggregateSensorEntity(self, description)
+            for description in AGGREGATE_DESCRIPTIONS
+            if fields is None or description.aggregate_key[0] in fields
+        ]
+        self.data: InverterSample | None = None
+        self.stale = False
+        self.available = True
+        self._changed: set[InverterLoggerBaseEntity | AggregateSensorEntity] = set()
+        self._publish_scheduled = False
+        async_add_entities([*self.entities, *self.aggregate_entities, *self.metric_entities])
 
-    def set_data(self, data: dict[str, Any]) -> None:
-        """Update all entities with new data."""
+    def set_data(self, data: InverterSample, *, stale: bool = False) -> None:
+        """Update all entities with new data, publishing the changed ones together, `stale` for restored data."""
         self.data = data
+        if stale != self.stale:
+            self.stale = stale
+            for entity in self.entities:
+                entity.mark_stale(stale)
+            # Written even if their value did not change
+            self._changed.update(self.entities)
+        if not stale:
+            self.aggregates.add(data)
         for entity in self.entities:
-            entity.notify_state_changed()
+            if entity.update_value():
+                self._changed.add(entity)
+        self.__schedule_publish()
+
+    def set_available(self, available: bool) -> None:  # noqa: FBT001
+        """Flag the sensors of the inverter as available or not, writing them all at once."""
+        if available == self.available:
+            return
+        self.available = available
+        self._changed.update(self.entities)
+        self._changed.update(self.aggregate_entities)
+        self.__schedule_publish()
+
+    def __schedule_publish(self) -> None:
+        if self._changed and not self._publish_scheduled:
+            # Frames received in the same loop iteration are published at once
+            self._publish_scheduled = True
+            self.hass.loop.call_soon(self._publish)
+
+    def _publish(self) -> None:
+        """Write the state of all the changed entities in a single loop iteration."""
+        self._publish_scheduled = False
+        changed, self._changed = self._changed, set()
+        for entity in changed:
+            entity.publish()
+
+    def refresh_aggregates(self) -> None:
+        """Compute the rolling aggregates and write the changed ones."""
+        self.aggregates.refresh()
+        for entity in self.aggregate_entities:
+            if entity.update_value():
+                entity.publish()
 
 
 @dataclass
 class LoggerSensorEntityDescription(SensorEntityDescription):
     """A class that describes Logger sensor entities."""
 
-    get_value: Callable[[InverterLoggerComponent], Any] = lambda _: True
+    # Attribute of the inverter sample holding the value, defaults to the key of the description
+    attribute: str | None = None
+    # Decoded frame fields the value is computed from, defaults to the attribute
+    data_keys: tuple[str, ...] | None = None
+    # Changes smaller than the deadband are not written to the state machine
+    deadband: float | None = None
+    # Minimum seconds between two state writes, changes in between are written with the next frame
+    min_interval: float | None = None
     state_class: SensorStateClass.MEASUREMENT
 
 
@@ -120,7 +437,7 @@ ENTITIES_DESCRIPTIONS = [
     LoggerSensorEntityDescription(
         name="Load active power",
         key="load_active_power",
-        get_value=lambda x: x.data["solar_active_power"] - x.data["export_active_power"],
+        data_keys=("solar_active_power", "export_active_power"),
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=UnitOfPower.WATT,
         icon="mdi:home-lightning-bolt",
@@ -128,7 +445,7 @@ ENTITIES_DESCRIPTIONS = [
     LoggerSensorEntityDescription(
         name="Grid net power",
         key="grid_net_power",
-        get_value=lambda x: x.data["export_active_power"],
+        attribute="export_active_power",
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=UnitOfPower.WATT,
         icon="mdi:transmission-tower",
@@ -136,7 +453,7 @@ ENTITIES_DESCRIPTIONS = [
     LoggerSensorEntityDescription(
         name="Grid export power",
         key="grid_export_power",
-        get_value=lambda x: max(0, x.data["export_active_power"]),
+        data_keys=("export_active_power",),
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=UnitOfPower.WATT,
         icon="mdi:transmission-tower-import",
@@ -144,7 +461,7 @@ ENTITIES_DESCRIPTIONS = [
     LoggerSensorEntityDescription(
         name="Grid import power",
         key="grid_import_power",
-        get_value=lambda x: max(0, -x.data["export_active_power"]),
+        data_keys=("export_active_power",),
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=UnitOfPower.WATT,
         icon="mdi:transmission-tower-export",
@@ -152,30 +469,29 @@ ENTITIES_DESCRIPTIONS = [
     LoggerSensorEntityDescription(
         name="Inverter temperature",
         key="inverter_temperature",
-        get_value=lambda x: x.data["inverter_temperature"],
         device_class=SensorDeviceClass.TEMPERATURE,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=0.5,
     ),
     LoggerSensorEntityDescription(
         name="DC voltage 1",
         key="dc_voltage_1",
-        get_value=lambda x: x.data["dc_voltage_1"],
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         icon="mdi:current-dc",
+        deadband=0.5,
     ),
     LoggerSensorEntityDescription(
         name="DC voltage 2",
         key="dc_voltage_2",
-        get_value=lambda x: x.data["dc_voltage_2"],
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         icon="mdi:current-dc",
+        deadband=0.5,
     ),
     LoggerSensorEntityDescription(
         name="DC current 1",
         key="dc_current_1",
-        get_value=lambda x: x.data["dc_current_1"],
         device_class=SensorDeviceClass.CURRENT,
         native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
         icon="mdi:current-dc",
@@ -183,7 +499,6 @@ ENTITIES_DESCRIPTIONS = [
     LoggerSensorEntityDescription(
         name="DC current 2",
         key="dc_current_2",
-        get_value=lambda x: x.data["dc_current_2"],
         device_class=SensorDeviceClass.CURRENT,
         native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
         icon="mdi:current-dc",
@@ -191,43 +506,41 @@ ENTITIES_DESCRIPTIONS = [
     LoggerSensorEntityDescription(
         name="DC power",
         key="dc_power",
-        get_value=lambda x: x.data["dc_power"],
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
     ),
     LoggerSensorEntityDescription(
         name="AC voltage",
         key="ac_voltage",
-        get_value=lambda x: x.data["ac_voltage"],
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        deadband=0.5,
     ),
     LoggerSensorEntityDescription(
         name="Solar AC current",
         key="solar_ac_current",
-        get_value=lambda x: x.data["solar_ac_current"],
         device_class=SensorDeviceClass.CURRENT,
         native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
     ),
     LoggerSensorEntityDescription(
         name="AC frequency",
         key="ac_frequency",
-        get_value=lambda x: x.data["ac_frequency"],
         device_class=SensorDeviceClass.FREQUENCY,
         native_unit_of_measurement=UnitOfFrequency.HERTZ,
+        deadband=0.02,
     ),
     LoggerSensorEntityDescription(
         name="Solar active power",
         key="solar_active_power",
-        get_value=lambda x: x.data["solar_active_power"],
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:solar-power",
     ),
     LoggerSensorEntityDescription(
         name="Solar active energy today",
         key="solar_active_energy_today",
-        get_value=lambda x: x.data["solar_active_energy_today"],
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL,
@@ -236,7 +549,6 @@ ENTITIES_DESCRIPTIONS = [
     LoggerSensorEntityDescription(
         name="Solar active energy yesterday",
         key="solar_active_energy_yesterday",
-        get_value=lambda x: x.data["solar_active_energy_yesterday"],
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL,
@@ -245,7 +557,6 @@ ENTITIES_DESCRIPTIONS = [
     LoggerSensorEntityDescription(
         name="Solar active energy total",
         key="solar_active_energy_total",
-        get_value=lambda x: x.data["solar_active_energy_total"],
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL,
@@ -254,7 +565,6 @@ ENTITIES_DESCRIPTIONS = [
     LoggerSensorEntityDescription(
         name="Solar active this month",
         key="solar_active_energy_this_month",
-        get_value=lambda x: x.data["solar_active_energy_this_month"],
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL,
@@ -263,6 +573,35 @@ ENTITIES_DESCRIPTIONS = [
 ]
 
 
+def _decoded_fields(descriptions: list[LoggerSensorEntityDescription]) -> set[str]:
+    """Return the frame fields needed by the given sensor descriptions."""
+    return {
+        key
+        for description in descriptions
+        for key in (description.data_keys or (description.attribute or description.key,))
+    }
+
+
+def _enabled_fields(registry: er.EntityRegistry | None, inverter_id: str | None) -> set[str]:
+    """
+    Return the frame fields read by the enabled sensors of an inverter.
+
+    Without `registry`, or for the sensors not registered yet, the sensors enabled by default are the enabled ones.
+    """
+
+    def enabled(description: SensorEntityDescription) -> bool:
+        entity_id = None
+        if registry is not None:
+            entity_id = registry.async_get_entity_id(SENSOR_DOMAIN, DOMAIN, f"{inverter_id}_{description.key}")
+        if entity_id is None:
+            return description.entity_registry_enabled_default
+        return not registry.async_get(entity_id).disabled
+
+    fields = _decoded_fields([description for description in ENTITIES_DESCRIPTIONS if enabled(description)])
+    fields.update(description.aggregate_key[0] for description in AGGREGATE_DESCRIPTIONS if enabled(description))
+    return fields
+
+
 class InverterLoggerBaseEntity(SensorEntity):
     """Representation of a Solis/Ginglong Local Logger inverter sensor."""
 
@@ -278,36 +617,299 @@ class InverterLoggerBaseEntity(SensorEntity):
         self.hass = self._inverter.hass
         self.entity_description = entity_description
         self._attr_unique_id = f"{self._inverter.inverter_id}_{self.entity_description.key}"
-        self.get_value = entity_description.get_value
+        self._attr_device_info = self._inverter.device_info
+        # Precomputed accessor of the sample attribute, so reading the value is a single C call
+        self.get_value = attrgetter(entity_description.attribute or entity_description.key)
         self.loaded = False
-        self.pending_update = False
+        self._last_write: float | None = None
+
+    @property
+    def available(self) -> bool:
+        """Return whether the inverter sent a frame within the availability timeout."""
+        return self._inverter.available
+
+    def mark_stale(self, stale: bool) -> None:  # noqa: FBT001
+        """Flag the value as restored from before a restart, until the inverter sends fresh data."""
+        self._attr_extra_state_attributes = {"stale": True} if stale else None
+
+    def update_value(self) -> bool:
+        """Update the value from the inverter data, returning whether it changed meaningfully and must be written."""
+        value = self.get_value(self._inverter.data)
+        if not self.__should_write(value):
+            return False
+        self._attr_native_value = value
+        self._last_write = time.monotonic()
+        return True
 
-    def notify_state_changed(self) -> None:
-        """Notify Home Assistant that the state has changed."""
+    def publish(self) -> None:
+        """Write the state to Home Assistant."""
+        # Until the entity is added, its latest value is written when it gets added
         if self.loaded:
-            self.async_schedule_update_ha_state()
-        else:
-            self.pending_update = True
+            self.async_write_ha_state()
+
+    def __should_write(self, value: Any) -> bool:
+        """Compare the value with the last written one, applying the deadband and minimum interval."""
+        if self._last_write is None:
+            return True
+        last_value = self._attr_native_value
+        if value == last_value:
+            return False
+        if value is None or last_value is None:
+            return True
+        description = self.entity_description
+        if description.deadband is not None and abs(value - last_value) < description.deadband:
+            return False
+        return description.min_interval is None or time.monotonic() - self._last_write >= description.min_interval
 
     async def async_added_to_hass(self) -> None:
         """Run when this Entity has been added to HA."""
         self.loaded = True
-        if self.pending_update:
-            self.notify_state_changed()
 
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return information to link this entity with the correct device."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._inverter.inverter_id)},
-            manufacturer="Solis/Ginglong",
-            model=self._inverter.inverter_id,
-            name="Solis/Ginglong Inverter",
+
+@dataclass
+class AggregateSensorEntityDescription(SensorEntityDescription):
+    """A class that describes the rolling aggregate sensors of an inverter."""
+
+    # Key of the rolling aggregate in `InverterAggregates.values`
+    aggregate_key: tuple[str, str] = ("", "")
+    value_fn: Callable[[Aggregate], Any] = lambda _: None
+    entity_registry_enabled_default: bool = False
+
+
+def _aggregate_descriptions() -> list[AggregateSensorEntityDescription]:
+    """Return the descriptions of the rolling aggregate sensors, for every window."""
+    descriptions = []
+    for window in AGGREGATE_WINDOWS:
+        power = {
+            "device_class": SensorDeviceClass.POWER,
+            "native_unit_of_measurement": UnitOfPower.WATT,
+            "state_class": SensorStateClass.MEASUREMENT,
+            "suggested_display_precision": 0,
+        }
+        for statistic, value_fn in (
+            ("mean", attrgetter("mean")),
+            ("min", attrgetter("minimum")),
+            ("max", attrgetter("maximum")),
+        ):
+            descriptions.append(
+                AggregateSensorEntityDescription(
+                    name=f"Solar active power {statistic} {window.name}",
+                    key=f"solar_active_power_{statistic}_{window.key}",
+                    aggregate_key=("solar_active_power", window.key),
+                    value_fn=value_fn,
+                    icon="mdi:solar-power",
+                    **power,
+                )
+            )
+        descriptions.extend(
+            (
+                AggregateSensorEntityDescription(
+                    name=f"DC power peak {window.name}",
+                    key=f"dc_power_peak_{window.key}",
+                    aggregate_key=("dc_power", window.key),
+                    value_fn=attrgetter("maximum"),
+                    **power,
+                ),
+                AggregateSensorEntityDescription(
+                    name=f"Solar active energy {window.name}",
+                    key=f"solar_active_energy_{window.key}",
+                    aggregate_key=("solar_active_energy_today", window.key),
+                    # Rounded, the increases of the scaled daily energy are not exact
+                    value_fn=lambda aggregate: round(aggregate.total, 3),
+                    device_class=SensorDeviceClass.ENERGY,
+                    native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+                    icon="mdi:solar-power",
+                ),
+            )
         )
+    return descriptions
+
+
+AGGREGATE_DESCRIPTIONS = _aggregate_descriptions()
+
+
+class AggregateSensorEntity(SensorEntity):
+    """Rolling aggregate of a value of an inverter, over a window."""
+
+    should_poll = False
+
+    def __init__(
+        self,
+        inverter: InverterLoggerComponent,
+        entity_description: AggregateSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor, reading the aggregates of the inverter."""
+        self._inverter = inverter
+        self.hass = inverter.hass
+        self.entity_description = entity_description
+        self._attr_unique_id = f"{inverter.inverter_id}_{entity_description.key}"
+        self._attr_device_info = inverter.device_info
+        self.loaded = False
 
     @property
-    def native_value(self) -> Any:
-        """Return the state of the sensor."""
-        if self._inverter.data is None:
-            return None
-        return self.get_value(self._inverter)
+    def available(self) -> bool:
+        """Return whether the inverter sent a frame within the availability timeout."""
+        return self._inverter.available
+
+    def update_value(self) -> bool:
+        """Update the value from the last refreshed aggregates, returning whether it changed."""
+        aggregate = self._inverter.aggregates.values[self.entity_description.aggregate_key]
+        value = None if aggregate is None else self.entity_description.value_fn(aggregate)
+        if value == self._attr_native_value:
+            return False
+        self._attr_native_value = value
+        return True
+
+    def publish(self) -> None:
+        """Write the state to Home Assistant."""
+        # Disabled sensors are never added
+        if self.loaded:
+            self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        """Run when this Entity has been added to HA."""
+        self.loaded = True
+        self.update_value()
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+@dataclass
+class MetricSensorEntityDescription(SensorEntityDescription):
+    """A class that describes the diagnostic sensors of the server metrics."""
+
+    value_fn: Callable[[Metrics], Any] = lambda _: None
+    entity_category: EntityCategory = EntityCategory.DIAGNOSTIC
+    entity_registry_enabled_default: bool = False
+
+
+METRIC_DESCRIPTIONS = [
+    MetricSensorEntityDescription(
+        name="Frames received",
+        key="frames_received",
+        value_fn=lambda m: m.frames_received,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:counter",
+    ),
+    MetricSensorEntityDescription(
+        name="Data frames received",
+        key="data_frames_received",
+        value_fn=lambda m: m.frames_of_type(DATA_REQUEST),
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:counter",
+    ),
+    MetricSensorEntityDescription(
+        name="Heartbeat frames received",
+        key="heartbeat_frames_received",
+        value_fn=lambda m: m.frames_of_type(HEARTBEAT_REQUEST),
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:counter",
+    ),
+    MetricSensorEntityDescription(
+        name="Bytes received",
+        key="bytes_received",
+        value_fn=lambda m: m.bytes_in,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    MetricSensorEntityDescription(
+        name="Bytes sent",
+        key="bytes_sent",
+        value_fn=lambda m: m.bytes_out,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    MetricSensorEntityDescription(
+        name="Mean decode time",
+        key="decode_time",
+        value_fn=lambda m: _milliseconds(m.decode_time.mean),
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    MetricSensorEntityDescription(
+        name="95th percentile response time",
+        key="response_time_p95",
+        value_fn=lambda m: _milliseconds(m.response_time.percentile(0.95)),
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    MetricSensorEntityDescription(
+        name="Mean forward round-trip time",
+        key="forward_round_trip",
+        value_fn=lambda m: _milliseconds(m.forward_round_trip.mean),
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    MetricSensorEntityDescription(
+        name="Forward fallbacks",
+        key="forward_fallbacks",
+        value_fn=lambda m: m.fallbacks,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:cloud-off-outline",
+    ),
+]
+
+SERVER_METRIC_DESCRIPTIONS = [
+    *METRIC_DESCRIPTIONS,
+    MetricSensorEntityDescription(
+        name="Invalid frames",
+        key="invalid_frames",
+        value_fn=lambda m: m.invalid_frames,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:alert-circle-outline",
+    ),
+    MetricSensorEntityDescription(
+        name="Active connections",
+        key="active_connections",
+        value_fn=lambda m: m.active_connections,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:lan-connect",
+    ),
+]
+
+
+class MetricSensorEntity(SensorEntity):
+    """Diagnostic sensor of the server metrics, or of the metrics of the datalogger of an inverter."""
+
+    should_poll = False
+
+    def __init__(
+        self,
+        get_metrics: Callable[[], Metrics | None],
+        unique_id_prefix: str,
+        device_info: DeviceInfo,
+        entity_description: MetricSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor, reading the metrics returned by `get_metrics`."""
+        self.entity_description = entity_description
+        self._get_metrics = get_metrics
+        self._attr_unique_id = f"{unique_id_prefix}_{entity_description.key}"
+        self._attr_device_info = device_info
+        self.loaded = False
+
+    def update_value(self) -> bool:
+        """Update the value from the metrics, returning whether it changed."""
+        metrics = self._get_metrics()
+        value = None if metrics is None else self.entity_description.value_fn(metrics)
+        if value == self._attr_native_value:
+            return False
+        self._attr_native_value = value
+        return True
+
+    def publish(self) -> None:
+        """Write the state to Home Assistant."""
+        # Disabled sensors are never added
+        if self.loaded:
+            self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        """Run when this Entity has been added to HA."""
+        self.loaded = True
+        self.update_value()
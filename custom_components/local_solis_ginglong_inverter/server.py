@@ -9,211 +9,535 @@ and https://github.com/planetmarshall/solis-service/pull/8.
 """
 
 import asyncio
-import datetime
+import contextlib
 import logging
-from functools import reduce
-from struct import pack, unpack_from
+import time
+from collections.abc import Callable, Coroutine, Iterable
+from pathlib import Path
 from typing import Any
 
-from .const_defaults import DEFAULT_FORWARD_HOST, DEFAULT_FORWARD_MODE
+from .capture import CaptureWriter
+from .const import TRANSPORT_BUFFERED
+from .const_defaults import (
+    DEFAULT_AVAILABILITY_TIMEOUT,
+    DEFAULT_EXPORT_FORMAT,
+    DEFAULT_FORWARD_HOST,
+    DEFAULT_FORWARD_LOCAL_ACK,
+    DEFAULT_FORWARD_MODE,
+    DEFAULT_FORWARD_OVERFLOW,
+    DEFAULT_FORWARD_QUEUE_SIZE,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_CONNECTIONS_PER_PEER,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_TRACE_SIZE,
+    DEFAULT_TRANSPORT,
+)
+from .decoder import DATA_FRAME_FIELDS, DecoderProfile, DecoderRegistry, FrameDecoder, InverterSample
+from .export import EXPORTERS
+from .forwarder import ForwardQueue, UpstreamPool, parse_forward_targets
+from .history import SAMPLE_DUPLICATE, SAMPLE_LATE, SampleHistory
+from .liveness import LivenessTracker
+from .metrics import Metrics, ServerMetrics
+from .protocol import (
+    ResponseTemplates,
+    _is_data_message,
+    _is_heartbeat,
+    _parse_header,
+    _scan_frame,
+)
+from .sample_stream import CollectorClient, parse_collector_address
+from .supervisor import ConnectionSupervisor, SupervisedConnection
+from .tracing import DIRECTION_RECEIVED, DIRECTION_SENT, MAX_PEERS, FrameTracer, HexFrame
 
 _LOGGER = logging.getLogger(__name__)
-# Protocol constants
-HEARTBEAT_REQUEST = 0x41
-DATA_REQUEST = 0x42
-START_BYTE = 0xA5
-END_BYTE = 0x15
-
-
-def _checksum_byte(buffer: bytes) -> int:
-    return reduce(lambda lrc, x: (lrc + x) & 255, buffer) & 255
-
-
-def _extract_data(buffer: bytes) -> dict[str, int | float | str]:
-    return {
-        # "clock": unpack_from("<B", buffer, 5)[0],  # Clock from heartbeat
-        "timestamp": unpack_from("<I", buffer, 22)[0],  # Unix timestamp
-        "inverter_serial_number": buffer[32:48].decode("ascii").rstrip(),
-        "inverter_temperature": 0.1 * unpack_from("<H", buffer, 48)[0],  # ºC
-        "dc_voltage_1": 0.1 * unpack_from("<H", buffer, 50)[0],  # V
-        "dc_voltage_2": 0.1 * unpack_from("<H", buffer, 52)[0],  # V
-        "dc_current_1": 0.1 * unpack_from("<H", buffer, 54)[0],  # A
-        "dc_current_2": 0.1 * unpack_from("<H", buffer, 56)[0],  # A
-        # "unknown_3": int(unpack_from("<I", buffer, 58)[0]),  # ???
-        "solar_ac_current": 0.1 * unpack_from("<H", buffer, 62)[0],  # A
-        # "unknown_4": int(unpack_from("<I", buffer, 64)[0]),  # ???
-        "ac_voltage": 0.1 * unpack_from("<H", buffer, 68)[0],  # V
-        "ac_frequency": 0.01 * unpack_from("<H", buffer, 70)[0],  # Hz
-        "solar_active_power": int(unpack_from("<I", buffer, 72)[0]),  # W
-        "solar_active_energy_today": 0.01 * unpack_from("<I", buffer, 76)[0],  # kWh
-        # "unknown_6": int(unpack_from("<L", buffer, 80)[0]),  # ??? Power generated this month (x 0.1)?
-        # 88 - 107 ???
-        # "unknown_7": int(unpack_from("<I", buffer, 108)[0]),  # ???
-        # "unknown_8": int(unpack_from("<I", buffer, 112)[0]),  # ??? # or maybe 2 fields of 16 bits?
-        "dc_power": int(unpack_from("<I", buffer, 116)[0]),  # W
-        "solar_active_energy_this_month": int(unpack_from("<L", buffer, 120)[0]),  # kWh
-        "solar_active_energy_yesterday": 0.1 * unpack_from("<H", buffer, 128)[0],  # kWh
-        "solar_active_energy_total": int(unpack_from("<L", buffer, 130)[0]),  # kWh
-        # "unknown_10": int(unpack_from("<H", buffer, 138)[0]),  # ???
-        # "unknown_11": int(unpack_from("<H", buffer, 140)[0]),  # ???
-        "solar_apparent_power": int(unpack_from("<I", buffer, 142)[0]),  # W
-        # 146 - 181 ???
-        "export_active_power": int(unpack_from("<i", buffer, 182)[0]),  # ??? equals 194 and it is signed
-        # "unknown_12": int(unpack_from("<L", buffer, 186)[0]),  # ???
-        # "export_active_power_b": int(unpack_from("<i", buffer, 194)[0]),  # ??? equals 182 and it is signed
-        # "unknown_13": int(unpack_from("<I", buffer, 198)[0]),  # ??? equals 210
-        # "unknown_14": int(unpack_from("<L", buffer, 202)[0]),  # ???
-        # "unknown_13b": int(unpack_from("<I", buffer, 198)[0]),  # ??? equals 198
-        "load_apparent_power": int(unpack_from("<I", buffer, 214)[0]),  # ??? equals 226
-        # "unknown_15": int(unpack_from("<L", buffer, 218)[0]),  # ???
-        # "load_apparent_power_b": int(unpack_from("<I", buffer, 226)[0]),  # ??? equals 214
-        # 230 - 237 ???
-        # "unknown_16": int(unpack_from("<I", buffer, 238)[0]),  # ???
-    }
-
-
-def _parse_header(msghdr: bytes) -> dict[str, int]:
-    [payload_length, msg_type, resp_idx, req_idx, serialno] = unpack_from("<xHxBBBI", msghdr, 0)
-    return {
-        "payload_length": payload_length,
-        "msg_type": msg_type,
-        "resp_idx": resp_idx,
-        "req_idx": req_idx,
-        "serialno": serialno,
-    }
-
-
-def _mock_server_response(header: dict[str, int], request_payload: bytes) -> bytes:
-    unix_time = int(datetime.datetime.now(tz=datetime.UTC).timestamp())
-
-    payload = pack("<BBIBBBB", request_payload[0], 0x01, unix_time, 0xAA, 0xAA, 0x00, 0x00)
-    # Don't know what 0xaa, 0xaa, 0x00, 0x00, but it is always there and seems to not matter the exact two first bytes
-
-    resp_type = header["msg_type"] - 0x30
-    # Don't know what the second byte means (0x10)
-    header = pack(
-        "<BHBBBBI", START_BYTE, len(payload), 0x10, resp_type, header["req_idx"], header["req_idx"], header["serialno"]
-    )
-    message = header + payload
-    message += pack("BB", _checksum_byte(message[1:]), END_BYTE)
-    return message
-
-
-def _is_heartbeat(data: bytes) -> bool:
-    """Check if the data is a heartbeat message."""
-    return data[4] == HEARTBEAT_REQUEST
-
-
-def _is_data_message(data: bytes) -> bool:
-    """Check if the data is a data message."""
-    return data[4] == DATA_REQUEST
+# Large enough for a few DATA messages, grown if a bigger message is received
+RECEIVE_BUFFER_SIZE = 4096
+
+_DATA_DECODER = FrameDecoder(DATA_FRAME_FIELDS)
+
+
+def _extract_data(buffer: bytes) -> InverterSample:
+    return _DATA_DECODER.decode(buffer)
+
+
+class _LoggerProtocol(asyncio.BufferedProtocol):
+    """
+    Zero-copy transport for a datalogger connection.
+
+    Data is received straight into a reusable per-connection buffer and frames are handled in place, passing
+    `memoryview` slices of the buffer instead of copying every frame into new `bytes` objects.
+    """
+
+    def __init__(
+        self,
+        handle_message: Callable[..., Coroutine[Any, Any, None] | None],
+        discard: Callable[[Any, bytes, bool], None],
+        supervisor: ConnectionSupervisor,
+    ) -> None:
+        self._handle_message = handle_message
+        self._discard = discard
+        self._supervisor = supervisor
+        self._resyncing = False
+        self._connection: SupervisedConnection | None = None
+        self._buffer = bytearray(RECEIVE_BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self._start = 0  # First byte not handled yet
+        self._end = 0  # End of the received data
+        self._pending: asyncio.Future | None = None
+        self._transport: asyncio.Transport | None = None
+        self._addr = None
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        """Store the transport of the new connection."""
+        self._transport = transport
+        self._addr = transport.get_extra_info("peername")
+        self._connection = self._supervisor.admit(self._addr, transport.close)
+        if self._connection is None:
+            transport.close()
+            self._transport = None
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        """Forget the transport of the closed connection."""
+        _LOGGER.debug(f"Connection lost with {self._addr}: {exc}")
+        self._transport = None
+        if self._connection is not None:
+            self._supervisor.release(self._connection)
+            self._connection = None
+
+    def get_buffer(self, sizehint: int) -> memoryview:  # noqa: ARG002
+        """Return the free tail of the receive buffer."""
+        if self._end == len(self._buffer):
+            # Reclaim the space of the handled frames, or grow the buffer if there is none
+            self._compact(len(self._buffer) if self._start > 0 else len(self._buffer) + 1)
+        return self._view[self._end :]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        """Handle the frames completed by the received data."""
+        self._end += nbytes
+        self._handle_frames()
+
+    def _compact(self, capacity: int) -> None:
+        """Move the unhandled data to the start of a buffer able to hold `capacity` bytes."""
+        length = self._end - self._start
+        if capacity > len(self._buffer):
+            buffer = bytearray(max(capacity, 2 * len(self._buffer)))
+            buffer[:length] = self._buffer[self._start : self._end]
+            self._buffer = buffer
+            self._view = memoryview(buffer)
+        elif self._start > 0:
+            self._view[:length] = self._view[self._start : self._end]
+        self._start = 0
+        self._end = length
+
+    def _handle_frames(self) -> None:
+        while self._pending is None and self._transport is not None:
+            position, length, complete = _scan_frame(self._buffer, self._start, self._end)
+            if position > self._start:
+                self._discard(self._addr, self._view[self._start : position], not self._resyncing)
+                self._resyncing = True
+                self._start = position
+            if not complete:
+                if self._end > self._start:
+                    self._connection.frame_started()
+                if self._start + length > len(self._buffer):
+                    # Make room for the rest of the frame
+                    self._compact(length)
+                break
+            self._resyncing = False
+            message = self._view[self._start : self._start + length]
+            self._start += length
+            self._connection.frame_received()
+            header = _parse_header(message)
+            pending = self._handle_message(self._addr, header, message, self._transport.write)
+            if pending is not None:
+                # Stop receiving until the message is handled, so the buffer under `message` is not overwritten
+                self._transport.pause_reading()
+                self._pending = asyncio.ensure_future(pending)
+                self._pending.add_done_callback(self._on_message_handled)
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def _on_message_handled(self, future: asyncio.Future) -> None:
+        self._pending = None
+        if not future.cancelled() and future.exception() is not None:
+            _LOGGER.exception(f"Error handling message from {self._addr}", exc_info=future.exception())
+        if self._transport is None:
+            return
+        self._transport.resume_reading()
+        self._handle_frames()
 
 
 class LoggerServer:
     """Fake server for Solis inverter communication."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         port: int,
         on_data: callable,
         *,
         forward: bool = DEFAULT_FORWARD_MODE,
-        forward_host: str = DEFAULT_FORWARD_HOST,
+        forward_host: str | Iterable[str] = DEFAULT_FORWARD_HOST,
+        forward_local_ack: bool = DEFAULT_FORWARD_LOCAL_ACK,
+        forward_queue_size: int = DEFAULT_FORWARD_QUEUE_SIZE,
+        forward_overflow: str = DEFAULT_FORWARD_OVERFLOW,
+        fields: Iterable[str] | None = None,
+        decoder_profiles: Iterable[DecoderProfile] = (),
+        transport: str = DEFAULT_TRANSPORT,
+        trace_size: int = DEFAULT_TRACE_SIZE,
+        capture_path: str | Path | None = None,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_connections_per_peer: int = DEFAULT_MAX_CONNECTIONS_PER_PEER,
+        on_history: Callable[[InverterSample], None] | None = None,
+        collector_host: str | None = None,
+        reuse_port: bool = False,
+        export_path: str | Path | None = None,
+        export_format: str = DEFAULT_EXPORT_FORMAT,
+        on_availability: Callable[[str, bool], None] | None = None,
+        availability_timeout: float = DEFAULT_AVAILABILITY_TIMEOUT,
     ) -> None:
-        """Initialize the server."""
+        """
+        Initialize the server.
+
+        `forward_host` lists the upstream targets the messages are forwarded to, as `host[:port]` entries (or a
+        comma-separated string of them); the first one is the real server whose response is preferred.
+        With `forward_local_ack`, forwarded messages are answered locally right away and sent to the real server in
+        the background through a queue of `forward_queue_size` messages per datalogger, dropping messages according
+        to `forward_overflow` when it is full.
+        If `fields` is given, only those fields (plus the ones the server needs) are decoded from DATA messages.
+        The DATA messages are decoded with the first of `decoder_profiles` matching their layout, or the default
+        profile (see `DecoderRegistry`).
+        `transport` selects between the `asyncio` streams (`TRANSPORT_STREAM`) and the zero-copy buffered protocol
+        (`TRANSPORT_BUFFERED`) to receive the messages.
+        The last `trace_size` frames exchanged with every datalogger are kept in `tracer`, 0 disables it.
+        If `capture_path` is given, all the frames are also appended to that binary capture file (see `capture`).
+        The connections are closed after `idle_timeout` seconds without a frame, or if a frame takes more than
+        `read_timeout` seconds to arrive, and limited to `max_connections` overall and `max_connections_per_peer` per
+        datalogger host, the least recently active connection of a host being evicted when it reconnects if it has been
+        silent for `read_timeout` seconds (see `supervisor`).
+        Invalid data is skipped up to the next valid frame without closing the connection, counting the
+        resynchronizations of every datalogger host in `resyncs`.
+        The samples replayed by a datalogger after a reconnection are not passed to `on_data`: the duplicates are
+        dropped, and the ones older than the latest sample of their inverter are passed to `on_history`, if given.
+        With `collector_host` (`host[:port]`), the server does not listen for the dataloggers: it receives the samples
+        decoded by a standalone collector (see `collector`) instead.
+        If `export_path` is given, the live and late samples are also exported to it, in the `export_format` format (see
+        `export`), and the samples not written yet are flushed when the server stops.
+        If `on_availability` is given, it is called with an inverter and False when no frame was received from it or its
+        datalogger for `availability_timeout` seconds, and with True when the next frame arrives (see `liveness`).
+        With `reuse_port`, the port is bound with `SO_REUSEPORT`, so several processes can listen on it (see `workers`).
+        """
         self.port = port
         self.on_data = on_data
+        self.on_history = on_history
+        self.collector_host = collector_host or None
+        self.reuse_port = reuse_port
         self.forward = forward
         self.forward_host = forward_host
+        self.forward_local_ack = forward_local_ack
+        self.transport = transport
+        self.tracer = FrameTracer(trace_size, CaptureWriter(capture_path) if capture_path is not None else None)
+        # Resynchronizations after invalid data, per datalogger host
+        self.resyncs: dict[str, int] = {}
+        self.supervisor = ConnectionSupervisor(max_connections, max_connections_per_peer, idle_timeout, read_timeout)
+        self.metrics = ServerMetrics(self.supervisor)
+        self._decoders = DecoderRegistry(decoder_profiles, fields)
+        self._upstream = UpstreamPool(parse_forward_targets(forward_host))
+        # Whether the last forwarded message fell back to the fake server, so only the changes are logged
+        self._falling_back = False
+        self._forward_queue = ForwardQueue(
+            self._upstream, forward_queue_size, forward_overflow, self.__on_queued_forward
+        )
+        self._responses = ResponseTemplates()
+        self._history = SampleHistory()
+        self._collector: CollectorClient | None = None
+        self.exporter = EXPORTERS[export_format](export_path) if export_path is not None else None
+        self.liveness = LivenessTracker(availability_timeout, on_availability) if on_availability is not None else None
+        # Inverter of every datalogger, to which its heartbeats count, the least recently linked ones forgotten first
+        self._datalogger_inverters: dict[int, str] = {}
         self.__server = None
 
-    async def __handle_forward(self, addr: Any, message: bytes) -> bytes | None:
+    async def __handle_forward(
+        self, addr: Any, header: dict[str, int], message: bytes, metrics: Metrics
+    ) -> bytes | None:
         """Forward the data to the real server."""
-        _LOGGER.debug(f"Forwarding request to real server for {addr}")
-        try:
-            server_reader, server_writer = await asyncio.open_connection(self.forward_host, 10000)
-            server_writer.write(message)
-            await server_writer.drain()
-            server_data = await server_reader.read(2048)
-            server_writer.close()
-        except (ConnectionRefusedError, TimeoutError, OSError) as e:
-            _LOGGER.exception("Connection error with real server", exc_info=e)
-            return None
-        if len(server_data) == 0:
+        _LOGGER.debug("Forwarding request to real server for %s", addr)
+        start = time.perf_counter()
+        server_data = await self._upstream.request(header["serialno"], message)
+        if server_data is None:
             return None
+        metrics.forward_round_trip.observe(time.perf_counter() - start)
         # Send the response back to the client
-        _LOGGER.debug(f"Got response from real server for {addr}")
+        _LOGGER.debug("Got response from real server for %s", addr)
         return server_data
 
-    async def __handle_fake(self, addr: Any, msg_header: dict[str, int], message: bytes) -> bytes:
+    def __handle_fake(self, addr: Any, msg_header: dict[str, int], message: bytes) -> bytes:
         """Handle the data with the fake server."""
-        _LOGGER.debug(f"Handling request with fake server for {addr}")
-        return _mock_server_response(msg_header, message)
+        _LOGGER.debug("Handling request with fake server for %s", addr)
+        return self._responses.response(msg_header, message)
+
+    def set_fields(self, fields: Iterable[str] | None) -> None:
+        """Decode only `fields` (plus the ones the server needs) from the next DATA messages, or all of them if None."""
+        self._decoders.set_wanted(fields)
+
+    def restore_sample(self, sample: InverterSample) -> None:
+        """
+        Record the last sample of an inverter received before a restart, so that its replays are not live.
+
+        The inverter is reported offline if no frame is received from it within the availability timeout.
+        """
+        inverter_id = sample.inverter_serial_number.lower()
+        self._history.classify(inverter_id, sample.timestamp)
+        if self.liveness is not None:
+            self.liveness.touch(inverter_id)
 
-    async def __handle_persistence(self, addr: Any, message: bytes) -> None:
+    def __on_queued_forward(self, serialno: int, elapsed: float) -> None:
+        self.metrics.datalogger(serialno).forward_round_trip.observe(elapsed)
+
+    def __handle_persistence(self, addr: Any, header: dict[str, int], message: bytes, metrics: Metrics) -> None:
         # It is better to handle all the communications before calling on_data
         if _is_heartbeat(message):
             # Handle heartbeat message
-            _LOGGER.debug(f"Received HEARTBEAT message from {addr}")
-            # No data to extract, just log the heartbeat
+            _LOGGER.debug("Received HEARTBEAT message from %s", addr)
+            # No data to extract, the inverter of the datalogger is still online
+            if self.liveness is not None and (inverter_id := self._datalogger_inverters.get(header["serialno"])):
+                self.liveness.touch(inverter_id)
             return
         if _is_data_message(message):
             # Read and extract data from the message
-            data_extracted = _extract_data(message)
-            _LOGGER.debug(f"Received DATA message from {addr}: {data_extracted}")
-            if data_extracted["timestamp"] == 0:
-                _LOGGER.debug("Timestamp is 0, this is likely an old message, ignoring it")
+            start = time.perf_counter()
+            decoder = self._decoders.decoder_for(header["serialno"], message)
+            if decoder is None:
+                _LOGGER.warning(f"Unknown DATA message layout from {addr}, ignoring it")
                 return
-            self.on_data(data_extracted)
+            data_extracted = decoder.decode(message)
+            metrics.decode_time.observe(time.perf_counter() - start)
+            _LOGGER.debug("Received DATA message from %s: %s", addr, data_extracted)
+            if self.liveness is not None:
+                self.__link_datalogger(header["serialno"], data_extracted.inverter_serial_number.lower())
+            self.__handle_sample(addr, data_extracted, metrics)
+            return
+        _LOGGER.debug("Received UNKNOWN message from %s", addr)
+
+    def __link_datalogger(self, serialno: int, inverter_id: str) -> None:
+        if self._datalogger_inverters.get(serialno) != inverter_id:
+            self._datalogger_inverters[serialno] = inverter_id
+            if len(self._datalogger_inverters) > MAX_PEERS:
+                del self._datalogger_inverters[next(iter(self._datalogger_inverters))]
+
+    def __handle_sample(self, addr: Any, data_extracted: InverterSample, metrics: Metrics) -> None:
+        # Inverters are identified by their lowercase serial number
+        inverter_id = data_extracted.inverter_serial_number.lower()
+        if self.liveness is not None:
+            # Even an old or replayed frame shows that the datalogger is online
+            self.liveness.touch(inverter_id)
+        if data_extracted.timestamp == 0:
+            _LOGGER.debug("Timestamp is 0, this is likely an old message, ignoring it")
             return
-        _LOGGER.debug(f"Received UNKNOWN message from {addr}")
+        kind = self._history.classify(inverter_id, data_extracted.timestamp)
+        if kind is SAMPLE_DUPLICATE:
+            _LOGGER.debug("Duplicate DATA message from %s, ignoring it", addr)
+            metrics.duplicate_frames += 1
+            return
+        if self.exporter is not None:
+            self.exporter.record(data_extracted)
+        if kind is SAMPLE_LATE:
+            _LOGGER.debug("Late DATA message from %s, handling it as history", addr)
+            metrics.late_frames += 1
+            if self.on_history is not None:
+                self.on_history(data_extracted)
+            return
+        self.metrics.link_inverter(inverter_id, metrics)
+        self.on_data(data_extracted)
+
+    def __handle_collected(self, sample: InverterSample) -> Coroutine[Any, Any, None] | None:
+        # The collector does not tell which datalogger sent the sample, they are all counted as datalogger 0. The
+        # collector is not read while the export is full, it drops the samples of a client that does not keep up
+        self.__handle_sample(self.collector_host, sample, self.metrics.datalogger(0))
+        return self.__export_backpressure()
+
+    def __handle_message(
+        self, addr: Any, header: dict[str, int], message: bytes, write: Callable[[bytes], None]
+    ) -> Coroutine[Any, Any, None] | None:
+        """
+        Answer a valid message and handle its data.
+
+        Returns a coroutine that must be awaited if the answer depends on the real server or the export must catch up
+        first, or None if the message has already been fully handled.
+        """
+        received = time.perf_counter()
+        metrics = self.metrics.datalogger(header["serialno"])
+        metrics.frame_received(header["msg_type"], len(message))
+        self.tracer.record(addr, DIRECTION_RECEIVED, message)
+        # Formatted lazily, only if debug logging is enabled
+        _LOGGER.debug("Received message from %s: %s", addr, HexFrame(message))
+        if self.forward and not self.forward_local_ack:
+            return self.__handle_forwarded_message(addr, header, message, write, metrics, received)
+        # Handle the data with the fake server
+        self.__send(addr, self.__handle_fake(addr, header, message), write, metrics, received)
+        if self.forward and not self._forward_queue.put(header["serialno"], message):
+            _LOGGER.debug("Forward queue is full for %s, a message was dropped", addr)
+        self.__handle_persistence(addr, header, message, metrics)
+        return self.__export_backpressure()
+
+    def __export_backpressure(self) -> Coroutine[Any, Any, None] | None:
+        """Return the coroutine waiting for the export to catch up, if it is full, so the datalogger is not read."""
+        if self.exporter is not None and self.exporter.full:
+            return self.exporter.wait_writable()
+        return None
+
+    def __send(
+        self, addr: Any, response: bytes, write: Callable[[bytes], None], metrics: Metrics, received: float
+    ) -> None:
+        write(response)
+        metrics.response_sent(len(response), time.perf_counter() - received)
+        self.tracer.record(addr, DIRECTION_SENT, response)
+        _LOGGER.debug("Sent response to %s: %s", addr, HexFrame(response))
+
+    async def __handle_forwarded_message(  # noqa: PLR0913
+        self,
+        addr: Any,
+        header: dict[str, int],
+        message: bytes,
+        write: Callable[[bytes], None],
+        metrics: Metrics,
+        received: float,
+    ) -> None:
+        # Forward the data to the real server
+        response = await self.__handle_forward(addr, header, message, metrics)
+        if response is None:
+            if not self._falling_back:
+                self._falling_back = True
+                _LOGGER.warning("Failed to forward data to the real server, falling back to the fake server")
+            _LOGGER.debug("Falling back to the fake server for %s", addr)
+            metrics.fallbacks += 1
+            response = self.__handle_fake(addr, header, message)
+        elif self._falling_back:
+            self._falling_back = False
+            _LOGGER.info("Forwarding data to the real server again")
+        # Send the response back to the client
+        self.__send(addr, response, write, metrics, received)
+        # Handle persistence of the data
+        self.__handle_persistence(addr, header, message, metrics)
+        if (backpressure := self.__export_backpressure()) is not None:
+            await backpressure
+
+    def __discard(self, addr: Any, data: bytes, resync: bool) -> None:  # noqa: FBT001
+        """Drop bytes received from a datalogger that are not part of a valid frame."""
+        self.tracer.record(addr, DIRECTION_RECEIVED, data)
+        self.metrics.invalid_data(len(data), resync=resync)
+        if not resync:
+            # Still looking for the next frame
+            return
+        peer = addr[0] if isinstance(addr, tuple) else str(addr)
+        # Bounded like the tracer, forgetting the least recently resynchronized peers first
+        self.resyncs[peer] = self.resyncs.pop(peer, 0) + 1
+        if len(self.resyncs) > MAX_PEERS:
+            del self.resyncs[next(iter(self.resyncs))]
+        _LOGGER.warning(f"Invalid data from {addr}, skipping to the next frame")
 
     async def __handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
-        while True:
-            msghdr = await reader.readexactly(11)
-            header = _parse_header(msghdr)
-            payload_plus_footer = await reader.readexactly(header["payload_length"] + 2)
-            message = msghdr + payload_plus_footer
-            addr = writer.get_extra_info("peername")
-            _LOGGER.debug(f"Received message from {addr}: {' '.join(format(x, '02x') for x in message)}")
-            if message[0] != START_BYTE or message[-1] != END_BYTE or message[-2] != _checksum_byte(message[1:-2]):
-                _LOGGER.warning(f"Invalid message from {addr}, ignoring it")
-                break
-            if self.forward:
-                # Forward the data to the real server
-                response = await self.__handle_forward(addr, message)
-                if response is None:
-                    _LOGGER.warning(f"Failed to forward data to real server for {addr}, falling back to fake server")
-                    response = await self.__handle_fake(addr, header, message)
-            else:
-                # Handle the data with the fake server
-                response = await self.__handle_fake(addr, header, message)
-            # Send the response back to the client
-            writer.write(response)
-            _LOGGER.debug(f"Sent response to {addr}: {' '.join(format(x, '02x') for x in response)}")
-            # Handle persistence of the data
-            await self.__handle_persistence(addr, message)
-        # Close the connection
-        writer.close()
+        addr = writer.get_extra_info("peername")
+        connection = self.supervisor.admit(addr, writer.close)
+        received = bytearray()
+        resyncing = False
+        try:
+            while connection is not None:
+                position, length, complete = _scan_frame(received, 0, len(received))
+                if position > 0:
+                    self.__discard(addr, bytes(received[:position]), not resyncing)
+                    resyncing = True
+                    del received[:position]
+                if not complete:
+                    if received:
+                        connection.frame_started()
+                    # Read at most what the frame needs, which is a header then the rest of the frame when in sync.
+                    # What is available is scanned again, in case the frame was a stray start byte
+                    chunk = await reader.read(length - len(received))
+                    if not chunk:
+                        _LOGGER.debug(f"Connection closed with {addr}")
+                        break
+                    received += chunk
+                    continue
+                resyncing = False
+                connection.frame_received()
+                message = bytes(received[:length])
+                del received[:length]
+                pending = self.__handle_message(addr, _parse_header(message), message, writer.write)
+                if pending is not None:
+                    await pending
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            # Closed by the datalogger, or by the supervisor
+            _LOGGER.debug(f"Connection closed with {addr}: {e!r}")
+        finally:
+            if connection is not None:
+                self.supervisor.release(connection)
+            writer.close()
+            with contextlib.suppress(OSError):
+                await writer.wait_closed()
 
     async def start_server(self) -> None:
-        """Start the server and listen for incoming connections."""
-        if self.__server is not None:
+        """Start the server and listen for incoming connections, or connect to the collector."""
+        if self.__server is not None or self._collector is not None:
+            return
+        if self.collector_host is not None:
+            host, port = parse_collector_address(self.collector_host)
+            profiles = {profile.name: profile for profile in self._decoders.profiles}
+            self._collector = CollectorClient(host, port, self.__handle_collected, profiles)
+            self._collector.start()
             return
         # Create a server that listens on the specified port
-        self.__server = await asyncio.start_server(self.__handle_connection, "0.0.0.0", self.port)  # noqa: S104
-        _LOGGER.debug(f"Server listening on port {self.port}")
+        if self.transport == TRANSPORT_BUFFERED:
+            loop = asyncio.get_running_loop()
+            self.__server = await loop.create_server(
+                lambda: _LoggerProtocol(self.__handle_message, self.__discard, self.supervisor),
+                "0.0.0.0",  # noqa: S104
+                self.port,
+                reuse_port=self.reuse_port or None,
+            )
+        else:
+            self.__server = await asyncio.start_server(
+                self.__handle_connection,
+                "0.0.0.0",  # noqa: S104
+                self.port,
+                reuse_port=self.reuse_port or None,
+            )
+        _LOGGER.debug(f"Server listening on port {self.port} using the {self.transport} transport")
+
+    @property
+    def sockets(self) -> tuple:
+        """Return the listening sockets of the server."""
+        if self.__server is None:
+            return ()
+        return tuple(self.__server.sockets)
 
     async def stop_server(self) -> None:
         """Stop the server and close all connections."""
+        if self.liveness is not None:
+            self.liveness.close()
+        if self._collector is not None:
+            await self._collector.close()
+            self._collector = None
+            if self.exporter is not None:
+                await self.exporter.close()
+            return
         if self.__server is None:
             return
         # Wait for all connections to close
         self.__server.close()
+        self.supervisor.close_all()
         try:
             await self.__server.wait_closed()
         except asyncio.CancelledError:
             _LOGGER.warning("Server shutdown cancelled")
         finally:
             self.__server = None
+            await self._forward_queue.close()
+            await self._upstream.close()
+            if self.tracer.capture is not None:
+                await self.tracer.capture.close()
+            if self.exporter is not None:
+                await self.exporter.close()
             _LOGGER.debug("Server stopped")
@@ -0,0 +1,83 @@
+"""
+Persistence of the known inverters across restarts.
+
+The serial number and last sample of every inverter are saved in a Home Assistant `Store`, so their entities can be
+created with their last state as soon as the integration starts, instead of when the first DATA frame arrives.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .decoder import SAMPLE_FIELDS, InverterSample
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .decoder import DecoderProfile
+
+STORAGE_VERSION = 1
+# Seconds between two writes of the store, whatever the frame rate
+SAVE_DELAY = 60
+
+
+def storage_key(entry_id: str) -> str:
+    """Return the key of the store of a config entry."""
+    return f"{DOMAIN}.{entry_id}"
+
+
+class InverterStore:
+    """Last sample of every known inverter, saved at most every `SAVE_DELAY` seconds."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store of a config entry."""
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, storage_key(entry_id))
+        self._samples: dict[str, InverterSample] = {}
+        self._save_scheduled = False
+
+    async def async_load(self, profiles: dict[str, DecoderProfile]) -> list[InverterSample]:
+        """Load the last sample of every inverter, decoded with the profile of the given name if still known."""
+        data = await self._store.async_load()
+        if data is None:
+            return []
+        samples = []
+        for inverter in data.get("inverters", {}).values():
+            values = {name: value for name, value in inverter["sample"].items() if name in SAMPLE_FIELDS}
+            sample = InverterSample(profiles.get(inverter.get("profile")), **values)
+            self._samples[sample.inverter_serial_number.lower()] = sample
+            samples.append(sample)
+        return samples
+
+    def update(self, inverter_id: str, sample: InverterSample) -> None:
+        """Record the last sample of an inverter, saved with the next write."""
+        self._samples[inverter_id] = sample
+        if not self._save_scheduled:
+            # Not pushed back by every frame, unlike calling async_delay_save each time
+            self._save_scheduled = True
+            self._store.async_delay_save(self.__data, SAVE_DELAY)
+
+    def __data(self) -> dict[str, Any]:
+        """Return the data to write, serialized only when the store is written."""
+        self._save_scheduled = False
+        return {
+            "inverters": {
+                inverter_id: {
+                    "profile": None if sample.profile is None else sample.profile.name,
+                    "sample": sample.as_dict(derived=False),
+                }
+                for inverter_id, sample in self._samples.items()
+            }
+        }
+
+    async def async_save(self) -> None:
+        """Write the store right away."""
+        self._save_scheduled = False
+        await self._store.async_save(self.__data())
+
+
+async def async_remove_store(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the store of a removed config entry."""
+    await Store(hass, STORAGE_VERSION, storage_key(entry_id)).async_remove()
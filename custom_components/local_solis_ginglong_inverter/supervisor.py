@@ -0,0 +1,136 @@
+"""
+Supervision of the datalogger connections.
+
+Dataloggers on flaky Wi-Fi often vanish without closing their connection, leaving half-open sockets behind. The
+supervisor keeps track of every open connection, closes the ones that stay silent or stall in the middle of a frame,
+and bounds the number of connections overall and per peer, so file descriptors and memory stay bounded.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from operator import attrgetter
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SupervisedConnection:
+    """Open connection of a datalogger."""
+
+    __slots__ = ("addr", "close", "last_activity", "partial_since", "peer")
+
+    def __init__(self, addr: Any, close: Callable[[], None]) -> None:
+        """Initialize the connection, closed by calling `close`."""
+        self.addr = addr
+        # Dataloggers reconnect from a different port every time, so peers are identified by their host
+        self.peer = addr[0] if isinstance(addr, tuple) else str(addr)
+        self.close = close
+        self.last_activity = time.monotonic()
+        self.partial_since: float | None = None
+
+    def frame_started(self) -> None:
+        """Record that part of a frame was received."""
+        if self.partial_since is None:
+            self.partial_since = time.monotonic()
+
+    def frame_received(self) -> None:
+        """Record that a whole frame was received."""
+        self.last_activity = time.monotonic()
+        self.partial_since = None
+
+
+class ConnectionSupervisor:
+    """
+    Limits and timeouts of the datalogger connections.
+
+    A connection is closed once it received nothing for `idle_timeout` seconds, or if the rest of a started frame
+    does not arrive within `read_timeout` seconds. When a peer opens more than `max_connections_per_peer`
+    connections, its least recently active one is evicted if it received nothing for `read_timeout` seconds: the
+    datalogger reconnected and the old connection is most likely half-open. Otherwise the new connection is refused,
+    as several dataloggers behind the same NAT share the peer and all their connections are active. New connections
+    are refused beyond `max_connections`.
+    """
+
+    def __init__(
+        self, max_connections: int, max_connections_per_peer: int, idle_timeout: float, read_timeout: float
+    ) -> None:
+        """Initialize the supervisor, without connections."""
+        self.max_connections = max_connections
+        self.max_connections_per_peer = max_connections_per_peer
+        self.idle_timeout = idle_timeout
+        self.read_timeout = read_timeout
+        self.count = 0
+        self.rejected = 0
+        self.evicted = 0
+        self.timed_out = 0
+        self._peers: dict[str, list[SupervisedConnection]] = {}
+        self._sweep_handle: asyncio.TimerHandle | None = None
+
+    def admit(self, addr: Any, close: Callable[[], None]) -> SupervisedConnection | None:
+        """Register a new connection, returning None if it must be refused."""
+        connection = SupervisedConnection(addr, close)
+        connections = self._peers.get(connection.peer, ())
+        if len(connections) >= self.max_connections_per_peer:
+            stale = min(connections, key=attrgetter("last_activity"))
+            if connection.last_activity - stale.last_activity <= self.read_timeout:
+                _LOGGER.warning(
+                    f"Too many active connections from {connection.peer}, refusing the connection from {addr}"
+                )
+                self.rejected += 1
+                return None
+            _LOGGER.debug(f"{connection.peer} reconnected, closing its stale connection from {stale.addr}")
+            self.evicted += 1
+            self.__drop(stale)
+        if self.count >= self.max_connections:
+            _LOGGER.warning(f"Too many connections, refusing the connection from {addr}")
+            self.rejected += 1
+            return None
+        self._peers.setdefault(connection.peer, []).append(connection)
+        self.count += 1
+        if self._sweep_handle is None:
+            self.__schedule_sweep()
+        return connection
+
+    def release(self, connection: SupervisedConnection) -> None:
+        """Unregister a closed connection, it may have been dropped already."""
+        connections = self._peers.get(connection.peer)
+        if connections is None or connection not in connections:
+            return
+        connections.remove(connection)
+        if not connections:
+            del self._peers[connection.peer]
+        self.count -= 1
+
+    def close_all(self) -> None:
+        """Close all the connections."""
+        if self._sweep_handle is not None:
+            self._sweep_handle.cancel()
+            self._sweep_handle = None
+        for connection in [connection for connections in self._peers.values() for connection in connections]:
+            self.__drop(connection)
+
+    def __drop(self, connection: SupervisedConnection) -> None:
+        self.release(connection)
+        connection.close()
+
+    def __schedule_sweep(self) -> None:
+        interval = min(self.idle_timeout, self.read_timeout) / 2
+        self._sweep_handle = asyncio.get_running_loop().call_later(interval, self.__sweep)
+
+    def __sweep(self) -> None:
+        """Close the connections that timed out."""
+        self._sweep_handle = None
+        now = time.monotonic()
+        for connection in [connection for connections in self._peers.values() for connection in connections]:
+            if connection.partial_since is not None and now - connection.partial_since > self.read_timeout:
+                _LOGGER.debug(f"Timed out waiting for the rest of a frame from {connection.addr}")
+            elif now - connection.last_activity > self.idle_timeout:
+                _LOGGER.debug(f"Closing the idle connection from {connection.addr}")
+            else:
+                continue
+            self.timed_out += 1
+            self.__drop(connection)
+        if self._peers:
+            self.__schedule_sweep()
@@ -0,0 +1,109 @@
+"""
+Wire-level tracing of the datalogger messages.
+
+The last frames exchanged with every peer are kept in a fixed-size ring buffer, so they can be dumped as a capture
+file or in the diagnostics when something goes wrong, without having to enable debug logging beforehand.
+"""
+
+from __future__ import annotations
+
+import datetime
+import time
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .capture import CaptureWriter
+
+DIRECTION_RECEIVED = "rx"
+DIRECTION_SENT = "tx"
+
+# Peers whose frames are kept, the least recently seen ones are forgotten first
+MAX_PEERS = 256
+
+
+class HexFrame:
+    """Lazy hexadecimal representation of a frame, only formatted if the log record is emitted."""
+
+    __slots__ = ("frame",)
+
+    def __init__(self, frame: bytes) -> None:
+        """Wrap the frame."""
+        self.frame = frame
+
+    def __str__(self) -> str:
+        """Return the bytes of the frame in hexadecimal."""
+        return bytes(self.frame).hex(" ")
+
+
+class TracedFrame(NamedTuple):
+    """Frame exchanged with a peer."""
+
+    timestamp: float
+    direction: str
+    data: bytes
+
+
+class FrameTracer:
+    """Ring buffers of the last `size` frames exchanged with every peer, optionally also appended to a capture."""
+
+    def __init__(self, size: int, capture: CaptureWriter | None = None) -> None:
+        """Initialize the tracer, disabled if `size` is 0."""
+        self.size = size
+        self.capture = capture
+        self._peers: OrderedDict[str, deque[TracedFrame]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether frames are recorded."""
+        return self.size > 0
+
+    def record(self, addr: Any, direction: str, frame: bytes) -> None:
+        """Record a frame received from or sent to a peer."""
+        if self.capture is not None:
+            self.capture.record(addr, direction, frame)
+        if self.size <= 0:
+            return
+        # Dataloggers reconnect from a different port every time, so peers are identified by their host
+        peer = addr[0] if isinstance(addr, tuple) else str(addr)
+        frames = self._peers.get(peer)
+        if frames is None:
+            frames = self._peers[peer] = deque(maxlen=self.size)
+            if len(self._peers) > MAX_PEERS:
+                self._peers.popitem(last=False)
+        else:
+            self._peers.move_to_end(peer)
+        # The frame may be a view on a reusable receive buffer
+        frames.append(TracedFrame(time.time(), direction, bytes(frame)))
+
+    def as_dict(self) -> dict[str, list[dict[str, str]]]:
+        """Return the recorded frames of every peer, in a JSON serializable form."""
+        return {
+            peer: [
+                {
+                    "time": datetime.datetime.fromtimestamp(frame.timestamp, tz=datetime.UTC).isoformat(),
+                    "direction": frame.direction,
+                    "data": frame.data.hex(" "),
+                }
+                for frame in frames
+            ]
+            for peer, frames in self._peers.items()
+        }
+
+    def snapshot(self) -> list[tuple[str, list[TracedFrame]]]:
+        """Return a copy of the recorded frames of every peer."""
+        return [(peer, list(frames)) for peer, frames in self._peers.items()]
+
+
+def write_capture(path: Path, snapshot: list[tuple[str, list[TracedFrame]]]) -> int:
+    """Write a snapshot of the recorded frames to a capture file, one frame per line, and return the frame count."""
+    count = 0
+    with path.open("w", encoding="ascii") as file:
+        for peer, frames in snapshot:
+            for frame in frames:
+                moment = datetime.datetime.fromtimestamp(frame.timestamp, tz=datetime.UTC).isoformat()
+                file.write(f"{moment} {peer} {frame.direction} {frame.data.hex()}\n")
+                count += 1
+    return count
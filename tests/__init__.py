@@ -0,0 +1,5 @@
+"""
+Tests of the modules of the integration that do not depend on Home Assistant.
+
+Run them from the root of the repository with `python -m pytest`.
+"""
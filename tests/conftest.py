@@ -0,0 +1,60 @@
+"""
+Shared setup and helpers of the tests.
+
+The frame builders are also used by the benchmarks.
+"""
+
+import socket
+from struct import pack, pack_into
+
+# Registers the package of the integration without running its __init__, the tests run without Home Assistant
+import collector  # noqa: F401
+from custom_components.local_solis_ginglong_inverter.protocol import (
+    DATA_REQUEST,
+    END_BYTE,
+    HEARTBEAT_REQUEST,
+    START_BYTE,
+    _checksum_byte,
+)
+
+DATA_PAYLOAD_LENGTH = 232
+HEARTBEAT_PAYLOAD_LENGTH = 60
+
+
+def build_frame(msg_type: int, payload: bytes, *, serialno: int = 0x12345678, req_idx: int = 0) -> bytes:
+    """Build a checksummed frame as sent by the datalogger."""
+    message = pack("<BHBBBBI", START_BYTE, len(payload), 0x10, msg_type, 0x00, req_idx, serialno) + payload
+    return message + pack("BB", _checksum_byte(message[1:]), END_BYTE)
+
+
+def build_data_frame(
+    inverter_serial: str = "1234567890ABCDEF", *, timestamp: int = 1_750_000_000, serialno: int = 0x12345678
+) -> bytes:
+    """Build a DATA frame with plausible values at the offsets known by the decoder."""
+    message = bytearray(build_frame(DATA_REQUEST, bytes(DATA_PAYLOAD_LENGTH), serialno=serialno))
+    pack_into("<I", message, 22, timestamp)
+    pack_into("16s", message, 32, inverter_serial.ljust(16).encode("ascii"))
+    pack_into("<HHHHH", message, 48, 412, 3125, 3080, 41, 39)
+    pack_into("<H", message, 62, 102)
+    pack_into("<HHII", message, 68, 2341, 5001, 2410, 1234)
+    pack_into("<I", message, 116, 2502)
+    pack_into("<I", message, 120, 187)
+    pack_into("<HI", message, 128, 143, 10234)
+    pack_into("<I", message, 142, 2420)
+    pack_into("<i", message, 182, -512)
+    pack_into("<I", message, 214, 2900)
+    # Fix the checksum after patching the payload
+    message[-2] = _checksum_byte(message[1:-2])
+    return bytes(message)
+
+
+def build_heartbeat_frame(*, serialno: int = 0x12345678) -> bytes:
+    """Build a HEARTBEAT frame."""
+    return build_frame(HEARTBEAT_REQUEST, bytes(HEARTBEAT_PAYLOAD_LENGTH), serialno=serialno)
+
+
+def free_port() -> int:
+    """Return a local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
@@ -0,0 +1,68 @@
+"""Tests of the rolling aggregates of the inverter samples."""
+
+import pytest
+
+from custom_components.local_solis_ginglong_inverter.aggregates import InverterAggregates, RollingWindow
+from custom_components.local_solis_ginglong_inverter.decoder import InverterSample
+
+
+def test_window_aggregate() -> None:
+    window = RollingWindow(60, 12)
+    for now, value in ((0, 10.0), (1, 30.0), (20, 20.0)):
+        window.add(now, value)
+    aggregate = window.aggregate(30)
+    assert aggregate.count == 3
+    assert aggregate.total == 60.0
+    assert aggregate.mean == 20.0
+    assert aggregate.minimum == 10.0
+    assert aggregate.maximum == 30.0
+
+
+def test_window_empty() -> None:
+    assert RollingWindow(60, 12).aggregate(0) is None
+
+
+def test_window_slides() -> None:
+    window = RollingWindow(60, 12)
+    window.add(0, 10.0)
+    window.add(50, 20.0)
+    assert window.aggregate(55).count == 2
+    # The first slot left the window
+    assert window.aggregate(65).count == 1
+    assert window.aggregate(200) is None
+
+
+def test_window_slot_reused() -> None:
+    window = RollingWindow(60, 12)
+    window.add(0, 10.0)
+    window.add(60, 20.0)
+    aggregate = window.aggregate(60)
+    assert aggregate.count == 1
+    assert aggregate.maximum == 20.0
+
+
+def test_inverter_power() -> None:
+    aggregates = InverterAggregates()
+    for now, power in ((0, 100), (10, 300), (20, None)):
+        aggregates.add(InverterSample(solar_active_power=power), now)
+    aggregates.refresh(30)
+    aggregate = aggregates.values[("solar_active_power", "1min")]
+    assert aggregate.mean == 200.0
+    assert aggregate.maximum == 300.0
+    assert aggregates.values[("dc_power", "1min")] is None
+
+
+def test_inverter_energy_increase() -> None:
+    aggregates = InverterAggregates()
+    for now, energy in ((0, 10.0), (10, 10.01), (20, 10.05), (30, 10.12)):
+        aggregates.add(InverterSample(solar_active_energy_today=energy), now)
+    aggregates.refresh(40)
+    assert aggregates.values[("solar_active_energy_today", "1min")].total == pytest.approx(0.12)
+
+
+def test_inverter_energy_reset_at_midnight() -> None:
+    aggregates = InverterAggregates()
+    for now, energy in ((0, 20.5), (10, 20.6), (20, 0.0), (30, 0.03)):
+        aggregates.add(InverterSample(solar_active_energy_today=energy), now)
+    aggregates.refresh(40)
+    assert aggregates.values[("solar_active_energy_today", "1min")].total == pytest.approx(0.13)
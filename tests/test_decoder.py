@@ -0,0 +1,114 @@
+"""Tests of the detection of the decoder profile of the dataloggers."""
+
+from dataclasses import replace
+
+import pytest
+
+from custom_components.local_solis_ginglong_inverter.decoder import (
+    DATA_FRAME_FIELDS,
+    DEFAULT_PROFILE,
+    DecoderProfile,
+    DecoderRegistry,
+    FrameField,
+)
+from tests.conftest import build_data_frame
+
+SIGNED_PROFILE = DecoderProfile("signed", DATA_FRAME_FIELDS, payload_length=232, signature=((26, b"\x00\x00"),))
+OTHER_LENGTH_PROFILE = DecoderProfile("other", DATA_FRAME_FIELDS, payload_length=100)
+
+
+@pytest.fixture
+def detections(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Record the profiles checked against a frame."""
+    checked = []
+    matches = DecoderProfile.matches
+
+    def spy(profile: DecoderProfile, message: bytes) -> bool:
+        checked.append(profile.name)
+        return matches(profile, message)
+
+    monkeypatch.setattr(DecoderProfile, "matches", spy)
+    return checked
+
+
+def test_first_matching_profile() -> None:
+    registry = DecoderRegistry([OTHER_LENGTH_PROFILE, SIGNED_PROFILE])
+    sample = registry.decoder_for(1, build_data_frame()).decode(build_data_frame())
+    assert sample.profile is SIGNED_PROFILE
+    assert sample.inverter_serial_number == "1234567890ABCDEF"
+
+
+def test_default_profile_last() -> None:
+    registry = DecoderRegistry([OTHER_LENGTH_PROFILE])
+    assert registry.decoder_for(1, build_data_frame()).decode(build_data_frame()).profile is DEFAULT_PROFILE
+
+
+def test_no_matching_profile() -> None:
+    registry = DecoderRegistry([])
+    assert registry.decoder_for(1, build_data_frame()[:100]) is None
+
+
+def test_wanted_fields() -> None:
+    registry = DecoderRegistry(wanted={"solar_active_power"})
+    sample = registry.decoder_for(1, build_data_frame()).decode(build_data_frame())
+    assert sample.solar_active_power == 2410
+    assert sample.inverter_serial_number == "1234567890ABCDEF"
+    assert sample.dc_power is None
+
+
+def test_profile_cached_per_datalogger(detections: list[str]) -> None:
+    registry = DecoderRegistry([SIGNED_PROFILE])
+    frame = build_data_frame()
+    first = registry.decoder_for(1, frame)
+    assert registry.decoder_for(1, frame) is first
+    assert detections == ["signed"]
+
+
+def test_profile_detected_again_on_new_payload_length(detections: list[str]) -> None:
+    registry = DecoderRegistry([OTHER_LENGTH_PROFILE])
+    frame = build_data_frame()
+    registry.decoder_for(1, frame)
+    shorter = bytearray(frame)
+    shorter[1:3] = (100).to_bytes(2, "little")
+    assert registry.decoder_for(1, bytes(shorter)).decode(frame).profile is OTHER_LENGTH_PROFILE
+    assert detections == ["other", "S5-GR1P", "other"]
+
+
+def test_least_recently_seen_datalogger_forgotten(detections: list[str]) -> None:
+    registry = DecoderRegistry([SIGNED_PROFILE], max_dataloggers=2)
+    frame = build_data_frame()
+    for serialno in (1, 2, 1, 3, 1):
+        registry.decoder_for(serialno, frame)
+    # 2 was forgotten when 3 was first seen, 1 was seen more recently
+    assert len(detections) == 3
+    registry.decoder_for(2, frame)
+    assert len(detections) == 4
+
+
+def test_large_fleet_detected_once(detections: list[str]) -> None:
+    registry = DecoderRegistry([SIGNED_PROFILE])
+    frame = build_data_frame()
+    for _ in range(3):
+        for serialno in range(1000):
+            registry.decoder_for(serialno, frame)
+    assert len(detections) == 1000
+
+
+def test_unknown_profile_field() -> None:
+    with pytest.raises(ValueError, match="Unknown fields"):
+        replace(SIGNED_PROFILE, fields=(*DATA_FRAME_FIELDS, FrameField("unknown", 26, "B")))
+
+
+def test_wanted_fields_changed(detections: list[str]) -> None:
+    registry = DecoderRegistry([SIGNED_PROFILE], wanted={"dc_power"})
+    frame = build_data_frame()
+    assert registry.decoder_for(1, frame).decode(frame).solar_active_power is None
+    registry.set_wanted({"solar_active_power"})
+    sample = registry.decoder_for(1, frame).decode(frame)
+    assert sample.solar_active_power == 2410
+    assert sample.dc_power is None
+    assert sample.profile is SIGNED_PROFILE
+    registry.set_wanted(None)
+    assert registry.decoder_for(1, frame).decode(frame).dc_power == 2502
+    # The profile is not detected again
+    assert detections == ["signed"]
@@ -0,0 +1,65 @@
+"""Tests of the bus of the decoded samples."""
+
+import asyncio
+
+from custom_components.local_solis_ginglong_inverter.decoder import InverterSample
+from custom_components.local_solis_ginglong_inverter.events import SampleBus
+
+
+def test_samples_batched() -> None:
+    batches = []
+    received = []
+
+    async def subscriber(batch: list[InverterSample]) -> None:
+        received.append(batch)
+
+    async def publish() -> None:
+        bus = SampleBus(batches.append)
+        bus.subscribe(subscriber)
+        for timestamp in range(3):
+            bus.publish(InverterSample(timestamp=timestamp))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        await bus.close()
+
+    asyncio.run(publish())
+    assert [[sample.timestamp for sample in batch] for batch in batches] == [[0, 1, 2]]
+    assert received == batches
+
+
+def test_slow_subscriber_drops_oldest() -> None:
+    received = []
+
+    async def subscriber(batch: list[InverterSample]) -> None:
+        received.extend(sample.timestamp for sample in batch)
+
+    async def publish() -> int:
+        bus = SampleBus()
+        bus.subscribe(subscriber, queue_size=2)
+        for timestamp in range(5):
+            bus.publish(InverterSample(timestamp=timestamp))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        dropped = bus.dropped
+        await bus.close()
+        return dropped
+
+    assert asyncio.run(publish()) == 3
+    assert received == [3, 4]
+
+
+def test_subscribers_changes() -> None:
+    changes = []
+
+    async def subscriber(_batch: list[InverterSample]) -> None:
+        pass
+
+    async def subscribe() -> None:
+        bus = SampleBus(on_subscribers=lambda: changes.append(bus.has_subscribers))
+        unsubscribe = bus.subscribe(subscriber)
+        unsubscribe()
+        unsubscribe()
+        await bus.close()
+
+    asyncio.run(subscribe())
+    assert changes == [True, False]
@@ -0,0 +1,82 @@
+"""Tests of the export of the samples."""
+
+import asyncio
+import csv
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from custom_components.local_solis_ginglong_inverter import export
+from custom_components.local_solis_ginglong_inverter.decoder import InverterSample
+from custom_components.local_solis_ginglong_inverter.export import CsvExporter, SampleExporter, SqliteExporter
+
+
+def _sample(timestamp: int) -> InverterSample:
+    return InverterSample(timestamp=timestamp, inverter_serial_number="ABC", solar_apparent_power=100)
+
+
+def test_sqlite_export(tmp_path: Path) -> None:
+    async def record() -> None:
+        exporter = SqliteExporter(tmp_path / "samples.db")
+        for timestamp in (1_750_000_000, 1_750_000_060, 1_750_000_000):
+            exporter.record(_sample(timestamp))
+        await exporter.close()
+
+    asyncio.run(record())
+    with sqlite3.connect(tmp_path / "samples.db") as connection:
+        rows = connection.execute("SELECT timestamp, solar_apparent_power FROM samples ORDER BY timestamp").fetchall()
+    assert rows == [(1_750_000_000, 100), (1_750_000_060, 100)]
+
+
+def test_csv_export_per_day(tmp_path: Path) -> None:
+    async def record() -> None:
+        exporter = CsvExporter(tmp_path)
+        for timestamp in (1_750_000_000, 1_750_100_000):
+            exporter.record(_sample(timestamp))
+        await exporter.close()
+
+    asyncio.run(record())
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["2025-06-15.csv", "2025-06-16.csv"]
+    with (tmp_path / "2025-06-15.csv").open(encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    assert [row["timestamp"] for row in rows] == ["1750000000"]
+
+
+class BlockedExporter(SampleExporter):
+    """Exporter whose writer thread waits until it is released."""
+
+    def __init__(self) -> None:
+        super().__init__("unused", flush_size=2)
+        self.release = threading.Event()
+        self.written: list[Any] = []
+
+    def _write(self, rows: list[tuple[Any, ...]]) -> None:
+        self.release.wait()
+        self.written.extend(row[export.EXPORT_COLUMNS.index("timestamp")] for row in rows)
+
+
+def test_full_export_waits_for_writer(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(export, "MAX_PENDING_BATCHES", 1)
+    monkeypatch.setattr(export, "MAX_BUFFERED_SAMPLES", 4)
+
+    async def record() -> BlockedExporter:
+        exporter = BlockedExporter()
+        for timestamp in range(6):
+            exporter.record(_sample(timestamp))
+        # The first batch is being written, the others wait in memory
+        assert exporter.full
+        waiting = asyncio.create_task(exporter.wait_writable())
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        exporter.release.set()
+        await asyncio.wait_for(waiting, 5)
+        assert not exporter.full
+        await exporter.close()
+        return exporter
+
+    exporter = asyncio.run(record())
+    assert exporter.written == list(range(6))
+    assert exporter.stalls == 1
@@ -0,0 +1,92 @@
+"""Tests of the background queue of the messages forwarded after a local ACK."""
+
+import asyncio
+
+from custom_components.local_solis_ginglong_inverter.const import (
+    FORWARD_OVERFLOW_DROP_NEWEST,
+    FORWARD_OVERFLOW_DROP_OLDEST,
+)
+from custom_components.local_solis_ginglong_inverter.forwarder import ForwardQueue
+
+
+class FakePool:
+    """Upstream pool recording the messages, answering them once released."""
+
+    def __init__(self) -> None:
+        self.requests: list[tuple[int, bytes]] = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def request(self, serialno: int, message: bytes) -> bytes | None:
+        await self.release.wait()
+        self.requests.append((serialno, message))
+        return None if message == b"fail" else b"ack"
+
+
+async def _drain() -> None:
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_messages_forwarded_in_order() -> None:
+    forwarded = []
+
+    async def run() -> FakePool:
+        pool = FakePool()
+        queue = ForwardQueue(pool, 10, on_forwarded=lambda serialno, _elapsed: forwarded.append(serialno))
+        for message in (b"1", b"fail", b"2"):
+            assert queue.put(1, message)
+        assert queue.put(2, b"3")
+        await _drain()
+        await queue.close()
+        return pool
+
+    pool = asyncio.run(run())
+    assert [message for serialno, message in pool.requests if serialno == 1] == [b"1", b"fail", b"2"]
+    assert (2, b"3") in pool.requests
+    # Only the messages that got a response
+    assert sorted(forwarded) == [1, 1, 2]
+
+
+def _overflow(overflow: str) -> list[bytes]:
+    async def run() -> list[bytes]:
+        pool = FakePool()
+        pool.release.clear()
+        queue = ForwardQueue(pool, 2, overflow)
+        assert queue.put(1, b"1")
+        # The worker takes the first message and waits for the pool
+        await _drain()
+        assert queue.put(1, b"2")
+        assert queue.put(1, b"3")
+        assert not queue.put(1, b"4")
+        assert queue.dropped == 1
+        pool.release.set()
+        await _drain()
+        await queue.close()
+        return [message for _, message in pool.requests]
+
+    return asyncio.run(run())
+
+
+def test_overflow_drops_oldest() -> None:
+    assert _overflow(FORWARD_OVERFLOW_DROP_OLDEST) == [b"1", b"3", b"4"]
+
+
+def test_overflow_drops_newest() -> None:
+    assert _overflow(FORWARD_OVERFLOW_DROP_NEWEST) == [b"1", b"2", b"3"]
+
+
+def test_close_discards_queued_messages() -> None:
+    async def run() -> FakePool:
+        pool = FakePool()
+        pool.release.clear()
+        queue = ForwardQueue(pool, 10)
+        queue.put(1, b"1")
+        queue.put(1, b"2")
+        await _drain()
+        await queue.close()
+        pool.release.set()
+        await _drain()
+        return pool
+
+    assert asyncio.run(run()).requests == []
@@ -0,0 +1,106 @@
+"""Tests of the forwarding of the datalogger messages to the upstream targets."""
+
+import asyncio
+import logging
+
+import pytest
+
+from custom_components.local_solis_ginglong_inverter import forwarder
+from custom_components.local_solis_ginglong_inverter.forwarder import CircuitBreaker
+from custom_components.local_solis_ginglong_inverter.server import LoggerServer
+from tests.conftest import build_heartbeat_frame, free_port
+
+
+class FakeClock:
+    """Monotonic clock advanced by the tests."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    """Replace the clock of the circuit breakers."""
+    fake = FakeClock()
+    monkeypatch.setattr(forwarder.time, "monotonic", fake)
+    return fake
+
+
+def test_breaker_opens_after_threshold(clock: FakeClock) -> None:  # noqa: ARG001
+    breaker = CircuitBreaker(failure_threshold=3)
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_success_resets_failures(clock: FakeClock) -> None:  # noqa: ARG001
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    assert not breaker.record_success()
+    assert not breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_half_open_probe(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    clock.now += forwarder.BACKOFF_INITIAL
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # A single probe at a time
+    assert not breaker.allow()
+    assert breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_backoff_doubles(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    clock.now += forwarder.BACKOFF_INITIAL
+    assert breaker.allow()
+    assert breaker.record_failure()
+    clock.now += forwarder.BACKOFF_INITIAL
+    assert not breaker.allow()
+    clock.now += forwarder.BACKOFF_INITIAL
+    assert breaker.allow()
+
+
+def test_breaker_backoff_bounded(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    for _ in range(20):
+        clock.now += forwarder.BACKOFF_MAX
+        assert breaker.allow()
+        breaker.record_failure()
+    clock.now += forwarder.BACKOFF_MAX
+    assert breaker.allow()
+
+
+def test_fallback_logged_once(caplog: pytest.LogCaptureFixture) -> None:
+    port = free_port()
+
+    async def exchange() -> None:
+        # Nothing listens on the upstream port, the connections are refused
+        server = LoggerServer(port, lambda _: None, forward=True, forward_host=f"127.0.0.1:{free_port()}")
+        await server.start_server()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for _ in range(2 * forwarder.FAILURE_THRESHOLD):
+            writer.write(build_heartbeat_frame())
+            await writer.drain()
+            await reader.readexactly(23)
+        writer.close()
+        await server.stop_server()
+
+    with caplog.at_level(logging.WARNING):
+        asyncio.run(exchange())
+    warnings = [record.getMessage() for record in caplog.records if record.levelno == logging.WARNING]
+    assert len(warnings) == 2
+    assert "falling back" in warnings[0]
+    assert "pausing forwarding" in warnings[1]
@@ -0,0 +1,58 @@
+"""Tests of the classification of the replayed samples."""
+
+from custom_components.local_solis_ginglong_inverter.history import (
+    SAMPLE_DUPLICATE,
+    SAMPLE_LATE,
+    SAMPLE_LIVE,
+    SampleHistory,
+)
+
+
+def test_live_samples() -> None:
+    history = SampleHistory()
+    assert history.classify("a", 100) == SAMPLE_LIVE
+    assert history.classify("a", 200) == SAMPLE_LIVE
+    assert history.classify("b", 50) == SAMPLE_LIVE
+
+
+def test_duplicate_sample() -> None:
+    history = SampleHistory()
+    history.classify("a", 100)
+    history.classify("a", 200)
+    assert history.classify("a", 100) == SAMPLE_DUPLICATE
+    assert history.classify("a", 200) == SAMPLE_DUPLICATE
+
+
+def test_late_sample() -> None:
+    history = SampleHistory()
+    history.classify("a", 200)
+    assert history.classify("a", 100) == SAMPLE_LATE
+    # Seen once, even if late
+    assert history.classify("a", 100) == SAMPLE_DUPLICATE
+    # The latest live sample did not move back
+    assert history.classify("a", 150) == SAMPLE_LATE
+
+
+def test_least_recently_seen_samples_forgotten() -> None:
+    history = SampleHistory(max_seen=2)
+    for timestamp in (100, 200, 100, 300):
+        history.classify("a", timestamp)
+    assert history.classify("a", 100) == SAMPLE_DUPLICATE
+    # Forgotten, only known to be older than the latest one
+    assert history.classify("a", 200) == SAMPLE_LATE
+
+
+def test_large_fleet_late_samples() -> None:
+    history = SampleHistory()
+    inverters = [f"inverter{i}" for i in range(1000)]
+    for inverter_id in inverters:
+        history.classify(inverter_id, 1000)
+    assert {history.classify(inverter_id, 500) for inverter_id in inverters} == {SAMPLE_LATE}
+
+
+def test_least_recently_seen_inverters_forgotten() -> None:
+    history = SampleHistory(max_inverters=2)
+    for inverter_id in ("a", "b", "a", "c"):
+        history.classify(inverter_id, 1000)
+    assert history.classify("a", 500) == SAMPLE_LATE
+    assert history.classify("b", 500) == SAMPLE_LIVE
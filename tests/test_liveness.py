@@ -0,0 +1,71 @@
+"""Tests of the liveness of the inverters."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+from custom_components.local_solis_ginglong_inverter.liveness import LivenessTracker
+
+TIMEOUT = 0.1  # seconds
+
+
+def _track(scenario: Callable[[LivenessTracker], Awaitable[None]]) -> list[tuple[str, bool]]:
+    changes = []
+
+    async def run() -> None:
+        tracker = LivenessTracker(TIMEOUT, lambda inverter_id, online: changes.append((inverter_id, online)), 8)
+        try:
+            await scenario(tracker)
+        finally:
+            tracker.close()
+
+    asyncio.run(run())
+    return changes
+
+
+def test_silent_inverter_offline() -> None:
+    async def scenario(tracker: LivenessTracker) -> None:
+        tracker.touch("a")
+        assert tracker.is_online("a")
+        await asyncio.sleep(2 * TIMEOUT)
+        assert not tracker.is_online("a")
+
+    assert _track(scenario) == [("a", True), ("a", False)]
+
+
+def test_frames_keep_inverter_online() -> None:
+    async def scenario(tracker: LivenessTracker) -> None:
+        for _ in range(6):
+            tracker.touch("a")
+            await asyncio.sleep(TIMEOUT / 3)
+        assert tracker.is_online("a")
+
+    assert _track(scenario) == [("a", True)]
+
+
+def test_inverter_online_again() -> None:
+    async def scenario(tracker: LivenessTracker) -> None:
+        tracker.touch("a")
+        tracker.touch("b")
+        await asyncio.sleep(TIMEOUT / 2)
+        tracker.touch("b")
+        await asyncio.sleep(0.8 * TIMEOUT)
+        assert not tracker.is_online("a")
+        assert tracker.is_online("b")
+        tracker.touch("a")
+
+    assert _track(scenario) == [("a", True), ("b", True), ("a", False), ("a", True)]
+
+
+def test_many_offline_inverters_online_again() -> None:
+    inverters = [f"inverter{i}" for i in range(300)]
+
+    async def scenario(tracker: LivenessTracker) -> None:
+        for inverter_id in inverters:
+            tracker.touch(inverter_id)
+        await asyncio.sleep(2 * TIMEOUT)
+        for inverter_id in inverters:
+            tracker.touch(inverter_id)
+
+    changes = _track(scenario)
+    assert sorted(inverter_id for inverter_id, online in changes if not online) == sorted(inverters)
+    assert [inverter_id for inverter_id, online in changes if online] == inverters + inverters
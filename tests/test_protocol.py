@@ -0,0 +1,63 @@
+"""Tests of the framing of the datalogger messages."""
+
+from custom_components.local_solis_ginglong_inverter.protocol import HEADER_LENGTH, _scan_frame
+from tests.conftest import build_data_frame, build_heartbeat_frame
+
+
+def test_scan_complete_frame() -> None:
+    frame = build_data_frame()
+    assert _scan_frame(frame, 0, len(frame)) == (0, len(frame), True)
+
+
+def test_scan_without_start_byte() -> None:
+    buffer = b"\x00\x01\x02"
+    assert _scan_frame(buffer, 0, len(buffer)) == (len(buffer), HEADER_LENGTH, False)
+
+
+def test_scan_incomplete_header() -> None:
+    frame = build_data_frame()
+    assert _scan_frame(frame, 0, 5) == (0, HEADER_LENGTH, False)
+
+
+def test_scan_incomplete_frame() -> None:
+    frame = build_data_frame()
+    assert _scan_frame(frame, 0, len(frame) - 1) == (0, len(frame), False)
+
+
+def test_scan_skips_garbage() -> None:
+    frame = build_heartbeat_frame()
+    buffer = b"\x00\xff" + frame
+    assert _scan_frame(buffer, 0, len(buffer)) == (2, len(frame), True)
+
+
+def test_scan_skips_corrupted_frame() -> None:
+    corrupted = bytearray(build_heartbeat_frame())
+    corrupted[-2] ^= 0xFF
+    frame = build_data_frame()
+    buffer = bytes(corrupted) + frame
+    assert _scan_frame(buffer, 0, len(buffer)) == (len(corrupted), len(frame), True)
+
+
+def test_scan_skips_implausible_length() -> None:
+    frame = build_data_frame()
+    buffer = b"\xa5\xff\xff" + frame
+    assert _scan_frame(buffer, 0, len(buffer)) == (3, len(frame), True)
+
+
+def test_scan_skips_stray_start_byte_before_complete_frame() -> None:
+    # Looks like the header of a 413 bytes frame, longer than the DATA frame following it
+    frame = build_data_frame()
+    buffer = b"\xa5\x90\x01" + frame
+    assert _scan_frame(buffer, 0, len(buffer)) == (3, len(frame), True)
+
+
+def test_scan_waits_after_stray_start_byte_before_incomplete_frame() -> None:
+    frame = build_data_frame()
+    buffer = b"\xa5\x90\x01" + frame[:-1]
+    assert _scan_frame(buffer, 0, len(buffer)) == (0, 0x190 + HEADER_LENGTH + 2, False)
+
+
+def test_scan_from_start() -> None:
+    frame = build_heartbeat_frame()
+    buffer = frame + frame
+    assert _scan_frame(buffer, len(frame), len(buffer)) == (len(frame), len(frame), True)
@@ -0,0 +1,37 @@
+"""Tests of the stream of samples between the collector and the integration."""
+
+import asyncio
+
+from custom_components.local_solis_ginglong_inverter.decoder import InverterSample
+from custom_components.local_solis_ginglong_inverter.sample_stream import CollectorClient, encode_sample
+
+
+def test_client_paused_by_pending_sample() -> None:
+    received = []
+
+    async def run() -> None:
+        writable = asyncio.Event()
+
+        def on_sample(sample: InverterSample) -> asyncio.Future | None:
+            received.append(sample.timestamp)
+            return asyncio.ensure_future(writable.wait()) if len(received) == 1 else None
+
+        async def publish(_reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            writer.writelines(encode_sample(InverterSample(timestamp=timestamp)) for timestamp in (1, 2))
+            await writer.drain()
+
+        server = await asyncio.start_server(publish, "127.0.0.1", 0)
+        client = CollectorClient("127.0.0.1", server.sockets[0].getsockname()[1], on_sample)
+        client.start()
+        try:
+            await asyncio.sleep(0.1)
+            # The second sample is not read until the first one is handled
+            assert received == [1]
+            writable.set()
+            await asyncio.sleep(0.1)
+            assert received == [1, 2]
+        finally:
+            await client.close()
+            server.close()
+
+    asyncio.run(run())
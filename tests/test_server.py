@@ -0,0 +1,51 @@
+"""Tests of the datalogger connections of the server."""
+
+import asyncio
+
+import pytest
+
+from custom_components.local_solis_ginglong_inverter.const import TRANSPORT_BUFFERED, TRANSPORT_STREAM
+from custom_components.local_solis_ginglong_inverter.decoder import InverterSample
+from custom_components.local_solis_ginglong_inverter.server import LoggerServer
+from tests.conftest import build_data_frame, free_port
+
+RESPONSE_LENGTH = 23
+
+
+def _exchange(transport: str, chunks: list[bytes]) -> tuple[bytes, list[InverterSample]]:
+    """Send the chunks to a server, one write each, and return the responses and the samples received."""
+    port = free_port()
+    samples = []
+
+    async def run() -> bytes:
+        server = LoggerServer(port, samples.append, transport=transport)
+        await server.start_server()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            for chunk in chunks:
+                writer.write(chunk)
+                await writer.drain()
+                await asyncio.sleep(0.01)
+            response = await asyncio.wait_for(reader.readexactly(RESPONSE_LENGTH), 2)
+            writer.close()
+        finally:
+            await server.stop_server()
+        return response
+
+    return asyncio.run(run()), samples
+
+
+@pytest.mark.parametrize("transport", [TRANSPORT_STREAM, TRANSPORT_BUFFERED])
+def test_frame_split_across_reads(transport: str) -> None:
+    frame = build_data_frame()
+    response, samples = _exchange(transport, [frame[:5], frame[5:100], frame[100:]])
+    assert response[0] == 0xA5
+    assert [sample.timestamp for sample in samples] == [1_750_000_000]
+
+
+@pytest.mark.parametrize("transport", [TRANSPORT_STREAM, TRANSPORT_BUFFERED])
+def test_stray_start_byte_before_frame(transport: str) -> None:
+    # Looks like the header of a frame longer than the DATA frame following it
+    response, samples = _exchange(transport, [b"\xa5\x90\x01" + build_data_frame()])
+    assert response[0] == 0xA5
+    assert len(samples) == 1
@@ -0,0 +1,46 @@
+"""Tests of the limits of the datalogger connections."""
+
+import asyncio
+
+from custom_components.local_solis_ginglong_inverter.supervisor import ConnectionSupervisor
+
+READ_TIMEOUT = 30
+
+
+def _admit_twice(silent_for: float) -> tuple[ConnectionSupervisor, list[int], bool]:
+    """
+    Admit two connections from the same host, the first one silent for `silent_for` seconds before the second.
+
+    Returns the supervisor, the ports of the connections it closed, and whether the second one was admitted.
+    """
+    closed = []
+
+    async def run() -> tuple[ConnectionSupervisor, bool]:
+        supervisor = ConnectionSupervisor(10, 1, 600, READ_TIMEOUT)
+        first = supervisor.admit(("10.0.0.1", 1000), lambda: closed.append(1000))
+        first.last_activity -= silent_for
+        admitted = supervisor.admit(("10.0.0.1", 1001), lambda: closed.append(1001)) is not None
+        # Stops the sweep
+        supervisor.close_all()
+        return supervisor, admitted
+
+    supervisor, admitted = asyncio.run(run())
+    return supervisor, closed, admitted
+
+
+def test_silent_connection_evicted() -> None:
+    supervisor, closed, admitted = _admit_twice(READ_TIMEOUT + 1)
+    assert admitted
+    assert closed == [1000, 1001]
+    assert supervisor.evicted == 1
+    assert supervisor.rejected == 0
+
+
+def test_active_connection_kept() -> None:
+    # Another datalogger behind the same NAT, the active connection is not closed
+    supervisor, closed, admitted = _admit_twice(1)
+    assert not admitted
+    # Only closed by close_all
+    assert closed == [1000]
+    assert supervisor.evicted == 0
+    assert supervisor.rejected == 1